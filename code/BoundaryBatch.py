@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Command-line batch runner for find_Boundary.
+
+Reads a CSV or Parquet table of query points, solves each row for the
+missing coordinate (x, y, z, or p_sw) in chunks on a process pool, and
+appends the results to a CSV file as each chunk finishes. Rerunning with
+the same output file skips the rows which were already written.
+
+Example:
+    python BoundaryBatch.py positions.parquet results.csv --boundary MP \
+        --solve p_sw --columns x=x_JSS,y=y_JSS,z=z_JSS --workers 4
+
+@author: mrutala
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import find_Boundary as fB
+
+def read_QueryTable(filepath):
+    """
+    Read a CSV or Parquet table, based on the file extension
+    """
+    if os.path.splitext(filepath)[1].lower() in ['.parquet', '.pq']:
+        return pd.read_parquet(filepath)
+    return pd.read_csv(filepath)
+
+def read_CompletedRows(filepath):
+    """
+    Rows already present in a (partial) output file
+
+    A run interrupted mid-write can leave a truncated last line, and a
+    later append would then continue that line. So only complete lines with
+    every column, a valid row number, and a converged flag are kept, and
+    the file is rewritten without the rest before any more is appended
+    """
+    if not os.path.exists(filepath) or os.path.getsize(filepath) == 0:
+        return np.array([], dtype='int64')
+
+    with open(filepath, newline='') as f:
+        lines = f.read().splitlines(keepends=True)
+
+    header = lines[0]
+    if not header.endswith('\n'):
+        # Not even the header was completed
+        os.remove(filepath)
+        return np.array([], dtype='int64')
+    columns = next(csv.reader([header]))
+    i_row, i_converged = columns.index('row'), columns.index('converged')
+
+    kept, rows = [header], []
+    for line in lines[1:]:
+        fields = next(csv.reader([line]), [])
+        if (line.endswith('\n') and len(fields) == len(columns) and
+                fields[i_row].isdigit() and fields[i_converged] in ['True', 'False']):
+            kept.append(line)
+            rows.append(int(fields[i_row]))
+
+    if len(kept) < len(lines):
+        # Write then rename, so a second interruption cannot lose the good rows
+        temp_filepath = '{}.{}.tmp'.format(filepath, os.getpid())
+        with open(temp_filepath, 'w', newline='') as f:
+            f.writelines(kept)
+        os.replace(temp_filepath, filepath)
+
+    return np.array(rows, dtype='int64')
+
+def solve_Chunk(rows, boundary, solve, known, guess, kwargs):
+    """
+    Solve one chunk of query points with find_Boundaries, returning a
+    DataFrame of results labelled by input row
+    """
+    coords = {key: True if key == solve else val for key, val in known.items()}
+    result, converged = fB.find_Boundaries(boundary, **coords, guess=guess, **kwargs)
+
+    if solve == 'p_sw':
+        columns = ['p_sw', 'p_sw_neg', 'p_sw_pos']
+    else:
+        columns = [solve, solve + '_std']
+
+    df = pd.DataFrame(result, columns=columns)
+    df.insert(0, 'row', rows)
+    df['converged'] = converged
+
+    return df
+
+def parse_Arguments(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('@author')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='CSV or Parquet table of query points')
+    parser.add_argument('output', help='CSV file to write (or resume) results')
+    parser.add_argument('--boundary', default='MP', help="'MP' or 'BS' (default: MP)")
+    parser.add_argument('--solve', default='x', choices=['x', 'y', 'z', 'p_sw'],
+                        help='coordinate to solve for (default: x)')
+    parser.add_argument('--columns', default='',
+                        help='input column names, as key=column pairs, e.g. x=x_JSS,p_sw=p_dyn')
+    parser.add_argument('--guess', default='1',
+                        help='initial guess: a number, or an input column name (default: 1)')
+    parser.add_argument('--n', type=int, default=500, help='Monte Carlo samples (default: 500)')
+    parser.add_argument('--sampling', default='random', choices=['random', 'qmc'])
+    parser.add_argument('--seed', type=int, default=None,
+                        help='base seed; chunk k is seeded with seed + k')
+    parser.add_argument('--posterior', default=None, help='saved posterior (*_posterior.pkl)')
+    parser.add_argument('--chunksize', type=int, default=1000, help='rows per chunk (default: 1000)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='number of worker processes (default: all CPUs)')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='start over, rather than resuming from the output file')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_Arguments(argv)
+
+    # Map coordinate names to input columns
+    column_names = {key: key for key in ['x', 'y', 'z', 'p_sw']}
+    for pair in filter(None, args.columns.split(',')):
+        key, column = pair.split('=')
+        column_names[key.strip()] = column.strip()
+
+    table = read_QueryTable(args.input)
+    n_rows = len(table)
+
+    known = {key: table[column_names[key]].to_numpy(dtype='float64')
+             for key in column_names if key != args.solve}
+    if args.guess in table.columns:
+        guess = table[args.guess].to_numpy(dtype='float64')
+    else:
+        guess = np.full(n_rows, float(args.guess))
+
+    # Resume from a partial output file, unless asked to start over
+    if args.overwrite and os.path.exists(args.output):
+        os.remove(args.output)
+    completed = read_CompletedRows(args.output)
+    remaining = np.setdiff1d(np.arange(n_rows), completed)
+
+    # Chunks are defined on the full table, so that seeds are stable on restart
+    chunks = []
+    for start in range(0, n_rows, args.chunksize):
+        rows = remaining[(remaining >= start) & (remaining < start + args.chunksize)]
+        if len(rows) > 0:
+            seed = None if args.seed is None else args.seed + start // args.chunksize
+            chunks.append((rows, seed))
+
+    kwargs = {'n': args.n, 'sampling': args.sampling, 'posterior': args.posterior}
+
+    print('{} of {} rows already complete; solving {} rows in {} chunks on {} workers'
+          .format(len(completed), n_rows, len(remaining), len(chunks), args.workers),
+          file=sys.stderr)
+
+    write_header = not os.path.exists(args.output) or os.path.getsize(args.output) == 0
+    n_done, t0 = 0, time.time()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(solve_Chunk, rows, args.boundary, args.solve,
+                                   {key: val[rows] for key, val in known.items()},
+                                   guess[rows], kwargs | {'seed': seed})
+                   for rows, seed in chunks]
+
+        for future in as_completed(futures):
+            result = future.result()
+            # One write per chunk, so an interruption truncates at most the last line
+            with open(args.output, 'a', newline='') as f:
+                f.write(result.to_csv(header=write_header, index=False))
+            write_header = False
+
+            n_done += len(result)
+            elapsed = time.time() - t0
+            rate = n_done / elapsed
+            print('{}/{} rows ({:.1f}%), {:.1f} rows/s, ETA {:.0f} s'
+                  .format(n_done, len(remaining), 100 * n_done / len(remaining),
+                          rate, (len(remaining) - n_done) / rate),
+                  file=sys.stderr)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
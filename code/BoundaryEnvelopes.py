@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming credible bands of the boundary surfaces.
+
+QuantileSketch keeps a P-squared estimate (Jain & Chlamtac 1985) of each
+requested quantile at every point of a surface: five markers per quantile
+and point, updated as each new surface arrives, so the memory used does not
+depend on the number of surfaces. The updates are vectorized over points
+and quantiles, and surfaces can be fed in chunks of any size.
+
+get_SurfaceEnvelope streams posterior parameter samples through a model in
+chunks and returns the quantile bands of r at each point, e.g. to plot
+5/16/50/84/95% bands from 10^5 samples in place of a few hundred
+translucent lines.
+
+@author: mrutala
+"""
+import warnings
+
+import numpy as np
+
+import BoundaryModelsCore as BMC
+
+class QuantileSketch:
+    """
+    Per-point P-squared quantile estimates over a stream of surfaces
+
+    Non-finite values are skipped, point by point. Until a point has seen
+    five values, its quantiles are computed exactly from them.
+    """
+    def __init__(self, shape, quantiles=(0.05, 0.16, 0.5, 0.84, 0.95)):
+        self.shape = tuple(int(n) for n in np.atleast_1d(shape))
+        self.quantiles = np.asarray(quantiles, dtype='float64')
+        n_points, n_quantiles = int(np.prod(self.shape)), len(self.quantiles)
+
+        #   Number of finite values seen at each point
+        self.counts = np.zeros(n_points, dtype='int64')
+        self._started = False
+        #   The first five values at each point, then the marker heights
+        #   and (0-based) positions, as (marker, quantile, point)
+        self._first = np.full((5, n_points), np.nan)
+        self._heights = np.zeros((5, n_quantiles, n_points))
+        self._positions = np.zeros((5, n_quantiles, n_points))
+
+        #   Desired marker positions after c values are base + increment*(c - 5)
+        q = self.quantiles[:, None]
+        self._base = np.stack([0*q, 2*q, 4*q, 2 + 2*q, 4 + 0*q])
+        self._increment = np.stack([0*q, q/2, q, (1 + q)/2, 1 + 0*q])
+
+    @property
+    def n_points(self):
+        return len(self.counts)
+
+    def update(self, surfaces):
+        """
+        Add one surface, of the sketch's shape, or a chunk (C, *shape) of them
+        """
+        surfaces = np.asarray(surfaces, dtype='float64').reshape(-1, self.n_points)
+        for surface in surfaces:
+            self._update_Row(surface)
+
+    def _update_Row(self, x):
+        valid = np.isfinite(x)
+
+        # Once every point has started, a fully finite row (the usual case)
+        # steps every point, working on views of the markers
+        if self._started and valid.all():
+            points = slice(None)
+        else:
+            # Points still collecting their first five values
+            filling = valid & (self.counts < 5)
+            if filling.any():
+                points = np.flatnonzero(filling)
+                self._first[self.counts[points], points] = x[points]
+                self.counts[points] += 1
+                ready = points[self.counts[points] == 5]
+                if len(ready) > 0:
+                    self._heights[:, :, ready] = np.sort(self._first[:, ready], axis=0)[:, None, :]
+                    self._positions[:, :, ready] = np.arange(5)[:, None, None]
+                self._started = bool((self.counts >= 5).all())
+
+            # All other points with a value take a P-squared step
+            points = np.flatnonzero(valid & (self.counts >= 5) & ~filling)
+            if len(points) == 0:
+                return
+
+        q, n = self._heights[:, :, points], self._positions[:, :, points]
+        x = x[points]
+        self.counts[points] += 1
+
+        # Extend the extreme markers, find the cell of x, and shift the
+        # positions of the markers above it
+        np.minimum(q[0], x, out=q[0])
+        np.maximum(q[4], x, out=q[4])
+        n[4] += 1
+        for j in (3, 2, 1):
+            n[j] += x < q[j]
+
+        # Move each middle marker toward its desired position, by one
+        # position at most, with a piecewise-parabolic (else linear) height.
+        # Few markers move on any one step, so only those are computed
+        shape = n.shape
+        q, n = q.reshape(5, -1), n.reshape(5, -1)
+        desired = (self._base + self._increment * (self.counts[points] - 5)).reshape(5, -1)
+        for i in (1, 2, 3):
+            d = desired[i] - n[i]
+            up = np.flatnonzero((d >= 1) & (n[i+1] - n[i] > 1))
+            down = np.flatnonzero((d <= -1) & (n[i-1] - n[i] < -1))
+            moving = np.concatenate([up, down])
+            if len(moving) == 0:
+                continue
+
+            s = np.concatenate([np.ones(len(up)), -np.ones(len(down))])
+            qm, nm = q[i-1:i+2, moving], n[i-1:i+2, moving]
+            slope_up = (qm[2] - qm[1]) / (nm[2] - nm[1])
+            slope_down = (qm[1] - qm[0]) / (nm[1] - nm[0])
+            parabolic = qm[1] + s / (nm[2] - nm[0]) * ((nm[1] - nm[0] + s) * slope_up +
+                                                       (nm[2] - nm[1] - s) * slope_down)
+            linear = qm[1] + np.where(s > 0, slope_up, -slope_down)
+            inside = (qm[0] < parabolic) & (parabolic < qm[2])
+            q[i, moving] = np.where(inside, parabolic, linear)
+            n[i, moving] += s
+
+        if not isinstance(points, slice):
+            self._heights[:, :, points], self._positions[:, :, points] = q.reshape(shape), n.reshape(shape)
+
+    def get_Quantiles(self):
+        """
+        Return the (n_quantiles, *shape) estimates; NaN where a point has
+        no finite values
+        """
+        estimates = self._heights[2].copy()
+
+        # Points with fewer than five values: exact quantiles of those seen
+        few = self.counts < 5
+        if few.any():
+            with warnings.catch_warnings():
+                # All-NaN points stay NaN
+                warnings.simplefilter('ignore', RuntimeWarning)
+                estimates[:, few] = np.nanquantile(self._first[:, few], self.quantiles, axis=0)
+
+        return estimates.reshape((len(self.quantiles),) + self.shape)
+
+def get_SurfaceEnvelope(model, parameters, coordinates,
+                        quantiles=(0.05, 0.16, 0.5, 0.84, 0.95), chunk_size=1000,
+                        **kwargs):
+    """
+    Stream parameter samples through a model, and return the quantiles of
+    r at each point
+
+    Parameters
+    ----------
+    model : str or function
+        Name of a model in BoundaryModels.init(), or the model function
+    parameters : arraylike or dict
+        (S, k) parameter samples, as in evaluate_Model
+    coordinates : arraylike or ObservationGeometry
+        (3, ...) array, or sequence of three broadcastable arrays, of
+        (t, p, p_dyn); or an ObservationGeometry
+    quantiles : tuple, optional
+        The default is (0.05, 0.16, 0.5, 0.84, 0.95).
+    chunk_size : int, optional
+        Number of samples evaluated at once. The default is 1000.
+    **kwargs
+        Passed to the model, e.g. return_r_ss=True
+
+    Returns
+    -------
+    bands : np.ndarray
+        (n_quantiles, ...) array of the quantiles of r at each point
+
+    """
+    model, parameters = BMC._resolve_Model(model, parameters)
+    parameters = np.atleast_2d(parameters)
+    if not isinstance(coordinates, BMC.ObservationGeometry):
+        coordinates = BMC.ObservationGeometry(*np.broadcast_arrays(*[np.asarray(coord, dtype='float64')
+                                                                     for coord in coordinates]))
+    shape = np.broadcast_shapes(*[np.shape(coord) for coord in coordinates])
+
+    sketch = QuantileSketch(shape, quantiles)
+    for start in range(0, len(parameters), chunk_size):
+        sketch.update(BMC.evaluate_Model(model, parameters[start:start+chunk_size], coordinates, **kwargs))
+
+    return sketch.get_Quantiles()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compiled functions of the registered boundary models, built once and kept.
+
+get_CompiledModel compiles a model of BoundaryModelsCore into a pytensor
+function of (parameter samples, t, p, p_dyn), together with its
+vector-Jacobian product (the gradient of sum(cotangent * r) with respect to
+every input), and keeps both in memory and pickled on disk, keyed by model
+name, dtype, and a hash of the model's source, so later processes load
+them rather than rebuild and recompile the graph. If pytensor is not
+installed, the same interface is served by the NumPy models
+(evaluate_Model and evaluate_ModelGradient).
+
+get_ModelOp wraps a compiled model as a pytensor Op, so that a pymc model
+contains a single node for the boundary rather than rebuilding its graph:
+    mu0 = get_ModelOp(model_name)(pt.stack(params), t, p, p_dyn)
+
+The on-disk cache is in ~/.cache/JupiterBoundaries, or the directory named
+by the environment variable BOUNDARY_FUNCTION_CACHE.
+
+@author: mrutala
+"""
+import hashlib
+import inspect
+import os
+import pickle
+
+import numpy as np
+
+import BoundaryModelsCore as BMC
+
+try:
+    import pytensor
+    import pytensor.tensor as pt
+    from pytensor.graph import Apply, Op
+except ImportError:
+    pytensor = None
+    Op = object
+
+# Compiled models, by (model name, dtype)
+_compiled_models = {}
+
+def get_CacheDirectory():
+    path = os.environ.get('BOUNDARY_FUNCTION_CACHE',
+                          os.path.join(os.path.expanduser('~'), '.cache', 'JupiterBoundaries'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _get_CacheKey(model_name, dtype):
+    """
+    A file name for the compiled functions which changes whenever the model,
+    the geometry it is built from, or the pytensor version changes
+    """
+    model = BMC.init(model_name)['model']
+    source = inspect.getsource(inspect.unwrap(model)) + inspect.getsource(BMC.ObservationGeometry)
+    digest = hashlib.sha1((source + pytensor.__version__).encode()).hexdigest()[:16]
+    return '{}-{}-{}.pkl'.format(model_name, dtype, digest)
+
+def _compile_Functions(model_name, dtype):
+    """
+    Build the symbolic graph of a model and compile its value and
+    vector-Jacobian product
+    """
+    model_dict = BMC.init(model_name)
+    n_params = len(model_dict['param_descriptions'])
+
+    # (S, k) parameter samples against (N,) points, as (S, 1) and (1, N)
+    parameters = pt.matrix('parameters', dtype=dtype)
+    t, p, p_dyn = [pt.vector(name, dtype=dtype) for name in ('t', 'p', 'p_dyn')]
+    geometry = BMC.ObservationGeometry(t[None, :], p[None, :], p_dyn[None, :])
+    r = model_dict['model']([parameters[:, i][:, None] for i in range(n_params)], geometry)
+    r = pt.broadcast_to(r, (parameters.shape[0], t.shape[0]))
+
+    cotangent = pt.matrix('cotangent', dtype=dtype)
+    gradients = pt.grad((cotangent * r).sum(), [parameters, t, p, p_dyn],
+                        disconnected_inputs='ignore')
+
+    # Some models do not depend on every coordinate (e.g. Shuelike on p)
+    value_fn = pytensor.function([parameters, t, p, p_dyn], r, on_unused_input='ignore')
+    vjp_fn = pytensor.function([parameters, t, p, p_dyn, cotangent], gradients, on_unused_input='ignore')
+    return value_fn, vjp_fn
+
+class CompiledModel:
+    """
+    A registered model, compiled once, evaluated as evaluate_Model
+
+    Use get_CompiledModel rather than constructing these directly.
+    """
+    def __init__(self, model_name, dtype='float64', persist=True):
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype).name
+        self.backend = 'numpy' if pytensor is None else 'pytensor'
+        self._value_fn, self._vjp_fn = None, None
+
+        if self.backend == 'pytensor':
+            filepath = os.path.join(get_CacheDirectory(), _get_CacheKey(model_name, self.dtype)) if persist else None
+            if filepath is not None and os.path.exists(filepath):
+                try:
+                    with open(filepath, 'rb') as f:
+                        self._value_fn, self._vjp_fn = pickle.load(f)
+                except Exception:
+                    # A stale or partial file: compile again, below
+                    self._value_fn = None
+
+            if self._value_fn is None:
+                self._value_fn, self._vjp_fn = _compile_Functions(model_name, self.dtype)
+                if filepath is not None:
+                    # Write then rename, so other processes never see a partial file
+                    temp_filepath = '{}.{}.tmp'.format(filepath, os.getpid())
+                    with open(temp_filepath, 'wb') as f:
+                        pickle.dump((self._value_fn, self._vjp_fn), f, protocol=pickle.HIGHEST_PROTOCOL)
+                    os.replace(temp_filepath, filepath)
+
+    def _prepare_Inputs(self, parameters, coordinates):
+        _, parameters = BMC._resolve_Model(self.model_name, parameters)
+        single = parameters.ndim == 1
+        parameters = np.atleast_2d(parameters).astype(self.dtype)
+        coordinates = np.broadcast_arrays(*[np.asarray(coord, dtype=self.dtype) for coord in coordinates])
+        shape = coordinates[0].shape
+        coordinates = [coord.ravel() for coord in coordinates]
+        return parameters, coordinates, shape, single
+
+    def __call__(self, parameters, coordinates, max_elements=2**24):
+        """
+        Evaluate the model, as BoundaryModelsCore.evaluate_Model
+
+        Parameters
+        ----------
+        parameters : arraylike or dict
+            (k,) parameters, or (S, k) parameter samples
+        coordinates : arraylike or ObservationGeometry
+            (3, ...) array, or sequence of three broadcastable arrays, of
+            (t, p, p_dyn). An ObservationGeometry is evaluated with
+            evaluate_Model instead, to reuse its cached terms, which the
+            compiled function cannot take
+        max_elements : int, optional
+            Evaluate at most this many (sample, point) pairs at once.
+            The default is 2**24.
+
+        Returns
+        -------
+        r : np.ndarray
+            (S, ...) array of the model, or (...) for a single parameter
+            vector, in this model's dtype
+
+        """
+        if self.backend == 'numpy' or isinstance(coordinates, BMC.ObservationGeometry):
+            return BMC.evaluate_Model(self.model_name, parameters, coordinates,
+                                      max_elements=max_elements).astype(self.dtype, copy=False)
+
+        parameters, coordinates, shape, single = self._prepare_Inputs(parameters, coordinates)
+        n_samples, n_points = len(parameters), max(len(coordinates[0]), 1)
+        chunksize = max(1, max_elements // n_points)
+
+        r = np.empty((n_samples, len(coordinates[0])), dtype=self.dtype)
+        for start in range(0, n_samples, chunksize):
+            r[start:start+chunksize] = self._value_fn(parameters[start:start+chunksize], *coordinates)
+
+        r = r.reshape((n_samples,) + shape)
+        return r[0] if single else r
+
+    def vjp(self, parameters, coordinates, cotangent):
+        """
+        The gradient of sum(cotangent * r) with respect to the parameters and
+        coordinates, e.g. for the gradient of a log-likelihood in r
+
+        Parameters
+        ----------
+        parameters, coordinates :
+            As for __call__, except that an ObservationGeometry is used only
+            for its coordinates
+        cotangent : arraylike
+            Array like r
+
+        Returns
+        -------
+        parameter_gradient : np.ndarray
+            (S, k) or (k,) array, like the parameters
+        coordinate_gradients : list of np.ndarray
+            Arrays like the broadcast coordinates, for t, p, and p_dyn
+
+        """
+        parameters, coordinates, shape, single = self._prepare_Inputs(parameters, coordinates)
+        cotangent = np.broadcast_to(np.asarray(cotangent, dtype=self.dtype),
+                                    (len(parameters),) + shape).reshape(len(parameters), -1)
+
+        if self.backend == 'numpy':
+            _, gradient = BMC.evaluate_ModelGradient(self.model_name, parameters, coordinates)
+            gradient = np.einsum('sn,snk->sk', cotangent, gradient[:, :, 3:]), \
+                       list(np.einsum('sn,snc->cn', cotangent, gradient[:, :, :3]))
+        else:
+            gradient = self._vjp_fn(parameters, *coordinates, cotangent)
+            gradient = gradient[0], list(gradient[1:])
+
+        parameter_gradient, coordinate_gradients = gradient
+        coordinate_gradients = [np.asarray(grad, dtype=self.dtype).reshape(shape) for grad in coordinate_gradients]
+        return (parameter_gradient[0] if single else parameter_gradient), coordinate_gradients
+
+def get_CompiledModel(model_name, dtype='float64', persist=True):
+    """
+    Return the compiled form of a registered model, compiling it (or
+    loading it from the on-disk cache) only on first use in this process
+
+    Parameters
+    ----------
+    model_name : str
+        Name of a model in BoundaryModels.init()
+    dtype : str, optional
+        'float64' or 'float32'. The default is 'float64'.
+    persist : bool, optional
+        Whether to load from and save to the on-disk cache.
+        The default is True.
+
+    Returns
+    -------
+    CompiledModel
+
+    """
+    key = (model_name, np.dtype(dtype).name)
+    if key not in _compiled_models:
+        _compiled_models[key] = CompiledModel(model_name, dtype, persist)
+    return _compiled_models[key]
+
+# =============================================================================
+# pytensor Ops, for use inside pymc models
+# =============================================================================
+class ModelOp(Op):
+    """
+    A compiled model as a single pytensor node: (parameters (k,), t (N,),
+    p (N,), p_dyn (N,)) -> r (N,), with its gradient from the compiled
+    vector-Jacobian product
+    """
+    __props__ = ('model_name', 'dtype')
+
+    def __init__(self, compiled):
+        if pytensor is None:
+            raise ImportError('ModelOp requires pytensor')
+        self.compiled = compiled
+        self.model_name, self.dtype = compiled.model_name, compiled.dtype
+
+    def make_node(self, parameters, t, p, p_dyn):
+        inputs = [pt.as_tensor_variable(arr).astype(self.dtype) for arr in (parameters, t, p, p_dyn)]
+        return Apply(self, inputs, [pt.vector(dtype=self.dtype)])
+
+    def perform(self, node, inputs, outputs):
+        parameters, *coordinates = inputs
+        outputs[0][0] = self.compiled(parameters, coordinates)
+
+    def grad(self, inputs, output_gradients):
+        return ModelVJPOp(self.compiled)(*inputs, output_gradients[0])
+
+class ModelVJPOp(Op):
+    """
+    The vector-Jacobian product of a ModelOp, with respect to each input
+    """
+    __props__ = ('model_name', 'dtype')
+
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.model_name, self.dtype = compiled.model_name, compiled.dtype
+
+    def make_node(self, parameters, t, p, p_dyn, cotangent):
+        inputs = [pt.as_tensor_variable(arr).astype(self.dtype) for arr in (parameters, t, p, p_dyn, cotangent)]
+        return Apply(self, inputs, [inp.type() for inp in inputs[:4]])
+
+    def perform(self, node, inputs, outputs):
+        parameters, t, p, p_dyn, cotangent = inputs
+        parameter_gradient, coordinate_gradients = self.compiled.vjp(parameters, [t, p, p_dyn], cotangent)
+        outputs[0][0] = np.asarray(parameter_gradient, dtype=self.dtype)
+        for output, grad, coord in zip(outputs[1:], coordinate_gradients, (t, p, p_dyn)):
+            # Coordinates given as scalars get the summed gradient
+            output[0] = np.asarray(grad.sum() if np.ndim(coord) == 0 else grad, dtype=self.dtype)
+
+def get_ModelOp(model_name, dtype='float64'):
+    """
+    Return a pytensor Op evaluating a registered model with its compiled
+    function; see ModelOp
+    """
+    return ModelOp(get_CompiledModel(model_name, dtype))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tiled evaluation of the boundary models on large (theta, phi, p_dyn) grids.
+
+evaluate_ModelGrid evaluates any registered model on the outer product of
+1D theta, phi, and p_dyn axes without ever building the full coordinate
+grid: the grid is walked in tiles of a few tens of thousands of cells,
+each tile's coordinates are broadcast views of the axes, and each tile is
+written straight into a preallocated output. The output may be float32,
+and may be a memory-mapped .npy file, so grids of 10^8 cells or more need
+little more memory than their output (or none, if memory-mapped).
+
+Tiles are evaluated on a thread pool; NumPy releases the GIL inside its
+array operations, so this scales with the number of cores.
+
+@author: mrutala
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import BoundaryModelsCore as BMC
+
+def _get_Tiles(shape, tile_size):
+    """
+    Split a (n_t, n_p, n_p_dyn) grid into blocks of whole p_dyn rows, of
+    about tile_size cells each, and yield (t slice, p slice) for each
+    """
+    n_t, n_p, n_p_dyn = shape
+    rows = max(1, tile_size // n_p_dyn)
+
+    # Prefer tiles spanning all of phi, so each covers contiguous memory
+    if rows >= n_p:
+        step_t, step_p = max(1, rows // n_p), n_p
+    else:
+        step_t, step_p = 1, rows
+
+    for i in range(0, n_t, step_t):
+        for j in range(0, n_p, step_p):
+            yield slice(i, min(i + step_t, n_t)), slice(j, min(j + step_p, n_p))
+
+def evaluate_ModelGrid(model, parameters, t, p, p_dyn, out=None, filepath=None,
+                       dtype='float64', tile_size=2**15, n_threads=None, **kwargs):
+    """
+    Evaluate a boundary model on the grid of all combinations of t, p, and
+    p_dyn, tile by tile
+
+    Parameters
+    ----------
+    model : str or function
+        Name of a model in BoundaryModels.init(), or the model function
+    parameters : arraylike or dict
+        (k,) parameters, or (S, k) parameter samples, as in evaluate_Model
+    t, p, p_dyn : arraylike
+        1D axes of the grid (scalars are treated as length-1 axes)
+    out : np.ndarray, optional
+        Preallocated output of shape (n_t, n_p, n_p_dyn), or
+        (S, n_t, n_p, n_p_dyn) for parameter samples
+    filepath : str, optional
+        If given (and out is not), the output is created as a memory-mapped
+        .npy file here, which np.load(filepath, mmap_mode='r') reopens
+    dtype : str, optional
+        dtype of the output, if it is created here: 'float64' or 'float32'.
+        The model is always evaluated in float64. The default is 'float64'.
+    tile_size : int, optional
+        Approximate number of (sample, cell) pairs per tile; the default,
+        2**15, keeps each tile's temporaries within a typical L2 cache
+    n_threads : int, optional
+        Number of threads. The default is the number of CPUs.
+    **kwargs
+        Passed to the model, e.g. return_r_ss=True
+
+    Returns
+    -------
+    out : np.ndarray or np.memmap
+        The model on the grid
+
+    """
+    model, parameters = BMC._resolve_Model(model, parameters)
+    t, p, p_dyn = [np.atleast_1d(np.asarray(axis, dtype='float64')) for axis in (t, p, p_dyn)]
+    if max(axis.ndim for axis in (t, p, p_dyn)) > 1:
+        raise ValueError('t, p, and p_dyn must be 1D axes')
+
+    grid_shape = (len(t), len(p), len(p_dyn))
+    n_samples = len(parameters) if parameters.ndim == 2 else 1
+    shape = grid_shape if parameters.ndim == 1 else (n_samples,) + grid_shape
+
+    if out is None:
+        if filepath is not None:
+            out = np.lib.format.open_memmap(filepath, mode='w+', dtype=dtype, shape=shape)
+        else:
+            out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape:
+        raise ValueError('out must have shape {}, not {}'.format(shape, out.shape))
+
+    def evaluate_Tile(tile):
+        rows_t, rows_p = tile
+        geometry = BMC.ObservationGeometry(t[rows_t, None, None], p[None, rows_p, None], p_dyn[None, None, :])
+        with np.errstate(all='ignore'):
+            r = model(parameters, geometry, **kwargs)
+        out[..., rows_t, rows_p, :] = r
+
+    tiles = _get_Tiles(grid_shape, max(1, tile_size // n_samples))
+    n_threads = n_threads or os.cpu_count() or 1
+    if n_threads == 1:
+        for tile in tiles:
+            evaluate_Tile(tile)
+    else:
+        with ThreadPoolExecutor(n_threads) as pool:
+            # Consume the results, to raise any errors here
+            for _ in pool.map(evaluate_Tile, tiles):
+                pass
+
+    if isinstance(out, np.memmap):
+        out.flush()
+
+    return out
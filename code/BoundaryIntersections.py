@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Predicted boundary crossings along a spacecraft trajectory.
+
+find_Crossings evaluates an ensemble of boundary surfaces (posterior
+parameter samples, each paired with a solar wind dynamic pressure draw)
+along a time-ordered trajectory, as from get_SpacecraftPositions, and
+locates every sign change of r - r_b for every ensemble member. Each
+crossing time is refined by linear interpolation between the bracketing
+ephemeris samples.
+
+Crossings are then grouped into events: the outward or inward crossings
+within a maximal stretch of the trajectory over which the ensemble members
+disagree about the region, or in which any of them crosses. Each event gets
+a distribution of crossing times, summarized by its quantiles.
+
+The trajectory is processed in blocks of time, each evaluated for all
+members at once, so memory is bounded by max_elements regardless of the
+length of the trajectory.
+
+@author: mrutala
+"""
+import numpy as np
+import pandas as pd
+
+import BoundaryModelsCore as BMC
+
+def make_Ensemble(parameters, pressures, n_members, seed=None):
+    """
+    Draw an ensemble of boundary surfaces, pairing randomly chosen
+    parameter samples with randomly chosen pressures
+
+    Parameters
+    ----------
+    parameters : np.ndarray or pd.DataFrame
+        (S, k) posterior parameter samples
+    pressures : arraylike
+        Solar wind dynamic pressures [nPa] to draw from, e.g. an MME
+        ensemble
+    n_members : int
+        Size of the ensemble
+    seed : int, optional
+        Seed for the random draws. The default is None.
+
+    Returns
+    -------
+    parameters : np.ndarray or pd.DataFrame
+        (n_members, k) parameters, of the same type as given
+    p_dyn : np.ndarray
+        (n_members,) pressures
+
+    """
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(parameters), n_members)
+    p_dyn = rng.choice(np.asarray(pressures, dtype='float64'), n_members)
+
+    if hasattr(parameters, 'iloc'):
+        return parameters.iloc[rows].reset_index(drop=True), p_dyn
+    return np.asarray(parameters)[rows], p_dyn
+
+def find_Crossings(trajectory, model, parameters, p_dyn, max_gap=None,
+                   quantiles=(0.05, 0.16, 0.5, 0.84, 0.95), max_elements=2**24):
+    """
+    Locate the crossings of a trajectory through an ensemble of boundaries
+
+    Parameters
+    ----------
+    trajectory : pd.DataFrame
+        Time-ordered positions, with a DatetimeIndex and columns 'r', 't',
+        and 'p', as from get_SpacecraftPositions
+    model : str or function
+        Name of a model in BoundaryModels.init(), or the model function
+    parameters : arraylike or dict
+        (M, k) parameters, one row per ensemble member (or (k,), shared by
+        all members); if model is a name, a dict or DataFrame of columns
+        by parameter name is also accepted
+    p_dyn : float or arraylike
+        (M,) solar wind dynamic pressure of each member [nPa]
+    max_gap : pd.Timedelta or str, optional
+        Ignore sign changes across gaps in the ephemeris longer than this.
+        The default is None, i.e. no gaps are ignored.
+    quantiles : tuple, optional
+        Quantiles of the crossing times reported for each event.
+        The default is (0.05, 0.16, 0.5, 0.84, 0.95).
+    max_elements : int, optional
+        Evaluate at most this many (member, time) pairs at once.
+        The default is 2**24.
+
+    Returns
+    -------
+    crossings : pd.DataFrame
+        One row per crossing by any member: 'time', 'member', 'direction'
+        (+1 outward, from r < r_b to r > r_b; -1 inward), and 'event'
+    events : pd.DataFrame
+        One row per event, in time order: the 'start' and 'stop' of its run
+        (the ephemeris samples bounding it), 'run', 'direction',
+        'n_crossings', 'n_members' (the number of members crossing), the
+        'mean', 'std', and requested quantiles (e.g., 'q50') of the crossing
+        times, and 'f_inside_before' and 'f_inside_after', the fraction of
+        members inside the boundary at the start and stop of the run
+
+    """
+    model, parameters = BMC._resolve_Model(model, parameters)
+    parameters = np.atleast_2d(parameters)
+    p_dyn = np.atleast_1d(np.asarray(p_dyn, dtype='float64'))
+    n_members = max(len(parameters), len(p_dyn))
+    parameters = np.broadcast_to(parameters, (n_members, parameters.shape[1]))
+    p_dyn = np.broadcast_to(p_dyn, (n_members,))
+
+    times = trajectory.index.to_numpy('datetime64[ns]').astype('int64')
+    r, t, p = [trajectory[col].to_numpy('float64') for col in ('r', 't', 'p')]
+    n_times = len(times)
+
+    # Per-sample count of members inside, and per-step crossing flags, are
+    # all that is kept for the whole trajectory
+    n_inside = np.zeros(n_times, dtype='int64')
+    stepped = np.full(max(n_times - 1, 0), False)
+    if max_gap is not None:
+        stepped_ok = np.diff(times) <= pd.Timedelta(max_gap).value
+    else:
+        stepped_ok = np.full(max(n_times - 1, 0), True)
+
+    # Each member's parameters are a (M, 1) column, against (1, T) positions
+    columns = list(parameters.T[:, :, None])
+
+    crossing_members, crossing_steps, crossing_times, crossing_directions = [], [], [], []
+    block = max(2, max_elements // n_members)
+    for start in range(0, max(n_times - 1, 1), block - 1):
+        stop = min(start + block, n_times)
+
+        geometry = BMC.ObservationGeometry(t[None, start:stop], p[None, start:stop], p_dyn[:, None])
+        with np.errstate(all='ignore'):
+            d = r[None, start:stop] - model(columns, geometry)
+
+        inside = d < 0
+        n_inside[start:stop] = np.count_nonzero(inside, axis=0)
+
+        # Sign changes between finite neighbours, away from gaps
+        change = (inside[:, :-1] != inside[:, 1:]) & np.isfinite(d[:, :-1]) & np.isfinite(d[:, 1:])
+        change &= stepped_ok[None, start:stop-1]
+        member, step = np.nonzero(change)
+        if len(member) == 0:
+            continue
+        stepped[start + np.unique(step)] = True
+
+        # Linear interpolation of r - r_b in time
+        d0, d1 = d[member, step], d[member, step + 1]
+        t0, t1 = times[start + step], times[start + step + 1]
+        crossing_times.append(t0 + np.round(d0 / (d0 - d1) * (t1 - t0)).astype('int64'))
+        crossing_members.append(member)
+        crossing_steps.append(start + step)
+        crossing_directions.append(np.where(d0 < 0, 1, -1))
+
+    crossings = pd.DataFrame({'time': np.concatenate(crossing_times or [np.zeros(0, 'int64')]).astype('datetime64[ns]'),
+                              'member': np.concatenate(crossing_members or [np.zeros(0, 'int64')]),
+                              'direction': np.concatenate(crossing_directions or [np.zeros(0, 'int64')])})
+    steps = np.concatenate(crossing_steps or [np.zeros(0, 'int64')])
+
+    # In time order, so that the results do not depend on the block size
+    order = np.lexsort((crossings['member'].to_numpy(), crossings['time'].to_numpy()))
+    crossings, steps = crossings.iloc[order].reset_index(drop=True), steps[order]
+
+    # Runs of steps with crossings, joined across samples where the members
+    # disagree, bound each event; within a run, the outward and inward
+    # crossings (e.g., on either side of an apojove inside the boundary's
+    # spread) are separate events
+    mixed = (n_inside > 0) & (n_inside < n_members)
+    in_run = stepped | (mixed[:-1] & mixed[1:] & stepped_ok)
+    run_start = in_run & ~np.concatenate([[False], in_run[:-1]])
+    run_stop = in_run & ~np.concatenate([in_run[1:], [False]])
+    run_label = np.cumsum(run_start) - 1
+    first, last = np.flatnonzero(run_start), np.flatnonzero(run_stop) + 1
+    crossings['run'] = run_label[steps] if len(steps) else np.zeros(0, 'int64')
+
+    # Summarize the crossing times of each event, in ns since the epoch
+    grouped = crossings['time'].astype('int64').groupby([crossings['run'], crossings['direction']])
+    events = pd.DataFrame({'n_crossings': grouped.size(),
+                           'n_members': crossings.groupby(['run', 'direction'])['member'].nunique(),
+                           'mean': grouped.mean(),
+                           'std': grouped.std(ddof=0)})
+    for q in quantiles:
+        events['q{:g}'.format(100*q)] = grouped.quantile(q)
+    events = events.reset_index().sort_values('mean', ignore_index=True)
+
+    run = events['run'].to_numpy()
+    events.insert(0, 'start', times[first[run]].astype('datetime64[ns]'))
+    events.insert(1, 'stop', times[last[run]].astype('datetime64[ns]'))
+    events['f_inside_before'] = n_inside[first[run]] / n_members
+    events['f_inside_after'] = n_inside[last[run]] / n_members
+    for col in events.columns[events.columns.get_loc('mean'):events.columns.get_loc('f_inside_before')]:
+        if col == 'std':
+            events[col] = pd.to_timedelta(events[col], unit='ns')
+        else:
+            events[col] = pd.to_datetime(events[col], unit='ns')
+
+    # Label each crossing with its event
+    event_index = pd.Series(events.index, index=pd.MultiIndex.from_frame(events[['run', 'direction']]))
+    crossings['event'] = event_index.reindex(pd.MultiIndex.from_frame(crossings[['run', 'direction']])).to_numpy()
+    crossings = crossings.drop(columns='run').sort_values(['event', 'time'], ignore_index=True)
+
+    return crossings, events
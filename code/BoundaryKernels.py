@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compiled kernels for the Shue-like boundary models.
+
+Each kernel evaluates one model of BoundaryModelsCore in a single pass
+over the points, with sin(p), cos(t), etc. computed once per point and no
+temporary arrays, in parallel over all cores. Kernels are compiled with
+Numba on first use; if Numba is not installed (or for models without a
+kernel), evaluate_Kernel falls back to BoundaryModelsCore.evaluate_Model,
+which gives the same results.
+
+Run this file to benchmark the kernels against the NumPy models:
+    python BoundaryKernels.py --n 10000000
+
+@author: mrutala
+"""
+import math
+import sys
+import time
+
+import numpy as np
+
+import BoundaryModelsCore as BMC
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Compiled kernels, by model name
+_compiled_kernels = {}
+
+def _jit(fn):
+    """
+    Compile a scalar function with Numba (lazily, on its first call), or
+    leave it as Python if Numba is not installed
+    """
+    return numba.njit(fn) if numba is not None else fn
+
+# =============================================================================
+# Scalar forms of the models, for one point and one parameter vector c
+# =============================================================================
+@_jit
+def _sign(x):
+    return 1.0 if x > 0 else (-1.0 if x < 0 else 0.0)
+
+@_jit
+def _log_Flare(t):
+    #   ln(2/(1 + cos(t))), so that p_dyn**r1 * (2/(1 + cos(t)))**a_f is
+    #   one exp(r1*ln(p_dyn) + a_f*ln(...)) rather than two powers
+    return math.log(2/(1 + math.cos(t)))
+
+@_jit
+def _Shuelike(t, p, p_dyn, c):
+    r0, r1, a0, a1 = c[0], c[1], c[2], c[3]
+    return r0 * math.exp(r1*math.log(p_dyn) + (a0 + a1*p_dyn)*_log_Flare(t))
+
+@_jit
+def _Shuelike_r1fixed(t, p, p_dyn, c):
+    r0, a0, a1 = c[0], c[1], c[2]
+    return r0 * math.exp(-2.5/10*math.log(p_dyn) + (a0 + a1*p_dyn)*_log_Flare(t))
+
+@_jit
+def _Shuelike_rasymmetric(t, p, p_dyn, c):
+    r0, r1, r2, r3, r4, a0, a1 = c[0], c[1], c[2], c[3], c[4], c[5], c[6]
+    sin_p = math.sin(p)
+    sg = _sign(sin_p)
+    perturb = (r2*math.cos(p)**2 + (r3*(sg + 1)/2 + r4*(sg - 1)/2) * sin_p**2)
+    return ((r0 + math.sin(t/2)**2 * perturb) *
+            math.exp(r1*math.log(p_dyn) + (a0 + a1*p_dyn)*_log_Flare(t)))
+
+@_jit
+def _Shuelike_rasymmetric_r1fixed(t, p, p_dyn, c):
+    r0, r2, r2_scale, r3, r4, a0, a1 = c[0], c[1], c[2], c[3], c[4], c[5], c[6]
+    sin_p = math.sin(p)
+    sg = _sign(sin_p)
+    log_p_factor = -0.25*math.log(p_dyn)
+    perturb = (r2*math.cos(p)**2*r2_scale + (1 - r2_scale) +
+               (r3*(sg + 1)/2 + r4*(sg - 1)/2) * sin_p)
+    return (r0*math.exp(log_p_factor + (a0 + a1*p_dyn)*_log_Flare(t)) +
+            math.sin(t/2) * perturb * math.exp(log_p_factor))
+
+@_jit
+def _Shuelike_rasymmetric_simple(t, p, p_dyn, c):
+    r0, r3, r4, a0, a1 = c[0], c[1], c[2], c[3], c[4]
+    sin_p = math.sin(p)
+    sg = _sign(sin_p)
+    log_p_factor = -0.25*math.log(p_dyn)
+    perturb = (r3*(sg + 1)/2 + r4*(sg - 1)/2) * sin_p
+    return (r0*math.exp(log_p_factor + (a0 + a1*p_dyn)*_log_Flare(t)) +
+            math.sin(t/2)**2 * perturb * math.exp(log_p_factor))
+
+@_jit
+def _ShuelikeAsymmetric(t, p, p_dyn, c):
+    r0, r1, r2, r3, a0, a1 = c[0], c[1], c[2], c[3], c[4], c[5]
+    sin_p = math.sin(p)
+    sg = _sign(sin_p)
+    perturb = (r2*(sg + 1)/2 + r3*(sg - 1)/2) * sin_p
+    return ((r0 + math.sin(t/2)**2 * perturb) *
+            math.exp(r1*math.log(p_dyn) + (a0 + a1*p_dyn)*_log_Flare(t)))
+
+@_jit
+def _ShuelikeAsymmetric_r1fixed(t, p, p_dyn, c):
+    r0, r2, r3, a0, a1 = c[0], c[1], c[2], c[3], c[4]
+    sin_p = math.sin(p)
+    sg = _sign(sin_p)
+    perturb = (r2*(sg + 1)/2 + r3*(sg - 1)/2) * sin_p
+    return ((r0 + math.sin(t/2)**2 * perturb) *
+            math.exp(-0.25*math.log(p_dyn) + (a0 + a1*p_dyn)*_log_Flare(t)))
+
+@_jit
+def _ShuelikeAsymmetric_AsPerturbation(t, p, p_dyn, c):
+    r0, r1, r2, r3, a0, a1 = c[0], c[1], c[2], c[3], c[4], c[5]
+    sin_p = math.sin(p)
+    sg = _sign(sin_p)
+    log_p_factor = r1*math.log(p_dyn)
+    perturb = (r2*(sg + 1)/2 + r3*(sg - 1)/2) * sin_p
+    return (r0*math.exp(log_p_factor + (a0 + a1*p_dyn)*_log_Flare(t)) +
+            math.sin(t/2)**2 * perturb * math.exp(log_p_factor))
+
+@_jit
+def _ShuelikeAsymmetric_AsPerturbation_2(t, p, p_dyn, c):
+    r0, r1, r2, r3, a0, a1 = c[0], c[1], c[2], c[3], c[4], c[5]
+    sin_p = math.sin(p)
+    sg = _sign(sin_p)
+    log_p_factor = r1*math.log(p_dyn)
+    perturb = (r2*(sg + 1)/2 - r3*(sg - 1)/2) * sin_p**2
+    return (r0*math.exp(log_p_factor + (a0 + a1*p_dyn)*_log_Flare(t)) +
+            math.sin(t/2)**2 * perturb * math.exp(log_p_factor))
+
+@_jit
+def _ShuelikeAsymmetric_AsPerturbation_r1fixed_2(t, p, p_dyn, c):
+    r0, r2, r3, a0, a1 = c[0], c[1], c[2], c[3], c[4]
+    sin_p = math.sin(p)
+    sg = _sign(sin_p)
+    log_p_factor = -0.25*math.log(p_dyn)
+    perturb = (r2*(sg + 1)/2 - r3*(sg - 1)/2) * sin_p**2
+    return (r0*math.exp(log_p_factor + (a0 + a1*p_dyn)*_log_Flare(t)) +
+            math.sin(t/2)**2 * perturb * math.exp(log_p_factor))
+
+@_jit
+def _Shuelike_aasymmetric_r1fixed(t, p, p_dyn, c):
+    r0, a0, a1, a2, a3, a4 = c[0], c[1], c[2], c[3], c[4], c[5]
+    sin_p2 = math.sin(p)**2
+    sg = _sign(math.sin(p))
+    a_f = ((a0 + a1*p_dyn) * (1 - a2*math.cos(p)**2) *
+           (1 - (sg + 1)/2 * a3 * sin_p2) * (1 - (sg - 1)/2 * a4 * sin_p2))
+    return r0 * math.exp(-0.25*math.log(p_dyn) + a_f*_log_Flare(t))
+
+_scalar_models = {'Shuelike': _Shuelike,
+                  'Shuelike_r1fixed': _Shuelike_r1fixed,
+                  'Shuelike_rasymmetric': _Shuelike_rasymmetric,
+                  'Shuelike_rasymmetric_r1fixed': _Shuelike_rasymmetric_r1fixed,
+                  'Shuelike_rasymmetric_simple': _Shuelike_rasymmetric_simple,
+                  'ShuelikeAsymmetric': _ShuelikeAsymmetric,
+                  'ShuelikeAsymmetric_r1fixed': _ShuelikeAsymmetric_r1fixed,
+                  'ShuelikeAsymmetric_AsPerturbation': _ShuelikeAsymmetric_AsPerturbation,
+                  'ShuelikeAsymmetric_AsPerturbation_2': _ShuelikeAsymmetric_AsPerturbation_2,
+                  'ShuelikeAsymmetric_AsPerturbation_r1fixed_2': _ShuelikeAsymmetric_AsPerturbation_r1fixed_2,
+                  'Shuelike_aasymmetric_r1fixed': _Shuelike_aasymmetric_r1fixed}
+
+# =============================================================================
+# Compilation and evaluation
+# =============================================================================
+def _compile_Kernel(model_name):
+    """
+    Compile the scalar form of a model into a parallel loop over samples
+    and points, writing into a preallocated (S, N) output
+    """
+    if model_name in _compiled_kernels:
+        return _compiled_kernels[model_name]
+
+    scalar = _scalar_models[model_name]
+
+    @numba.njit(parallel=True)
+    def kernel(parameters, t, p, p_dyn, out):
+        n_samples, n_points = out.shape
+        for j in range(n_samples):
+            c = parameters[j]
+            for i in numba.prange(n_points):
+                out[j, i] = scalar(t[i], p[i], p_dyn[i], c)
+
+    _compiled_kernels[model_name] = kernel
+    return kernel
+
+def has_Kernel(model_name):
+    """
+    Whether a compiled kernel can be used for a model
+    """
+    return numba is not None and model_name in _scalar_models
+
+def evaluate_Kernel(model_name, parameters, coordinates, use_numba=True):
+    """
+    Evaluate a boundary model with its compiled kernel, if there is one,
+    otherwise with BoundaryModelsCore.evaluate_Model
+
+    Parameters
+    ----------
+    model_name : str
+        Name of a model in BoundaryModelsCore.init
+    parameters : arraylike or dict
+        (k,) parameters, or (S, k) parameter samples, as in evaluate_Model
+    coordinates : arraylike
+        (3, ...) array, or sequence of three broadcastable arrays, of
+        (t, p, p_dyn)
+    use_numba : bool, optional
+        If False, always use the NumPy model. The default is True.
+
+    Returns
+    -------
+    r : np.ndarray
+        (...) or (S, ...) array of the model, as evaluate_Model
+
+    """
+    if not (use_numba and has_Kernel(model_name)):
+        return BMC.evaluate_Model(model_name, parameters, coordinates)
+
+    if hasattr(parameters, 'keys'):
+        names = BMC.init(model_name)['param_descriptions']
+        parameters = np.column_stack([np.asarray(parameters[name], dtype='float64') for name in names])
+    parameters = np.asarray(parameters, dtype='float64')
+    single = parameters.ndim == 1
+    parameters = np.ascontiguousarray(np.atleast_2d(parameters))
+
+    coordinates = np.broadcast_arrays(*[np.asarray(coord, dtype='float64') for coord in coordinates])
+    shape = coordinates[0].shape
+    t, p, p_dyn = [np.ascontiguousarray(coord.ravel()) for coord in coordinates]
+
+    r = np.empty((len(parameters), t.size))
+    _compile_Kernel(model_name)(parameters, t, p, p_dyn, r)
+
+    r = r.reshape((len(parameters),) + shape)
+    return r[0] if single else r
+
+def benchmark_Kernels(n_points=10**7, model_names=None, repeat=3, seed=0):
+    """
+    Time each compiled kernel against the NumPy model on n_points random
+    points, after one warm-up call (which includes compilation)
+
+    Returns
+    -------
+    timings : dict
+        {model_name: (numpy seconds, kernel seconds, max relative difference)}
+
+    """
+    rng = np.random.default_rng(seed)
+    coordinates = [rng.uniform(0, np.radians(175), n_points),
+                   rng.uniform(-np.pi, np.pi, n_points),
+                   10**rng.uniform(-2, 0, n_points)]
+
+    timings = {}
+    for model_name in (model_names or list(_scalar_models)):
+        descriptions = BMC.init(model_name)['param_descriptions']
+        parameters = np.array([desc.get('mu', 0.5) for desc in descriptions.values()])
+
+        def best(fn):
+            times = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                result = fn()
+                times.append(time.perf_counter() - t0)
+            return min(times), result
+
+        t_numpy, r_numpy = best(lambda: evaluate_Kernel(model_name, parameters, coordinates, use_numba=False))
+        if has_Kernel(model_name):
+            evaluate_Kernel(model_name, parameters, coordinates)
+            t_kernel, r_kernel = best(lambda: evaluate_Kernel(model_name, parameters, coordinates))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                difference = np.nanmax(np.abs(r_kernel/r_numpy - 1))
+        else:
+            t_kernel, difference = np.nan, np.nan
+        timings[model_name] = (t_numpy, t_kernel, difference)
+
+    return timings
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the compiled boundary model kernels')
+    parser.add_argument('--n', type=int, default=10**7, help='number of points (default: 10^7)')
+    parser.add_argument('--repeat', type=int, default=3, help='timing repeats (default: 3)')
+    args = parser.parse_args()
+
+    if numba is None:
+        print('Numba is not installed; only the NumPy models can be timed', file=sys.stderr)
+    else:
+        print('Numba {}, {} threads'.format(numba.__version__, numba.get_num_threads()), file=sys.stderr)
+
+    print('{:<45s} {:>10s} {:>10s} {:>8s} {:>10s}'.format('model', 'numpy [s]', 'numba [s]', 'speedup', 'max diff'))
+    for model_name, (t_numpy, t_kernel, difference) in benchmark_Kernels(args.n, repeat=args.repeat).items():
+        print('{:<45s} {:>10.3f} {:>10.3f} {:>8.1f} {:>10.1e}'.format(model_name, t_numpy, t_kernel,
+                                                                     t_numpy/t_kernel, difference))
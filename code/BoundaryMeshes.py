@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adaptive triangle meshes of the boundary surfaces.
+
+make_BoundaryMesh triangulates any surface r(theta, phi) at a fixed solar
+wind dynamic pressure, refining edges only where the surface departs from
+the flat triangles by more than a tolerance, so the nose and strongly
+curved regions get fine triangles while the flanks stay coarse. Surfaces
+can be built from a BoundaryModels model (make_ModelSurface) or from the
+Joy+ (2002) boundaries (make_JoySurface).
+
+Meshes are dictionaries of 'vertices' (V, 3) [R_J], 'faces' (F, 3), and the
+angular coordinates of each vertex, and can be saved to and loaded from
+binary .npz or .ply files.
+
+The mesh is built on the unit disk (a, b) = (theta/theta_max)(cos phi,
+sin phi), which is regular at the nose (theta = 0), unlike a (theta, phi)
+grid, where all phi meet at a single point.
+
+@author: mrutala
+"""
+import os
+import numpy as np
+
+# Loaded meshes, keyed by (path, modification time)
+_mesh_cache = {}
+
+def make_ModelSurface(model_name, parameters, p_dyn):
+    """
+    The surface r(theta, phi) of a BoundaryModels model at one pressure
+
+    Parameters
+    ----------
+    model_name : str
+        Name of a model in BoundaryModelsCore.init
+    parameters : dict or arraylike
+        Model parameters, by name or in the order of the model's
+        'param_descriptions'
+    p_dyn : float
+        Solar wind dynamic pressure [nPa]
+
+    Returns
+    -------
+    surface : function
+        surface(theta, phi) -> r [R_J]
+
+    """
+    import BoundaryModelsCore as BMC
+
+    model_dict = BMC.init(model_name)
+    if isinstance(parameters, dict):
+        parameters = [parameters[name] for name in model_dict['param_descriptions']]
+
+    def surface(theta, phi):
+        return np.asarray(model_dict['model'](parameters, [theta, phi, np.full_like(theta, p_dyn)]))
+
+    return surface
+
+def make_JoySurface(boundary, p_dyn, coefficients=None):
+    """
+    The surface r(theta, phi) of the Joy+ (2002) boundary at one pressure
+
+    Parameters
+    ----------
+    boundary : str
+        'BS' or 'MP'
+    p_dyn : float
+        Solar wind dynamic pressure [nPa]
+    coefficients : arraylike, optional
+        (12,) coefficients, overriding the published ones. The default is None.
+
+    Returns
+    -------
+    surface : function
+        surface(theta, phi) -> r [R_J], NaN where the boundary is open
+
+    """
+    from JoyBoundaryCoords import JoyModel
+
+    model = JoyModel(boundary, coefficients=coefficients)
+
+    def surface(theta, phi):
+        return model.get_Radius(theta, phi, p_dyn)
+
+    return surface
+
+def _get_Angles(disk, theta_max):
+    """
+    (theta, phi) of points (a, b) on the unit disk
+    """
+    theta = theta_max * np.hypot(disk[:, 0], disk[:, 1])
+    phi = np.arctan2(disk[:, 1], disk[:, 0])
+    return theta, phi
+
+def _get_Vertices(surface, disk, theta_max):
+    """
+    Cartesian vertices (JSS) [R_J] and angles of points on the unit disk
+    """
+    theta, phi = _get_Angles(disk, theta_max)
+    r = surface(theta, phi)
+    xyz = np.column_stack([r * np.cos(theta),
+                           -r * np.sin(theta) * np.sin(phi),
+                           r * np.sin(theta) * np.cos(phi)])
+    return xyz, theta, phi
+
+def _get_InitialDisk(n_rings):
+    """
+    A regular triangulation of the unit disk: a hexagon of n_rings rings
+    """
+    points, rings = [np.zeros(2)], [[0]]
+    for k in range(1, n_rings + 1):
+        # 6k points on ring k, starting at phi = 0
+        angles = np.linspace(0, 2*np.pi, 6*k, endpoint=False)
+        points.extend(k/n_rings * np.column_stack([np.cos(angles), np.sin(angles)]))
+        rings.append(list(range(len(points) - 6*k, len(points))))
+
+    faces = []
+    for k in range(1, n_rings + 1):
+        inner, outer = rings[k-1], rings[k]
+        for side in range(6):
+            for j in range(k):
+                # Index along the outer and inner rings
+                o = side*k + j
+                i = side*(k - 1) + j
+                o0, o1 = outer[o], outer[(o + 1) % len(outer)]
+                i0 = inner[i % len(inner)]
+                faces.append([i0, o0, o1])
+                if j < k - 1:
+                    i1 = inner[(i + 1) % len(inner)]
+                    faces.append([i0, o1, i1])
+
+    return np.array(points), np.array(faces, dtype='int64')
+
+def _get_Edges(faces):
+    """
+    Unique edges of a triangulation, the (F, 3) edge index of each face
+    (edges v0-v1, v1-v2, v2-v0), and whether each edge is on the boundary
+    """
+    pairs = np.stack([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]], axis=1).reshape(-1, 2)
+    edges, inverse, counts = np.unique(np.sort(pairs, axis=1), axis=0,
+                                       return_inverse=True, return_counts=True)
+    return edges, inverse.reshape(-1, 3), counts == 1
+
+def _split_Faces(faces, face_edges, midpoints):
+    """
+    Split each face along its marked edges (midpoints >= 0): into four
+    if all three are marked, or into two if one is
+    """
+    marked = midpoints[face_edges] >= 0
+    n_marked = marked.sum(axis=1)
+
+    children = [faces[n_marked == 0]]
+
+    # Three marked edges: one central and three corner triangles
+    red = n_marked == 3
+    v, m = faces[red], midpoints[face_edges[red]]
+    children.extend([np.column_stack([v[:, 0], m[:, 0], m[:, 2]]),
+                     np.column_stack([m[:, 0], v[:, 1], m[:, 1]]),
+                     np.column_stack([m[:, 2], m[:, 1], v[:, 2]]),
+                     np.column_stack([m[:, 0], m[:, 1], m[:, 2]])])
+
+    # One marked edge: rotate it to v0-v1, then bisect the face
+    green = n_marked == 1
+    shift = np.argmax(marked[green], axis=1)
+    rotation = (np.arange(3)[None, :] + shift[:, None]) % 3
+    v = np.take_along_axis(faces[green], rotation, axis=1)
+    m = midpoints[np.take_along_axis(face_edges[green], rotation, axis=1)[:, 0]]
+    children.extend([np.column_stack([v[:, 0], m, v[:, 2]]),
+                     np.column_stack([m, v[:, 1], v[:, 2]])])
+
+    return np.concatenate(children)
+
+def make_BoundaryMesh(surface, theta_max=np.radians(175), tol=0.25, rel_tol=0.005,
+                      n_rings=8, max_level=8, max_vertices=1000000, label=''):
+    """
+    Adaptively triangulate a boundary surface
+
+    Starting from a regular triangulation of the unit disk, every edge
+    whose midpoint on the surface lies more than tol + rel_tol * r from the
+    midpoint of the edge is split, until no such edges remain or max_level
+    splits have been made. Faces with two split edges are split into four, so
+    that only bisected and quartered faces occur and the mesh stays
+    conforming (without hanging vertices).
+
+    Parameters
+    ----------
+    surface : function
+        surface(theta, phi) -> r [R_J], vectorized, e.g. from
+        make_ModelSurface or make_JoySurface. NaN where there is no surface.
+    theta_max : float, optional
+        Largest theta to mesh [radians]. The default is 175 deg.
+    tol : float, optional
+        Largest allowed distance between the surface and the mesh at edge
+        midpoints [R_J]. The default is 0.25.
+    rel_tol : float, optional
+        Additional allowed distance, as a fraction of the distance r to the
+        surface, so that the distant tail is not meshed as finely as the
+        nose. The default is 0.005.
+    n_rings : int, optional
+        Number of rings in the initial triangulation. The default is 8.
+    max_level : int, optional
+        Maximum number of times an initial edge may be split. The default is 8.
+    max_vertices : int, optional
+        Stop refining beyond this many vertices. The default is 1000000.
+    label : str, optional
+        Description to store with the mesh. The default is ''.
+
+    Returns
+    -------
+    mesh : dict
+        'vertices' : (V, 3) JSS coordinates [R_J]
+        'faces' : (F, 3) vertex indices, counterclockwise seen from outside
+        'theta', 'phi' : (V,) angles of each vertex [radians]
+        'max_error' : largest chord error, relative to the allowed error
+                      tol + rel_tol * r, at the edge midpoints
+        'label' : the label
+
+    """
+    disk, faces = _get_InitialDisk(n_rings)
+    xyz, theta, phi = _get_Vertices(surface, disk, theta_max)
+
+    # Edges shorter than this (on the disk) are never split
+    min_length = 1/n_rings / 2**max_level * 1.01
+
+    # Relative chord errors of edges already tested, keyed by their vertices
+    n_key = 2**31
+    tested_keys, tested_errors = np.array([], dtype='int64'), np.array([])
+
+    while True:
+        edges, face_edges, on_edge = _get_Edges(faces)
+        keys = edges[:, 0] * n_key + edges[:, 1]
+
+        # Only new edges need to be evaluated
+        known = np.isin(keys, tested_keys)
+        new = np.flatnonzero(~known)
+        mid_disk = 0.5 * (disk[edges[new, 0]] + disk[edges[new, 1]])
+        # Keep midpoints of edges on the rim on the rim
+        rim = on_edge[new]
+        mid_disk[rim] /= np.hypot(mid_disk[rim, 0], mid_disk[rim, 1])[:, None]
+        mid_xyz, mid_theta, mid_phi = _get_Vertices(surface, mid_disk, theta_max)
+        with np.errstate(invalid='ignore'):
+            chord = 0.5 * (xyz[edges[new, 0]] + xyz[edges[new, 1]])
+            new_errors = (np.linalg.norm(mid_xyz - chord, axis=1) /
+                          (tol + rel_tol * np.linalg.norm(mid_xyz, axis=1)))
+
+        errors = np.empty(len(edges))
+        errors[new] = new_errors
+        errors[known] = tested_errors[np.searchsorted(tested_keys, keys[known])]
+        order = np.argsort(keys)
+        tested_keys, tested_errors = keys[order], errors[order]
+
+        lengths = np.linalg.norm(disk[edges[:, 0]] - disk[edges[:, 1]], axis=1)
+        split = (errors > 1) & (lengths > min_length)
+        if not split.any() or len(disk) + split.sum() > max_vertices:
+            break
+
+        # Close the refinement: faces with two split edges split all three
+        while True:
+            n_split = split[face_edges].sum(axis=1)
+            promote = face_edges[n_split == 2][~split[face_edges[n_split == 2]]]
+            if len(promote) == 0:
+                break
+            split[promote] = True
+
+        # New vertices at the midpoints of split edges, reusing any which
+        # were evaluated above
+        midpoints = np.full(len(edges), -1, dtype='int64')
+        to_add = np.flatnonzero(split)
+        midpoints[to_add] = len(disk) + np.arange(len(to_add))
+
+        add_disk = 0.5 * (disk[edges[to_add, 0]] + disk[edges[to_add, 1]])
+        add_rim = on_edge[to_add]
+        add_disk[add_rim] /= np.hypot(add_disk[add_rim, 0], add_disk[add_rim, 1])[:, None]
+        add_xyz = np.empty((len(to_add), 3))
+        add_theta, add_phi = np.empty(len(to_add)), np.empty(len(to_add))
+        is_new = np.isin(to_add, new)
+        position = np.searchsorted(new, to_add[is_new])
+        add_xyz[is_new] = mid_xyz[position]
+        add_theta[is_new], add_phi[is_new] = mid_theta[position], mid_phi[position]
+        if (~is_new).any():
+            (add_xyz[~is_new], add_theta[~is_new],
+             add_phi[~is_new]) = _get_Vertices(surface, add_disk[~is_new], theta_max)
+
+        disk = np.concatenate([disk, add_disk])
+        xyz = np.concatenate([xyz, add_xyz])
+        theta, phi = np.concatenate([theta, add_theta]), np.concatenate([phi, add_phi])
+        faces = _split_Faces(faces, face_edges, midpoints)
+
+    # Drop faces touching points where there is no surface, and any
+    # vertices left unused
+    faces = faces[np.all(np.isfinite(xyz[faces]).reshape(len(faces), -1), axis=1)]
+    used = np.unique(faces)
+    index = np.full(len(disk), -1, dtype='int64')
+    index[used] = np.arange(len(used))
+
+    # Faces counterclockwise on the disk are also counterclockwise seen
+    # from outside of the surface
+    faces = index[faces]
+
+    finite_errors = errors[np.isfinite(errors)]
+    return {'vertices': xyz[used], 'faces': faces.astype('int32'),
+            'theta': theta[used], 'phi': phi[used],
+            'max_error': np.max(finite_errors) if len(finite_errors) > 0 else np.nan,
+            'label': label}
+
+def save_BoundaryMesh(filepath, mesh):
+    """
+    Save a mesh to a binary .npz or .ply file, based on the file extension.
+    PLY files store the vertices as float32 and the angles as extra vertex
+    properties, and can be opened by most 3D viewers.
+
+    Parameters
+    ----------
+    filepath : str
+        Output file, ending in .npz or .ply
+    mesh : dict
+        Mesh, as returned by make_BoundaryMesh
+
+    Returns
+    -------
+    None.
+
+    """
+    if os.path.splitext(filepath)[1].lower() == '.ply':
+        vertex_dtype = np.dtype([('x', '<f4'), ('y', '<f4'), ('z', '<f4'),
+                                 ('theta', '<f4'), ('phi', '<f4')])
+        vertices = np.empty(len(mesh['vertices']), dtype=vertex_dtype)
+        for i, name in enumerate('xyz'):
+            vertices[name] = mesh['vertices'][:, i]
+        vertices['theta'], vertices['phi'] = mesh['theta'], mesh['phi']
+
+        face_dtype = np.dtype([('n', 'u1'), ('v', '<i4', (3,))])
+        faces = np.empty(len(mesh['faces']), dtype=face_dtype)
+        faces['n'], faces['v'] = 3, mesh['faces']
+
+        header = ['ply', 'format binary_little_endian 1.0',
+                  'comment {}'.format(mesh.get('label', '')),
+                  'comment max_error {}'.format(mesh.get('max_error', np.nan)),
+                  'element vertex {}'.format(len(vertices)),
+                  'property float x', 'property float y', 'property float z',
+                  'property float theta', 'property float phi',
+                  'element face {}'.format(len(faces)),
+                  'property list uchar int vertex_indices',
+                  'end_header']
+        with open(filepath, 'wb') as f:
+            f.write(('\n'.join(header) + '\n').encode('ascii'))
+            f.write(vertices.tobytes())
+            f.write(faces.tobytes())
+    else:
+        np.savez(filepath, vertices=mesh['vertices'], faces=mesh['faces'],
+                 theta=mesh['theta'], phi=mesh['phi'],
+                 max_error=np.array(mesh.get('max_error', np.nan)),
+                 label=np.array(mesh.get('label', '')))
+
+def _read_PLY(filepath):
+    """
+    Read a binary PLY file written by save_BoundaryMesh
+    """
+    with open(filepath, 'rb') as f:
+        header = []
+        while True:
+            line = f.readline().decode('ascii').strip()
+            header.append(line)
+            if line == 'end_header':
+                break
+        data = f.read()
+
+    if 'format binary_little_endian 1.0' not in header:
+        raise ValueError('{} is not a binary little-endian PLY file'.format(filepath))
+    n_vertices = [int(line.split()[-1]) for line in header if line.startswith('element vertex')][0]
+    n_faces = [int(line.split()[-1]) for line in header if line.startswith('element face')][0]
+    comments = [line[len('comment '):] for line in header if line.startswith('comment')]
+
+    vertex_dtype = np.dtype([('x', '<f4'), ('y', '<f4'), ('z', '<f4'),
+                             ('theta', '<f4'), ('phi', '<f4')])
+    face_dtype = np.dtype([('n', 'u1'), ('v', '<i4', (3,))])
+    vertices = np.frombuffer(data, dtype=vertex_dtype, count=n_vertices)
+    faces = np.frombuffer(data, dtype=face_dtype, count=n_faces, offset=n_vertices * vertex_dtype.itemsize)
+
+    max_error = [float(c.split()[-1]) for c in comments if c.startswith('max_error')]
+    return {'vertices': np.column_stack([vertices['x'], vertices['y'], vertices['z']]).astype('float64'),
+            'faces': faces['v'].copy(),
+            'theta': vertices['theta'].astype('float64'),
+            'phi': vertices['phi'].astype('float64'),
+            'max_error': max_error[0] if max_error else np.nan,
+            'label': comments[0] if comments and not comments[0].startswith('max_error') else ''}
+
+def load_BoundaryMesh(filepath):
+    """
+    Load a mesh written by save_BoundaryMesh. Meshes are cached, so
+    repeated calls do not re-read the file unless it has been modified.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the .npz or .ply mesh
+
+    Returns
+    -------
+    mesh : dict
+        Mesh, as returned by make_BoundaryMesh
+
+    """
+    filepath = os.path.abspath(filepath)
+    key = (filepath, os.path.getmtime(filepath))
+    if key in _mesh_cache:
+        return _mesh_cache[key]
+
+    if os.path.splitext(filepath)[1].lower() == '.ply':
+        mesh = _read_PLY(filepath)
+    else:
+        with np.load(filepath) as f:
+            mesh = {k: f[k] for k in f.files}
+        mesh['max_error'] = float(mesh['max_error'])
+        mesh['label'] = str(mesh['label'])
+
+    for stale_key in [k for k in _mesh_cache if k[0] == filepath]:
+        del _mesh_cache[stale_key]
+    _mesh_cache[key] = mesh
+
+    return mesh
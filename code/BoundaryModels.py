@@ -6,73 +6,40 @@ Created on Tue Apr 23 12:36:53 2024
 @author: mrutala
 """
 import numpy as np
-import pymc as pm
+
+# The coordinate conversions and model functions live in the NumPy-only
+# BoundaryModelsCore, and are re-exported here; pymc is imported only
+# when init() builds the prior distributions
+import BoundaryModelsCore as BMC
+from BoundaryModelsCore import (lookup, convert_CartesianToCylindricalSolar,
+                                convert_SphericalSolarToCartesian,
+                                convert_CylindricalSolarToSphericalSolar,
+                                convert_CartesianToSphericalSolar,
+                                convert_SphericalSolarToCylindricalSolar,
+                                transform_CartesianToSphericalSolar,
+                                transform_SphericalSolarToCartesian,
+                                transform_CartesianToCylindricalSolar,
+                                transform_CylindricalSolarToCartesian,
+                                transform_CylindricalSolarToSphericalSolar,
+                                transform_SphericalSolarToCylindricalSolar,
+                                Shuelike, Shuelike_log, Shuelike_r1fixed,
+                                Shuelike_rasymmetric,
+                                Shuelike_rasymmetric_r1fixed,
+                                Shuelike_rasymmetric_simple,
+                                ShuelikeAsymmetric, ShuelikeAsymmetric_r1fixed,
+                                ShuelikeAsymmetric_AsPerturbation,
+                                ShuelikeAsymmetric_AsPerturbation_r1fixed,
+                                ShuelikeAsymmetric_AsPerturbation_2,
+                                ShuelikeAsymmetric_AsPerturbation_r1fixed_2,
+                                Shuelike_aasymmetric_r1fixed, Joylike,
+                                Joylike_r1fixed, boundary_Winslowlike,
+                                boundary_Caternary, evaluate_Model,
+                                evaluate_ModelGradient, evaluate_ModelDerivative,
+                                ObservationGeometry)
 
 # =============================================================================
 # Section 1: Define a useful coordinate system for the boundaries
 # =============================================================================
-def convert_CartesianToCylindricalSolar(x, y, z):
-    """
-    Defines a cylindrical coordinate system with:
-        Longitudinal axis pointing toward the Sun
-        Polar axis pointing toward the north rotational pole
-        Angles measured positive counterclockwise from the polar axis
-
-    Parameters
-    ----------
-    x : TYPE
-        DESCRIPTION.
-    y : TYPE
-        DESCRIPTION.
-    z : TYPE
-        DESCRIPTION.
-
-    Returns
-    -------
-    rho : TYPE
-        DESCRIPTION.
-    phi : TYPE
-        DESCRIPTION.
-    ell : TYPE
-        DESCRIPTION.
-
-    """
-    
-    rho = np.sqrt(y**2 + z**2)
-    phi = np.arctan2(-y, z)
-    ell = x
-    
-    return np.array([rho, phi, ell])
-
-def convert_SphericalSolarToCartesian(r, t, p):
-    x = r * np.cos(t)
-    y = - r * np.sin(t) * np.sin(p)
-    z = r * np.sin(t) * np.cos(p)
-    
-    return np.array([x, y, z])
-
-def convert_CylindricalSolarToSphericalSolar(rho, phi, ell):
-    
-    r = np.sqrt(rho**2 + ell**2)
-    t = np.arctan2(rho, ell)
-    p = phi
-    
-    return np.array([r, t, p])
-
-def convert_CartesianToSphericalSolar(x, y, z):
-    rho, phi, ell = convert_CartesianToCylindricalSolar(x, y, z)
-    r, t, p = convert_CylindricalSolarToSphericalSolar(rho, phi, ell)
-    
-    return np.array([r, t, p])
-
-def convert_SphericalSolarToCylindricalSolar(r, t, p):
-    
-    rho = r * np.sin(t)
-    phi = p
-    ell = r * np.cos(t)
-    
-    return np.array([rho, phi, ell])
-
 def plot_CoordinateSystemsDiagram():
     import numpy as np
     from matplotlib import pyplot as plt
@@ -194,1008 +161,18 @@ def plot_CoordinateSystemsDiagram():
 # =============================================================================
 # Model lookup and initialization utilities
 # =============================================================================
-def lookup(model_number):
-    bm = {'001': 'Shuelike',
-          '002': 'Shuelike_Asymmetric',
-          '003': 'Shuelike_AsymmetricAlpha'}
-    
-    return bm['{:03d}'.format(model_number)]
-
 def init(model_name):
-    #   Select boundary model
-    
-    bm = {}
-    
-    bm['Shuelike'] = {'model': Shuelike,
-                      'param_dict': {},
-                      'param_distributions': {'r0': pm.Gamma,
-                                              'r1': pm.Normal,
-                                              'a0': pm.Gamma,
-                                              'a1': pm.Normal},
-                      'param_descriptions': {'r0': {'mu': 40, 'sigma': 20},
-                                             'r1': {'mu': -0.25, 'sigma': 0.05},
-                                             'a0': {'mu': 1, 'sigma': 0.5},
-                                             'a1': {'mu': 0, 'sigma': 1}}
-                      }
-    # bm['Shuelike_log'] = {'model': Shuelike_log,
-    #                   'param_dict': {},
-    #                   'param_distributions': {'r0': pm.Normal,
-    #                                           'r1': pm.Normal,
-    #                                           'a0': pm.LogNormal,
-    #                                           'a1': pm.Normal},
-    #                   'param_descriptions': {'r0': {'mu': 3.5, 'sigma': 0.5},
-    #                                          'r1': {'mu': -0.25, 'sigma': 0.05},
-    #                                          'a0': {'mu': 0, 'sigma': 0.25},
-    #                                          'a1': {'mu': 0, 'sigma': 1}}
-    #                   }
-    
-    bm['Shuelike_r1fixed'] = {'model': Shuelike_r1fixed,
-                              'param_dict': {},
-                              'param_distributions': {'r0': pm.Gamma,
-                                                      'a0': pm.Gamma,
-                                                      'a1': pm.Normal},
-                              'param_descriptions': {'r0': {'mu': 30, 'sigma': 15},
-                                                     'a0': {'mu': 0.8, 'sigma': 0.4},
-                                                     'a1': {'mu': 0, 'sigma': 1}}
-                              }
-    bm['Joylike'] = {'model': Joylike,
-                     'param_dict': {},
-                     'param_distributions': {'r1': pm.Normal,
-                                             'A0': pm.Normal,
-                                             'A1': pm.Normal,
-                                             'B0': pm.Normal,
-                                             'B1': pm.Normal,
-                                             'C0': pm.Normal,
-                                             'C1': pm.Normal,
-                                             'D0': pm.Normal,
-                                             'D1': pm.Normal,
-                                             'E0': pm.Normal,
-                                             'E1': pm.Normal,
-                                             'F0': pm.Normal,
-                                             'F1': pm.Normal},
-                     'param_descriptions': {'r1': {'mu': -0.25, 'sigma': 0.05},
-                                            'A0': {'mu':-0.62, 'sigma':0.49},
-                                            'A1': {'mu':+1.04, 'sigma':0.55},
-                                            'B0': {'mu':-0.57, 'sigma':0.01},
-                                            'B1': {'mu':-0.52, 'sigma':0.30},
-                                            'C0': {'mu':-0.07, 'sigma':0.12},
-                                            'C1': {'mu':+0.04, 'sigma':0.02},
-                                            'D0': {'mu':+0.03, 'sigma':0.05},
-                                            'D1': {'mu':+0.03, 'sigma':0.07},
-                                            'E0': {'mu':-0.84, 'sigma':0.03},
-                                            'E1': {'mu':-0.55, 'sigma':0.85},
-                                            'F0': {'mu':-0.05, 'sigma':0.10},
-                                            'F1': {'mu':+0.15, 'sigma':0.22}}
-                     }
-    bm['Joylike_r1fixed'] = {'model': Joylike_r1fixed,
-                             'param_dict': {},
-                             'param_distributions': {'A0': pm.Normal,
-                                                     'A1': pm.Normal,
-                                                     'B0': pm.Normal,
-                                                     'B1': pm.Normal,
-                                                     'C0': pm.Normal,
-                                                     'C1': pm.Normal,
-                                                     'D0': pm.Normal,
-                                                     'D1': pm.Normal,
-                                                     'E0': pm.Normal,
-                                                     'E1': pm.Normal,
-                                                     'F0': pm.Normal,
-                                                     'F1': pm.Normal},
-                             'param_descriptions': {'A0': {'mu':-0.62, 'sigma':0.49},
-                                                    'A1': {'mu':+1.04, 'sigma':0.55},
-                                                    'B0': {'mu':-0.57, 'sigma':0.01},
-                                                    'B1': {'mu':-0.52, 'sigma':0.30},
-                                                    'C0': {'mu':-0.07, 'sigma':0.12},
-                                                    'C1': {'mu':+0.04, 'sigma':0.02},
-                                                    'D0': {'mu':+0.03, 'sigma':0.05},
-                                                    'D1': {'mu':+0.03, 'sigma':0.07},
-                                                    'E0': {'mu':-0.84, 'sigma':0.03},
-                                                    'E1': {'mu':-0.55, 'sigma':0.85},
-                                                    'F0': {'mu':-0.05, 'sigma':0.10},
-                                                    'F1': {'mu':+0.15, 'sigma':0.22}}
-                     }
-    bm['Shuelike_rasymmetric'] = {'model': Shuelike_rasymmetric, 
-                                  'model_number': 3,
-                                  'param_dict': {},
-                                  'param_distributions': {'r0': pm.InverseGamma,
-                                                          'r1': pm.Normal,
-                                                          'r2': pm.Normal,
-                                                          'r3': pm.Normal,
-                                                          'r4': pm.Normal,
-                                                          'a0': pm.InverseGamma,
-                                                          'a1': pm.Normal},
-                                  'param_descriptions': {'r0': {'mu': 50, 'sigma': 10},
-                                                         'r1': {'mu': -0.2, 'sigma': 0.05},
-                                                         'r2': {'mu': -5, 'sigma': 3},
-                                                         'r3': {'mu': 0, 'sigma': 10},
-                                                         'r4': {'mu': 0, 'sigma': 10},
-                                                         'a0': {'mu': 0.75, 'sigma': 0.25},
-                                                         'a1': {'mu': -1.0, 'sigma': 2.0}}
-                                  }
-    
-    bm['Shuelike_rasymmetric_r1fixed'] = {'model': Shuelike_rasymmetric_r1fixed, 
-                                          'model_number': 3,
-                                          'param_dict': {},
-                                          'param_distributions': {'r0': pm.InverseGamma,
-                                                                  'r2': pm.Normal,
-                                                                  'r2_scale': pm.Gamma,
-                                                                  'r3': pm.Normal,
-                                                                  'r4': pm.Normal,
-                                                                  'a0': pm.InverseGamma,
-                                                                  'a1': pm.Normal},
-                                          'param_descriptions': {'r0': {'mu': 50, 'sigma': 30},
-                                                                 'r2': {'mu': -5, 'sigma': 3},
-                                                                 'r2_scale': {'mu': 0.1, 'sigma':0.1},
-                                                                 'r3': {'mu': 10, 'sigma': 10},
-                                                                 'r4': {'mu': 10, 'sigma': 10},
-                                                                 'a0': {'mu': 1.0, 'sigma': 0.5},
-                                                                 'a1': {'mu': -1.0, 'sigma': 1.0}}
-                                  }
-    bm['Shuelike_rasymmetric_simple'] = {'model': Shuelike_rasymmetric_simple, 
-                                          'model_number': 3,
-                                          'param_dict': {},
-                                          'param_distributions': {'r0': pm.InverseGamma,
-                                                                  'r3': pm.Normal,
-                                                                  'r4': pm.Normal,
-                                                                  'a0': pm.InverseGamma,
-                                                                  'a1': pm.Normal},
-                                          'param_descriptions': {'r0': {'mu': 30, 'sigma': 30},
-                                                                 'r3': {'mu': 10, 'sigma': 10},
-                                                                 'r4': {'mu': 10, 'sigma': 10},
-                                                                 'a0': {'mu': 1.0, 'sigma': 0.5},
-                                                                 'a1': {'mu': -1.0, 'sigma': 1.0}}
-                                  }
-    bm['Shuelike_aasymmetric_r1fixed'] = {'model': Shuelike_aasymmetric_r1fixed, 
-                                          'model_number': 3,
-                                          'param_dict': {},
-                                          'param_distributions': {'r0': pm.InverseGamma,
-                                                                  'a0': pm.InverseGamma,
-                                                                  'a1': pm.Normal,
-                                                                  'a2': pm.Beta,
-                                                                  'a3': pm.Beta,
-                                                                  'a4': pm.Beta},
-                                          'param_descriptions': {'r0': {'mu': 50, 'sigma': 30},
-                                                                 'a0': {'mu': 1.0, 'sigma': 0.5},
-                                                                 'a1': {'mu': -1.0, 'sigma': 1.0},
-                                                                 'a2': {'alpha': 2.0, 'beta': 5.0},
-                                                                 'a3': {'alpha': 2.0, 'beta': 5.0},
-                                                                 'a4': {'alpha': 2.0, 'beta': 5.0},}
-                                  }
-    
-    
-    
-    
-    
-    bm['ShuelikeAsymmetric'] = {'model': ShuelikeAsymmetric, 
-                                'model_number': 3,
-                                'param_dict': {},
-                                'param_distributions': {'r0': pm.Gamma,
-                                                        'r1': pm.Normal,
-                                                        'r2': pm.Gamma,
-                                                        'r3': pm.Gamma,
-                                                        'a0': pm.Gamma,
-                                                        'a1': pm.Normal},
-                                'param_descriptions': {'r0': {'mu': 60, 'sigma': 30},
-                                                       'r1': {'mu':-0.25, 'sigma':0.03},
-                                                       'r2': {'mu': 10, 'sigma': 10},
-                                                       'r3': {'mu': 10, 'sigma': 10},
-                                                       'a0': {'mu': 1.0, 'sigma': 0.5},
-                                                       'a1': {'mu': -1.0, 'sigma': 1.0}}
-                                }
-    bm['ShuelikeAsymmetric_r1fixed'] = {'model': ShuelikeAsymmetric_r1fixed, 
-                                              'model_number': 3,
-                                              'param_dict': {},
-                                              'param_distributions': {'r0': pm.Gamma,
-                                                                      'r2': pm.Gamma,
-                                                                      'r3': pm.Gamma,
-                                                                      'a0': pm.Gamma,
-                                                                      'a1': pm.Normal},
-                                              'param_descriptions': {'r0': {'mu': 60, 'sigma': 30},
-                                                                     'r2': {'mu': 10, 'sigma': 10},
-                                                                     'r3': {'mu': 10, 'sigma': 10},
-                                                                     'a0': {'mu': 1.0, 'sigma': 0.5},
-                                                                     'a1': {'mu': -1.0, 'sigma': 1.0}}
-                                              }
-    bm['ShuelikeAsymmetric_AsPerturbation'] = {'model': ShuelikeAsymmetric_AsPerturbation, 
-                                               'model_number': 3,
-                                               'param_dict': {},
-                                               'param_distributions': {'r0': pm.Gamma,
-                                                                       'r1': pm.Normal,
-                                                                       'r2': pm.Gamma,
-                                                                       'r3': pm.Gamma,
-                                                                       'a0': pm.Gamma,
-                                                                       'a1': pm.Normal},
-                                               'param_descriptions': {'r0': {'mu': 60, 'sigma': 30},
-                                                                      'r1': {'mu':-0.25, 'sigma':0.03},
-                                                                      'r2': {'mu': 10, 'sigma': 10},
-                                                                      'r3': {'mu': 10, 'sigma': 10},
-                                                                      'a0': {'mu': 1.0, 'sigma': 0.5},
-                                                                      'a1': {'mu': -1.0, 'sigma': 1.0}}
-                                               }
-    # bm['ShuelikeAsymmetric_AsPerturbation_r1fixed'] = {'model': ShuelikeAsymmetric_AsPerturbation_r1fixed, 
-    #                                                    'model_number': 3,
-    #                                                    'param_dict': {},
-    #                                                    'param_distributions': {'r0': pm.Gamma,
-    #                                                                            'r2': pm.Gamma,
-    #                                                                            'r3': pm.Gamma,
-    #                                                                            'a0': pm.Gamma,
-    #                                                                            'a1': pm.Normal},
-    #                                                    'param_descriptions': {'r0': {'mu': 40, 'sigma': 15},
-    #                                                                           'r2': {'mu': 10, 'sigma': 10},
-    #                                                                           'r3': {'mu': 10, 'sigma': 10},
-    #                                                                           'a0': {'mu': 1.0, 'sigma': 0.5},
-    #                                                                           'a1': {'mu': -1.0, 'sigma': 1.0}}
-    #                                                    }
-    bm['ShuelikeAsymmetric_AsPerturbation_2'] = {'model': ShuelikeAsymmetric_AsPerturbation_2, 
-                                                 'model_number': 3,
-                                                 'param_dict': {},
-                                                 'param_distributions': {'r0': pm.Gamma,
-                                                                         'r1': pm.Normal,
-                                                                         'r2': pm.Gamma,
-                                                                         'r3': pm.Gamma,
-                                                                         'a0': pm.Gamma,
-                                                                         'a1': pm.Normal},
-                                                 'param_descriptions': {'r0': {'mu': 40, 'sigma': 20},
-                                                                        'r1': {'mu': -0.25, 'sigma':0.03},
-                                                                        'r2': {'mu': 10, 'sigma': 10},
-                                                                        'r3': {'mu': 10, 'sigma': 10},
-                                                                        'a0': {'mu': 1.0, 'sigma': 0.5},
-                                                                        'a1': {'mu': 0, 'sigma': 1.0}}
-                                                 }
-    bm['ShuelikeAsymmetric_AsPerturbation_r1fixed_2'] = {'model': ShuelikeAsymmetric_AsPerturbation_r1fixed_2, 
-                                                       'model_number': 3,
-                                                       'param_dict': {},
-                                                       'param_distributions': {'r0': pm.Gamma,
-                                                                               'r2': pm.Gamma,
-                                                                               'r3': pm.Gamma,
-                                                                               'a0': pm.Gamma,
-                                                                               'a1': pm.Normal},
-                                                       'param_descriptions': {'r0': {'mu': 30, 'sigma': 10},
-                                                                              'r2': {'mu': 10, 'sigma': 10},
-                                                                              'r3': {'mu': 10, 'sigma': 10},
-                                                                              'a0': {'mu': 1.0, 'sigma': 0.2},
-                                                                              'a1': {'mu': 0, 'sigma': 2.0}}
-                                                       }
-       
-    return bm[model_name]
-          
-# =============================================================================
-# Section 1.5: 3D Functional Forms for the boundaries
-# =============================================================================
-# def Shuelike_Static(parameters=[], coordinates=[], variables=False):
-#     """
-#     r = r_0 (2/(1 + cos(theta)))^alpha
-
-#     Parameters
-#     ----------
-#     parameters : TYPE
-#         DESCRIPTION.
-#     coordinates : TYPE
-#         DESCRIPTION.
-
-#     Returns
-#     -------
-#     r : TYPE
-#         DESCRIPTION.
-
-#     """
-#     if variables:
-#         return ('t'), 'r'
-    
-#     t = coordinates
-#     r0, a0 = parameters
-
-    
-#     r = r0 * (2/(1 + np.cos(t)))**a0
-
-#     return r
-# =============================================================================
-# Section 2: 4D Functional forms for the boundaries
-# =============================================================================
-
-def Shuelike(parameters=[], coordinates=[], variables=False,
-             return_r_ss:bool=False, return_a_f:bool=False):
-    """
-    r = r_0 (2/(1 + cos(theta)))^alpha
-
-    Parameters
-    ----------
-    parameters : TYPE
-        DESCRIPTION.
-    coordinates : TYPE
-        DESCRIPTION.
-
-    Returns
-    -------
-    r : TYPE
-        DESCRIPTION.
-
     """
-    # Optionally, return variables
-    if variables:
-        return ('t', 'p', 'p_dyn'), 'r'
-    
-    # Unpack coordinates
-    t, p, p_dyn = coordinates
-    r0, r1, a0, a1 = parameters
-    
-    # Calculate r_b & a_f, returning one if requested
-    r_ss = r0*((p_dyn)**(r1))
-    a_f = a0 + a1 * p_dyn
-    
-    if return_r_ss:
-        return r_ss
-    if return_a_f:
-        return a_f
-    
-    # Calculate r
-    r = r_ss * (2/(1 + np.cos(t)))**a_f
-    
-    return r
-
-    # # Attempt to handle multiple parameters simultaneously-- pymc didn't like it :(
-    # # Optionally, return variables
-    # if variables:
-    #     return ('t', 'p', 'p_dyn'), 'r'
-    
-    # # Unpack coordinates
-    # t, p, p_dyn = coordinates
-    
-    # # Unpack parameters, checking that they are iterable
-    # if len(np.shape(parameters)) == 1:
-    #     parameters = [[p] for p in parameters]
-    # r0arr, r1arr, a0arr, a1arr = parameters
-    
-    # r_arr, r_b_arr, a_f_arr = [], [], []
-    # for r0, r1, a0, a1 in zip(r0arr, r1arr, a0arr, a1arr):
-    #     # Calculate r_b & a_f, returning one if requested
-    #     r_b_arr.append(r0*((p_dyn)**(r1)))
-    #     a_f_arr.append(a0 + a1 * p_dyn)
-        
-    #     # Calculate r
-    #     r_arr.append(r_b_arr[-1] * (2/(1 + np.cos(t)))**a_f_arr[-1])
-        
-    
-    # if return_r_b:
-    #     return np.squeeze(np.array(r_b_arr))
-    # if return_a_f:
-    #     return np.squeeze(np.array(a_f_arr))
-    # return np.squeeze(np.array(r_arr))
-
-def Shuelike_log(parameters=[], coordinates=[], variables=False,
-             return_r_ss:bool=False, return_a_f:bool=False):
+    Look up a boundary model by name, as BoundaryModelsCore.init, with
+    the prior distributions ('param_distributions') as pymc classes
     """
-    r = r_0 (2/(1 + cos(theta)))^alpha
+    import pymc as pm
 
-    Parameters
-    ----------
-    parameters : TYPE
-        DESCRIPTION.
-    coordinates : TYPE
-        DESCRIPTION.
+    model_dict = BMC.init(model_name)
+    model_dict['param_distributions'] = {name: getattr(pm, dist) for name, dist
+                                         in model_dict['param_distributions'].items()}
 
-    Returns
-    -------
-    r : TYPE
-        DESCRIPTION.
-
-    """
-    # Optionally, return variables
-    if variables:
-        return ('t', 'p', 'log_p_dyn'), 'log_r'
-    
-    # Unpack coordinates
-    t, p, log_p_dyn = coordinates
-    log_r0, r1, a0, a1 = parameters
-    
-    # Calculate r_b & a_f, returning one if requested
-    p_dyn = np.exp(log_p_dyn)
-    r0 = np.exp(log_r0)
-    
-    r_ss = r0*((p_dyn)**(r1))
-    a_f = a0 + a1 * p_dyn
-    
-    if return_r_ss:
-        return r_ss
-    if return_a_f:
-        return a_f
-    
-    # Calculate r
-    r = r_ss * (2/(1 + np.cos(t)))**a_f
-    log_r = np.log(r)
-    
-    return log_r
-
-
-def Shuelike_r1fixed(parameters=[], coordinates=[], variables=False,
-             return_r_b:bool=False, return_a_f:bool=False):
-    """
-    r = r_0 (2/(1 + cos(theta)))^alpha
-
-    Parameters
-    ----------
-    parameters : TYPE
-        DESCRIPTION.
-    coordinates : TYPE
-        DESCRIPTION.
-
-    Returns
-    -------
-    r : TYPE
-        DESCRIPTION.
-
-    """
-    # Optionally, return variables
-    if variables:
-        return ('t', 'p', 'p_dyn'), 'r'
-    
-    # Unpack coordinates
-    t, p, p_dyn = coordinates
-    r0, a0, a1 = parameters
-    r1 = -2.5
-    
-    # Calculate r_b & a_f, returning one if requested
-    r_b = r0*((p_dyn)**(r1/10))
-    a_f = a0 + a1 * p_dyn
-    
-    if return_r_b:
-        return r_b
-    if return_a_f:
-        return a_f
-    
-    # Calculate r
-    r = r_b * (2/(1 + np.cos(t)))**a_f
-    
-    return r
-
-def Shuelike_rasymmetric(parameters=[], coordinates=[], variables=False,
-                         return_r_ss:bool=False, return_a_f:bool=False):
-    """
-    
-
-    Parameters
-    ----------
-    parameters : TYPE
-        DESCRIPTION.
-    coordinates : TYPE
-        DESCRIPTION.
-
-    Returns
-    -------
-    r : TYPE
-        DESCRIPTION.
-
-    """
-    if variables:
-        return ('t', 'p', 'p_dyn'), 'r'
-    
-    t, p, p_dyn = coordinates
-    r0, r1, r2, r3, r4, a0, a1 = parameters
-    
-    sg_pos = (np.sign(np.sin(p)) + 1)/2
-    sg_neg = (np.sign(np.sin(p)) - 1)/2
-    
-    r2_term = r2*np.cos(p)**2
-    r3_term = r3*sg_pos*np.sin(p)**2
-    r4_term = r4*sg_neg*np.sin(p)**2
-    r_ss = (r0 + (np.sin(t/2)**2)*(r2_term + r3_term + r4_term)) * ((p_dyn)**r1)
-    
-    a_f =  (a0 + a1 * p_dyn)
-    
-    if return_r_ss:
-        return r_ss
-    if return_a_f:
-        return a_f
-    
-    # Calculate r
-    r = r_ss * (2/(1 + np.cos(t)))**a_f
-        
-    return r
-
-def Shuelike_rasymmetric_r1fixed(parameters=[], coordinates=[], variables=False,
-                                 return_r_ss:bool=False, return_a_f:bool=False):
-    """
-    
-
-    Parameters
-    ----------
-    parameters : TYPE
-        DESCRIPTION.
-    coordinates : TYPE
-        DESCRIPTION.
-
-    Returns
-    -------
-    r : TYPE
-        DESCRIPTION.
-
-    """
-    if variables:
-        return ('t', 'p', 'p_dyn'), 'r'
-    
-    t, p, p_dyn = coordinates
-    r0, r2, r2_scale, r3, r4, a0, a1 = parameters
-    r1 = -0.25
-    
-    sg_pos = (np.sign(np.sin(p)) + 1)/2
-    sg_neg = (np.sign(np.sin(p)) - 1)/2
-    
-    r2_term = r2*np.cos(p)**2 * (r2_scale) + (1 - r2_scale)
-    r3_term = r3*sg_pos*np.sin(p)
-    r4_term = r4*sg_neg*np.sin(p)
-    r_ss = r0 * ((p_dyn)**r1) 
-    r_perturb = (np.sin(t/2)) * (r2_term + r3_term + r4_term) * ((p_dyn)**r1) 
-    
-    a_f =  (a0 + a1 * p_dyn)
-    
-    if return_r_ss:
-        return r_ss
-    if return_a_f:
-        return a_f
-    
-    # Calculate r
-    r = r_ss * (2/(1 + np.cos(t)))**a_f + r_perturb
-
-    return r
-
-def Shuelike_rasymmetric_simple(parameters=[], coordinates=[], variables=False,
-                                return_r_ss:bool=False, return_a_f:bool=False):
-    """
-    
-
-    Parameters
-    ----------
-    parameters : TYPE
-        DESCRIPTION.
-    coordinates : TYPE
-        DESCRIPTION.
-
-    Returns
-    -------
-    r : TYPE
-        DESCRIPTION.
-
-    """
-    if variables:
-        return ('t', 'p', 'p_dyn'), 'r'
-    
-    t, p, p_dyn = coordinates
-    r0, r3, r4, a0, a1 = parameters
-    r1 = -0.25
-    
-    sg_pos = (np.sign(np.sin(p)) + 1)/2
-    sg_neg = (np.sign(np.sin(p)) - 1)/2
-    
-    # r2_term = r2*np.cos(p)**2 * (r2_scale) + (1 - r2_scale)
-    r3_term = r3*sg_pos*np.sin(p)
-    r4_term = r4*sg_neg*np.sin(p)
-    r_ss = r0 * ((p_dyn)**r1) 
-    r_perturb = (np.sin(t/2)**2) * (r3_term + r4_term) * ((p_dyn)**r1) 
-    
-    a_f =  (a0 + a1 * p_dyn)
-    
-    if return_r_ss:
-        return r_ss
-    if return_a_f:
-        return a_f
-    
-    # Calculate r
-    r = r_ss * (2/(1 + np.cos(t)))**a_f + r_perturb
-
-    return r
-
-def ShuelikeAsymmetric(parameters=[], coordinates=[], variables=False,
-                       return_r_ss:bool=False, return_a_f:bool=False):
-    """
-    
-
-    Parameters
-    ----------
-    parameters : TYPE
-        DESCRIPTION.
-    coordinates : TYPE
-        DESCRIPTION.
-
-    Returns
-    -------
-    r : TYPE
-        DESCRIPTION.
-
-    """
-    if variables:
-        return ('t', 'p', 'p_dyn'), 'r'
-    
-    t, p, p_dyn = coordinates
-    r0, r1, r2, r3, a0, a1 = parameters
-    
-    sg_pos = (np.sign(np.sin(p)) + 1)/2
-    sg_neg = (np.sign(np.sin(p)) - 1)/2
-    
-    # r2_term = r2*np.cos(p)**2 * (r2_scale) + (1 - r2_scale)
-    r2_term = r2*sg_pos*np.sin(p)
-    r3_term = r3*sg_neg*np.sin(p)
-    r_ss = r0 * ((p_dyn)**r1) + (np.sin(t/2)**2) * (r2_term + r3_term) * ((p_dyn)**r1) 
-    
-    a_f =  (a0 + a1 * p_dyn)
-    
-    if return_r_ss:
-        return r_ss
-    if return_a_f:
-        return a_f
-    
-    # Calculate r
-    r = r_ss * (2/(1 + np.cos(t)))**a_f
-
-    return r
-
-def ShuelikeAsymmetric_r1fixed(parameters=[], coordinates=[], variables=False,
-                       return_r_ss:bool=False, return_a_f:bool=False):
-    """
-    
-
-    Parameters
-    ----------
-    parameters : TYPE
-        DESCRIPTION.
-    coordinates : TYPE
-        DESCRIPTION.
-
-    Returns
-    -------
-    r : TYPE
-        DESCRIPTION.
-
-    """
-    if variables:
-        return ('t', 'p', 'p_dyn'), 'r'
-    
-    t, p, p_dyn = coordinates
-    r0, r2, r3, a0, a1 = parameters
-    r1 = -0.25
-    
-    sg_pos = (np.sign(np.sin(p)) + 1)/2
-    sg_neg = (np.sign(np.sin(p)) - 1)/2
-    
-    # r2_term = r2*np.cos(p)**2 * (r2_scale) + (1 - r2_scale)
-    r2_term = r2*sg_pos*np.sin(p)
-    r3_term = r3*sg_neg*np.sin(p)
-    r_ss = r0 * ((p_dyn)**r1) + (np.sin(t/2)**2) * (r2_term + r3_term) * ((p_dyn)**r1) 
-    
-    a_f =  (a0 + a1 * p_dyn)
-    
-    if return_r_ss:
-        return r_ss
-    if return_a_f:
-        return a_f
-    
-    # Calculate r
-    r = r_ss * (2/(1 + np.cos(t)))**a_f
-
-    return r
-
-def ShuelikeAsymmetric_AsPerturbation(parameters=[], coordinates=[], variables=False,
-                                      return_r_ss:bool=False, return_a_f:bool=False):
-    """
-    
-
-    Parameters
-    ----------
-    parameters : TYPE
-        DESCRIPTION.
-    coordinates : TYPE
-        DESCRIPTION.
-
-    Returns
-    -------
-    r : TYPE
-        DESCRIPTION.
-
-    """
-    if variables:
-        return ('t', 'p', 'p_dyn'), 'r'
-    
-    t, p, p_dyn = coordinates
-    r0, r1, r2, r3, a0, a1 = parameters
-    
-    sg_pos = (np.sign(np.sin(p)) + 1)/2
-    sg_neg = (np.sign(np.sin(p)) - 1)/2
-    
-    # r2_term = r2*np.cos(p)**2 * (r2_scale) + (1 - r2_scale)
-    r2_term = r2*sg_pos*np.sin(p)
-    r3_term = r3*sg_neg*np.sin(p)
-    r_ss = r0 * ((p_dyn)**r1) 
-    r_perturb = (np.sin(t/2)**2) * (r2_term + r3_term) * ((p_dyn)**r1) 
-    
-    a_f =  (a0 + a1 * p_dyn)
-    
-    if return_r_ss:
-        return r_ss
-    if return_a_f:
-        return a_f
-    
-    # Calculate r
-    r = r_ss * (2/(1 + np.cos(t)))**a_f + r_perturb
-
-    return r
-
-def ShuelikeAsymmetric_AsPerturbation_r1fixed(parameters=[], coordinates=[], variables=False,
-                                      return_r_ss:bool=False, return_a_f:bool=False):
-    """
-    
-
-    Parameters
-    ----------
-    parameters : TYPE
-        DESCRIPTION.
-    coordinates : TYPE
-        DESCRIPTION.
-
-    Returns
-    -------
-    r : TYPE
-        DESCRIPTION.
-
-    """
-    if variables:
-        return ('t', 'p', 'p_dyn'), 'r'
-    
-    t, p, p_dyn = coordinates
-    r0, r2, r3, a0, a1 = parameters
-    r1 = -0.25
-    
-    sg_pos = (np.sign(np.sin(p)) + 1)/2
-    sg_neg = (np.sign(np.sin(p)) - 1)/2
-    
-    # r2_term = r2*np.cos(p)**2 * (r2_scale) + (1 - r2_scale)
-    r2_term = r2*sg_pos*np.sin(p)
-    r3_term = r3*sg_neg*np.sin(p)
-    r_ss = r0 * ((p_dyn)**r1) 
-    r_perturb = (np.sin(t/2)**2) * (r2_term + r3_term) * ((p_dyn)**r1) 
-    
-    a_f =  (a0 + a1 * p_dyn)
-    
-    if return_r_ss:
-        return r_ss
-    if return_a_f:
-        return a_f
-    
-    # Calculate r
-    r = r_ss * (2/(1 + np.cos(t)))**a_f + r_perturb
-
-    return r
-
-def ShuelikeAsymmetric_AsPerturbation_2(parameters=[], coordinates=[], variables=False,
-                                        return_r_ss:bool=False, return_a_f:bool=False):
-    """
-    
-
-    Parameters
-    ----------
-    parameters : TYPE
-        DESCRIPTION.
-    coordinates : TYPE
-        DESCRIPTION.
-
-    Returns
-    -------
-    r : TYPE
-        DESCRIPTION.
-
-    """
-    if variables:
-        return ('t', 'p', 'p_dyn'), 'r'
-    
-    t, p, p_dyn = coordinates
-    r0, r1, r2, r3, a0, a1 = parameters
-    
-    sg_pos = (np.sign(np.sin(p)) + 1)/2
-    sg_neg = -(np.sign(np.sin(p)) - 1)/2
-    
-    # r2_term = r2*np.cos(p)**2 * (r2_scale) + (1 - r2_scale)
-    r2_term = r2*sg_pos * np.sin(p)**2
-    r3_term = r3*sg_neg * np.sin(p)**2
-    r_ss = r0 * ((p_dyn)**r1) 
-    r_perturb = (np.sin(t/2)**2) * (r2_term + r3_term) * ((p_dyn)**r1) 
-    
-    a_f =  (a0 + a1 * p_dyn)
-    
-    if return_r_ss:
-        return r_ss
-    if return_a_f:
-        return a_f
-    
-    # Calculate r
-    r = r_ss * (2/(1 + np.cos(t)))**a_f + r_perturb
-
-    return r
-
-
-def ShuelikeAsymmetric_AsPerturbation_r1fixed_2(parameters=[], coordinates=[], variables=False,
-                                      return_r_ss:bool=False, return_a_f:bool=False):
-    """
-    
-
-    Parameters
-    ----------
-    parameters : TYPE
-        DESCRIPTION.
-    coordinates : TYPE
-        DESCRIPTION.
-
-    Returns
-    -------
-    r : TYPE
-        DESCRIPTION.
-
-    """
-    if variables:
-        return ('t', 'p', 'p_dyn'), 'r'
-    
-    t, p, p_dyn = coordinates
-    r0, r2, r3, a0, a1 = parameters
-    r1 = -0.25
-    
-    sg_pos = (np.sign(np.sin(p)) + 1)/2
-    sg_neg = -(np.sign(np.sin(p)) - 1)/2
-    
-    # r2_term = r2*np.cos(p)**2 * (r2_scale) + (1 - r2_scale)
-    r2_term = r2*sg_pos * np.sin(p)**2
-    r3_term = r3*sg_neg * np.sin(p)**2
-    r_ss = r0 * ((p_dyn)**r1) 
-    r_perturb = (np.sin(t/2)**2) * (r2_term + r3_term) * ((p_dyn)**r1) 
-    
-    a_f =  (a0 + a1 * p_dyn)
-    
-    if return_r_ss:
-        return r_ss
-    if return_a_f:
-        return a_f
-    
-    # Calculate r
-    r = r_ss * (2/(1 + np.cos(t)))**a_f + r_perturb
-
-    return r
-
-
-def Shuelike_aasymmetric_r1fixed(parameters=[], coordinates=[], variables=False,
-                                 return_r_ss:bool=False, return_a_f:bool=False):
-    """
-    
-
-    Parameters
-    ----------
-    parameters : TYPE
-        DESCRIPTION.
-    coordinates : TYPE
-        DESCRIPTION.
-
-    Returns
-    -------
-    r : TYPE
-        DESCRIPTION.
-
-    """
-    if variables:
-        return ('t', 'p', 'p_dyn'), 'r'
-    
-    t, p, p_dyn = coordinates
-    r0, a0, a1, a2, a3, a4 = parameters
-    r1 = -0.25
-    
-    sg_pos = (np.sign(np.sin(p)) + 1)/2
-    sg_neg = (np.sign(np.sin(p)) - 1)/2
-    
-    r_ss = r0 * ((p_dyn)**r1) 
-    
-    a2_term = 1 - (a2 * np.cos(p)**2)
-    a3_term = 1 - (sg_pos * a3 * np.sin(p)**2)
-    a4_term = 1 - (sg_neg * a4 * np.sin(p)**2)
-    a_f =  (a0 + a1 * p_dyn) * a2_term * a3_term * a4_term
-    
-    if return_r_ss:
-        return r_ss
-    if return_a_f:
-        return a_f
-    
-    # Calculate r
-    r = r_ss * (2/(1 + np.cos(t)))**a_f
-
-    return r
-
-def Joylike(parameters=[], coordinates=[], variables=False):
-    """
-    
-
-    Parameters
-    ----------
-    parameters : TYPE
-        DESCRIPTION.
-    coordinates : TYPE
-        DESCRIPTION.
-
-    Returns
-    -------
-    z : TYPE
-        DESCRIPTION.
-
-    """
-    if variables:
-        return ('t', 'p', 'p_dyn'), 'r'
-    
-    t, p, p_dyn = coordinates
-    r1, a0, a1, b0, b1, c0, c1, d0, d1, e0, e1, f0, f1 = parameters
-    
-    # x = x * 1/120
-    # y = y * 1/120
-    
-    a = a0 + a1*p_dyn**(r1)
-    b = b0 + b1*p_dyn**(r1)
-    c = c0 + c1*p_dyn**(r1)
-    d = d0 + d1*p_dyn
-    e = e0 + e1*p_dyn
-    f = f0 + f1*p_dyn
-    
-    A = c*np.cos(t)**2 + e*np.sin(t)**2*np.sin(p)**2 - f*np.sin(t)*np.cos(t)*np.sin(p) - np.sin(t)**2*np.cos(p)**2
-    B = b*np.cos(t) - d*np.sin(t)*np.sin(p)
-    C = a
-    
-    r = (-B - np.sqrt(B**2 - 4*A*C)) / (2*A)
-    
-    
-    return np.array(r) * 120
-
-
-def Joylike_r1fixed(parameters=[], coordinates=[], variables=False):
-    """
-    
-
-    Parameters
-    ----------
-    parameters : TYPE
-        DESCRIPTION.
-    coordinates : TYPE
-        DESCRIPTION.
-
-    Returns
-    -------
-    z : TYPE
-        DESCRIPTION.
-
-    """
-    if variables:
-        return ('t', 'p', 'p_dyn'), 'r'
-    
-    t, p, p_dyn = coordinates
-    a0, a1, b0, b1, c0, c1, d0, d1, e0, e1, f0, f1 = parameters
-    r1 = -1/4
-    
-    # x = x * 1/120
-    # y = y * 1/120
-    
-    a = a0 + a1*p_dyn**(r1)
-    b = b0 + b1*p_dyn**(r1)
-    c = c0 + c1*p_dyn**(r1)
-    d = d0 + d1*p_dyn
-    e = e0 + e1*p_dyn
-    f = f0 + f1*p_dyn
-    
-    A = c*np.cos(t)**2 + e*np.sin(t)**2*np.sin(p)**2 - f*np.sin(t)*np.cos(t)*np.sin(p) - np.sin(t)**2*np.cos(p)**2
-    B = b*np.cos(t) - d*np.sin(t)*np.sin(p)
-    C = a
-    
-    r = (-B - np.sqrt(B**2 - 4*A*C)) / (2*A)
-    
-    
-    return np.array(r) * 120
-
-
-def boundary_Winslowlike():
-    
-    return
-
-def boundary_Caternary():
-    
-    return
+    return model_dict
 
 # =============================================================================
 # 
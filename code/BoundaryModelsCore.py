@@ -0,0 +1,1676 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NumPy-only core of BoundaryModels: coordinate conversions, the boundary
+model functions, and the model registry, with priors described by name
+rather than as pymc distributions. Importing this module does not import
+pymc, so it is cheap enough for lightweight evaluation scripts.
+
+@author: mrutala
+"""
+import functools
+
+import numpy as np
+
+# =============================================================================
+# Section 1: Define a useful coordinate system for the boundaries
+# =============================================================================
+def convert_CartesianToCylindricalSolar(x, y, z):
+    """
+    Defines a cylindrical coordinate system with:
+        Longitudinal axis pointing toward the Sun
+        Polar axis pointing toward the north rotational pole
+        Angles measured positive counterclockwise from the polar axis
+
+    Parameters
+    ----------
+    x : TYPE
+        DESCRIPTION.
+    y : TYPE
+        DESCRIPTION.
+    z : TYPE
+        DESCRIPTION.
+
+    Returns
+    -------
+    rho : TYPE
+        DESCRIPTION.
+    phi : TYPE
+        DESCRIPTION.
+    ell : TYPE
+        DESCRIPTION.
+
+    """
+    
+    rho = np.sqrt(y**2 + z**2)
+    phi = np.arctan2(-y, z)
+    ell = x
+    
+    return np.array([rho, phi, ell])
+
+def convert_SphericalSolarToCartesian(r, t, p):
+    x = r * np.cos(t)
+    y = - r * np.sin(t) * np.sin(p)
+    z = r * np.sin(t) * np.cos(p)
+    
+    return np.array([x, y, z])
+
+def convert_CylindricalSolarToSphericalSolar(rho, phi, ell):
+    
+    r = np.sqrt(rho**2 + ell**2)
+    t = np.arctan2(rho, ell)
+    p = phi
+    
+    return np.array([r, t, p])
+
+def convert_CartesianToSphericalSolar(x, y, z):
+    
+    # Directly, without building the cylindrical coordinates first
+    rho = np.hypot(y, z)
+    r = np.hypot(rho, x)
+    t = np.arctan2(rho, x)
+    p = np.arctan2(-np.asarray(y), z)
+    
+    return np.array([r, t, p])
+
+def convert_SphericalSolarToCylindricalSolar(r, t, p):
+    
+    rho = r * np.sin(t)
+    phi = p
+    ell = r * np.cos(t)
+    
+    return np.array([rho, phi, ell])
+
+
+# =============================================================================
+# (N, 3) transforms, with preallocated outputs
+# =============================================================================
+# Rows converted per chunk; this bounds the temporaries to a few of these
+_transform_chunksize = 2**16
+
+def _prepare_Transform(coords, out):
+    """
+    Check that coords is an (N, 3) float array, and return it with an (N, 3)
+    output buffer of the same dtype (allocated here if out is None)
+    """
+    coords = np.asarray(coords)
+    if coords.dtype not in (np.float32, np.float64):
+        coords = coords.astype(np.float64)
+    if coords.ndim != 2 or coords.shape[1] != 3:
+        raise ValueError('coords must have shape (N, 3), not {}'.format(coords.shape))
+    
+    if out is None:
+        out = np.empty(coords.shape, dtype=coords.dtype)
+    elif out.shape != coords.shape:
+        raise ValueError('out must have shape {}, not {}'.format(coords.shape, out.shape))
+    
+    return coords, out
+
+def _iterate_Chunks(n_rows):
+    for start in range(0, n_rows, _transform_chunksize):
+        yield slice(start, min(start + _transform_chunksize, n_rows))
+
+def transform_CartesianToSphericalSolar(xyz, out=None):
+    """
+    Convert (N, 3) Cartesian positions [x, y, z] to spherical solar
+    positions [r, t, p]
+    
+    Parameters
+    ----------
+    xyz : np.ndarray
+        (N, 3) array of float32 or float64 positions
+    out : np.ndarray, optional
+        (N, 3) buffer for the result; may be xyz itself, to convert in place
+    
+    Returns
+    -------
+    out : np.ndarray
+        (N, 3) array of [r, t, p], with the dtype of xyz unless out is given
+    
+    """
+    xyz, out = _prepare_Transform(xyz, out)
+    
+    for rows in _iterate_Chunks(len(xyz)):
+        x, y, z = xyz[rows, 0], xyz[rows, 1], xyz[rows, 2]
+        
+        # Only rho and p need temporaries; the rest is written in order so
+        # that converting in place never reads an overwritten column
+        rho = np.hypot(y, z)
+        p = np.arctan2(-y, z)
+        out[rows, 1] = np.arctan2(rho, x)
+        np.hypot(rho, x, out=rho)
+        out[rows, 0] = rho
+        out[rows, 2] = p
+    
+    return out
+
+def transform_SphericalSolarToCartesian(rtp, out=None):
+    """
+    Convert (N, 3) spherical solar positions [r, t, p] to Cartesian
+    positions [x, y, z]; see transform_CartesianToSphericalSolar()
+    """
+    rtp, out = _prepare_Transform(rtp, out)
+    
+    for rows in _iterate_Chunks(len(rtp)):
+        r, t, p = rtp[rows, 0], rtp[rows, 1], rtp[rows, 2]
+        
+        rho = r * np.sin(t)
+        x = r * np.cos(t)
+        out[rows, 1] = -rho * np.sin(p)
+        np.multiply(rho, np.cos(p), out=rho)
+        out[rows, 2] = rho
+        out[rows, 0] = x
+    
+    return out
+
+def transform_CartesianToCylindricalSolar(xyz, out=None):
+    """
+    Convert (N, 3) Cartesian positions [x, y, z] to cylindrical solar
+    positions [rho, phi, ell]; see transform_CartesianToSphericalSolar()
+    """
+    xyz, out = _prepare_Transform(xyz, out)
+    
+    for rows in _iterate_Chunks(len(xyz)):
+        x, y, z = xyz[rows, 0], xyz[rows, 1], xyz[rows, 2]
+        
+        rho = np.hypot(y, z)
+        out[rows, 1] = np.arctan2(-y, z)
+        out[rows, 2] = x
+        out[rows, 0] = rho
+    
+    return out
+
+def transform_CylindricalSolarToCartesian(rpl, out=None):
+    """
+    Convert (N, 3) cylindrical solar positions [rho, phi, ell] to Cartesian
+    positions [x, y, z]; see transform_CartesianToSphericalSolar()
+    """
+    rpl, out = _prepare_Transform(rpl, out)
+    
+    for rows in _iterate_Chunks(len(rpl)):
+        rho, phi, ell = rpl[rows, 0], rpl[rows, 1], rpl[rows, 2]
+        
+        y = -rho * np.sin(phi)
+        z = rho * np.cos(phi)
+        out[rows, 0] = ell
+        out[rows, 1] = y
+        out[rows, 2] = z
+    
+    return out
+
+def transform_CylindricalSolarToSphericalSolar(rpl, out=None):
+    """
+    Convert (N, 3) cylindrical solar positions [rho, phi, ell] to spherical
+    solar positions [r, t, p]; see transform_CartesianToSphericalSolar()
+    """
+    rpl, out = _prepare_Transform(rpl, out)
+    
+    for rows in _iterate_Chunks(len(rpl)):
+        rho, phi, ell = rpl[rows, 0], rpl[rows, 1], rpl[rows, 2]
+        
+        r = np.hypot(rho, ell)
+        t = np.arctan2(rho, ell)
+        out[rows, 2] = phi
+        out[rows, 1] = t
+        out[rows, 0] = r
+    
+    return out
+
+def transform_SphericalSolarToCylindricalSolar(rtp, out=None):
+    """
+    Convert (N, 3) spherical solar positions [r, t, p] to cylindrical solar
+    positions [rho, phi, ell]; see transform_CartesianToSphericalSolar()
+    """
+    rtp, out = _prepare_Transform(rtp, out)
+    
+    for rows in _iterate_Chunks(len(rtp)):
+        r, t, p = rtp[rows, 0], rtp[rows, 1], rtp[rows, 2]
+        
+        rho = r * np.sin(t)
+        ell = r * np.cos(t)
+        out[rows, 1] = p
+        out[rows, 2] = ell
+        out[rows, 0] = rho
+    
+    return out
+
+
+# =============================================================================
+# Model lookup and initialization utilities
+# =============================================================================
+def lookup(model_number):
+    bm = {'001': 'Shuelike',
+          '002': 'Shuelike_Asymmetric',
+          '003': 'Shuelike_AsymmetricAlpha'}
+    
+    return bm['{:03d}'.format(model_number)]
+
+def init(model_name):
+    """
+    Look up a boundary model by name: its function, and a declarative
+    description of its priors, as the names of the distributions
+    ('param_distributions', e.g. 'Gamma') and their parameters
+    ('param_descriptions'). BoundaryModels.init returns the same, with
+    the distributions as pymc classes.
+    """
+    #   Select boundary model
+    
+    bm = {}
+    
+    bm['Shuelike'] = {'model': Shuelike,
+                      'param_dict': {},
+                      'param_distributions': {'r0': 'Gamma',
+                                              'r1': 'Normal',
+                                              'a0': 'Gamma',
+                                              'a1': 'Normal'},
+                      'param_descriptions': {'r0': {'mu': 40, 'sigma': 20},
+                                             'r1': {'mu': -0.25, 'sigma': 0.05},
+                                             'a0': {'mu': 1, 'sigma': 0.5},
+                                             'a1': {'mu': 0, 'sigma': 1}}
+                      }
+    # bm['Shuelike_log'] = {'model': Shuelike_log,
+    #                   'param_dict': {},
+    #                   'param_distributions': {'r0': 'Normal',
+    #                                           'r1': 'Normal',
+    #                                           'a0': 'LogNormal',
+    #                                           'a1': 'Normal'},
+    #                   'param_descriptions': {'r0': {'mu': 3.5, 'sigma': 0.5},
+    #                                          'r1': {'mu': -0.25, 'sigma': 0.05},
+    #                                          'a0': {'mu': 0, 'sigma': 0.25},
+    #                                          'a1': {'mu': 0, 'sigma': 1}}
+    #                   }
+    
+    bm['Shuelike_r1fixed'] = {'model': Shuelike_r1fixed,
+                              'param_dict': {},
+                              'param_distributions': {'r0': 'Gamma',
+                                                      'a0': 'Gamma',
+                                                      'a1': 'Normal'},
+                              'param_descriptions': {'r0': {'mu': 30, 'sigma': 15},
+                                                     'a0': {'mu': 0.8, 'sigma': 0.4},
+                                                     'a1': {'mu': 0, 'sigma': 1}}
+                              }
+    bm['Joylike'] = {'model': Joylike,
+                     'param_dict': {},
+                     'param_distributions': {'r1': 'Normal',
+                                             'A0': 'Normal',
+                                             'A1': 'Normal',
+                                             'B0': 'Normal',
+                                             'B1': 'Normal',
+                                             'C0': 'Normal',
+                                             'C1': 'Normal',
+                                             'D0': 'Normal',
+                                             'D1': 'Normal',
+                                             'E0': 'Normal',
+                                             'E1': 'Normal',
+                                             'F0': 'Normal',
+                                             'F1': 'Normal'},
+                     'param_descriptions': {'r1': {'mu': -0.25, 'sigma': 0.05},
+                                            'A0': {'mu':-0.62, 'sigma':0.49},
+                                            'A1': {'mu':+1.04, 'sigma':0.55},
+                                            'B0': {'mu':-0.57, 'sigma':0.01},
+                                            'B1': {'mu':-0.52, 'sigma':0.30},
+                                            'C0': {'mu':-0.07, 'sigma':0.12},
+                                            'C1': {'mu':+0.04, 'sigma':0.02},
+                                            'D0': {'mu':+0.03, 'sigma':0.05},
+                                            'D1': {'mu':+0.03, 'sigma':0.07},
+                                            'E0': {'mu':-0.84, 'sigma':0.03},
+                                            'E1': {'mu':-0.55, 'sigma':0.85},
+                                            'F0': {'mu':-0.05, 'sigma':0.10},
+                                            'F1': {'mu':+0.15, 'sigma':0.22}}
+                     }
+    bm['Joylike_r1fixed'] = {'model': Joylike_r1fixed,
+                             'param_dict': {},
+                             'param_distributions': {'A0': 'Normal',
+                                                     'A1': 'Normal',
+                                                     'B0': 'Normal',
+                                                     'B1': 'Normal',
+                                                     'C0': 'Normal',
+                                                     'C1': 'Normal',
+                                                     'D0': 'Normal',
+                                                     'D1': 'Normal',
+                                                     'E0': 'Normal',
+                                                     'E1': 'Normal',
+                                                     'F0': 'Normal',
+                                                     'F1': 'Normal'},
+                             'param_descriptions': {'A0': {'mu':-0.62, 'sigma':0.49},
+                                                    'A1': {'mu':+1.04, 'sigma':0.55},
+                                                    'B0': {'mu':-0.57, 'sigma':0.01},
+                                                    'B1': {'mu':-0.52, 'sigma':0.30},
+                                                    'C0': {'mu':-0.07, 'sigma':0.12},
+                                                    'C1': {'mu':+0.04, 'sigma':0.02},
+                                                    'D0': {'mu':+0.03, 'sigma':0.05},
+                                                    'D1': {'mu':+0.03, 'sigma':0.07},
+                                                    'E0': {'mu':-0.84, 'sigma':0.03},
+                                                    'E1': {'mu':-0.55, 'sigma':0.85},
+                                                    'F0': {'mu':-0.05, 'sigma':0.10},
+                                                    'F1': {'mu':+0.15, 'sigma':0.22}}
+                     }
+    bm['Shuelike_rasymmetric'] = {'model': Shuelike_rasymmetric, 
+                                  'model_number': 3,
+                                  'param_dict': {},
+                                  'param_distributions': {'r0': 'InverseGamma',
+                                                          'r1': 'Normal',
+                                                          'r2': 'Normal',
+                                                          'r3': 'Normal',
+                                                          'r4': 'Normal',
+                                                          'a0': 'InverseGamma',
+                                                          'a1': 'Normal'},
+                                  'param_descriptions': {'r0': {'mu': 50, 'sigma': 10},
+                                                         'r1': {'mu': -0.2, 'sigma': 0.05},
+                                                         'r2': {'mu': -5, 'sigma': 3},
+                                                         'r3': {'mu': 0, 'sigma': 10},
+                                                         'r4': {'mu': 0, 'sigma': 10},
+                                                         'a0': {'mu': 0.75, 'sigma': 0.25},
+                                                         'a1': {'mu': -1.0, 'sigma': 2.0}}
+                                  }
+    
+    bm['Shuelike_rasymmetric_r1fixed'] = {'model': Shuelike_rasymmetric_r1fixed, 
+                                          'model_number': 3,
+                                          'param_dict': {},
+                                          'param_distributions': {'r0': 'InverseGamma',
+                                                                  'r2': 'Normal',
+                                                                  'r2_scale': 'Gamma',
+                                                                  'r3': 'Normal',
+                                                                  'r4': 'Normal',
+                                                                  'a0': 'InverseGamma',
+                                                                  'a1': 'Normal'},
+                                          'param_descriptions': {'r0': {'mu': 50, 'sigma': 30},
+                                                                 'r2': {'mu': -5, 'sigma': 3},
+                                                                 'r2_scale': {'mu': 0.1, 'sigma':0.1},
+                                                                 'r3': {'mu': 10, 'sigma': 10},
+                                                                 'r4': {'mu': 10, 'sigma': 10},
+                                                                 'a0': {'mu': 1.0, 'sigma': 0.5},
+                                                                 'a1': {'mu': -1.0, 'sigma': 1.0}}
+                                  }
+    bm['Shuelike_rasymmetric_simple'] = {'model': Shuelike_rasymmetric_simple, 
+                                          'model_number': 3,
+                                          'param_dict': {},
+                                          'param_distributions': {'r0': 'InverseGamma',
+                                                                  'r3': 'Normal',
+                                                                  'r4': 'Normal',
+                                                                  'a0': 'InverseGamma',
+                                                                  'a1': 'Normal'},
+                                          'param_descriptions': {'r0': {'mu': 30, 'sigma': 30},
+                                                                 'r3': {'mu': 10, 'sigma': 10},
+                                                                 'r4': {'mu': 10, 'sigma': 10},
+                                                                 'a0': {'mu': 1.0, 'sigma': 0.5},
+                                                                 'a1': {'mu': -1.0, 'sigma': 1.0}}
+                                  }
+    bm['Shuelike_aasymmetric_r1fixed'] = {'model': Shuelike_aasymmetric_r1fixed, 
+                                          'model_number': 3,
+                                          'param_dict': {},
+                                          'param_distributions': {'r0': 'InverseGamma',
+                                                                  'a0': 'InverseGamma',
+                                                                  'a1': 'Normal',
+                                                                  'a2': 'Beta',
+                                                                  'a3': 'Beta',
+                                                                  'a4': 'Beta'},
+                                          'param_descriptions': {'r0': {'mu': 50, 'sigma': 30},
+                                                                 'a0': {'mu': 1.0, 'sigma': 0.5},
+                                                                 'a1': {'mu': -1.0, 'sigma': 1.0},
+                                                                 'a2': {'alpha': 2.0, 'beta': 5.0},
+                                                                 'a3': {'alpha': 2.0, 'beta': 5.0},
+                                                                 'a4': {'alpha': 2.0, 'beta': 5.0},}
+                                  }
+    
+    
+    
+    
+    
+    bm['ShuelikeAsymmetric'] = {'model': ShuelikeAsymmetric, 
+                                'model_number': 3,
+                                'param_dict': {},
+                                'param_distributions': {'r0': 'Gamma',
+                                                        'r1': 'Normal',
+                                                        'r2': 'Gamma',
+                                                        'r3': 'Gamma',
+                                                        'a0': 'Gamma',
+                                                        'a1': 'Normal'},
+                                'param_descriptions': {'r0': {'mu': 60, 'sigma': 30},
+                                                       'r1': {'mu':-0.25, 'sigma':0.03},
+                                                       'r2': {'mu': 10, 'sigma': 10},
+                                                       'r3': {'mu': 10, 'sigma': 10},
+                                                       'a0': {'mu': 1.0, 'sigma': 0.5},
+                                                       'a1': {'mu': -1.0, 'sigma': 1.0}}
+                                }
+    bm['ShuelikeAsymmetric_r1fixed'] = {'model': ShuelikeAsymmetric_r1fixed, 
+                                              'model_number': 3,
+                                              'param_dict': {},
+                                              'param_distributions': {'r0': 'Gamma',
+                                                                      'r2': 'Gamma',
+                                                                      'r3': 'Gamma',
+                                                                      'a0': 'Gamma',
+                                                                      'a1': 'Normal'},
+                                              'param_descriptions': {'r0': {'mu': 60, 'sigma': 30},
+                                                                     'r2': {'mu': 10, 'sigma': 10},
+                                                                     'r3': {'mu': 10, 'sigma': 10},
+                                                                     'a0': {'mu': 1.0, 'sigma': 0.5},
+                                                                     'a1': {'mu': -1.0, 'sigma': 1.0}}
+                                              }
+    bm['ShuelikeAsymmetric_AsPerturbation'] = {'model': ShuelikeAsymmetric_AsPerturbation, 
+                                               'model_number': 3,
+                                               'param_dict': {},
+                                               'param_distributions': {'r0': 'Gamma',
+                                                                       'r1': 'Normal',
+                                                                       'r2': 'Gamma',
+                                                                       'r3': 'Gamma',
+                                                                       'a0': 'Gamma',
+                                                                       'a1': 'Normal'},
+                                               'param_descriptions': {'r0': {'mu': 60, 'sigma': 30},
+                                                                      'r1': {'mu':-0.25, 'sigma':0.03},
+                                                                      'r2': {'mu': 10, 'sigma': 10},
+                                                                      'r3': {'mu': 10, 'sigma': 10},
+                                                                      'a0': {'mu': 1.0, 'sigma': 0.5},
+                                                                      'a1': {'mu': -1.0, 'sigma': 1.0}}
+                                               }
+    # bm['ShuelikeAsymmetric_AsPerturbation_r1fixed'] = {'model': ShuelikeAsymmetric_AsPerturbation_r1fixed, 
+    #                                                    'model_number': 3,
+    #                                                    'param_dict': {},
+    #                                                    'param_distributions': {'r0': 'Gamma',
+    #                                                                            'r2': 'Gamma',
+    #                                                                            'r3': 'Gamma',
+    #                                                                            'a0': 'Gamma',
+    #                                                                            'a1': 'Normal'},
+    #                                                    'param_descriptions': {'r0': {'mu': 40, 'sigma': 15},
+    #                                                                           'r2': {'mu': 10, 'sigma': 10},
+    #                                                                           'r3': {'mu': 10, 'sigma': 10},
+    #                                                                           'a0': {'mu': 1.0, 'sigma': 0.5},
+    #                                                                           'a1': {'mu': -1.0, 'sigma': 1.0}}
+    #                                                    }
+    bm['ShuelikeAsymmetric_AsPerturbation_2'] = {'model': ShuelikeAsymmetric_AsPerturbation_2, 
+                                                 'model_number': 3,
+                                                 'param_dict': {},
+                                                 'param_distributions': {'r0': 'Gamma',
+                                                                         'r1': 'Normal',
+                                                                         'r2': 'Gamma',
+                                                                         'r3': 'Gamma',
+                                                                         'a0': 'Gamma',
+                                                                         'a1': 'Normal'},
+                                                 'param_descriptions': {'r0': {'mu': 40, 'sigma': 20},
+                                                                        'r1': {'mu': -0.25, 'sigma':0.03},
+                                                                        'r2': {'mu': 10, 'sigma': 10},
+                                                                        'r3': {'mu': 10, 'sigma': 10},
+                                                                        'a0': {'mu': 1.0, 'sigma': 0.5},
+                                                                        'a1': {'mu': 0, 'sigma': 1.0}}
+                                                 }
+    bm['ShuelikeAsymmetric_AsPerturbation_r1fixed_2'] = {'model': ShuelikeAsymmetric_AsPerturbation_r1fixed_2, 
+                                                       'model_number': 3,
+                                                       'param_dict': {},
+                                                       'param_distributions': {'r0': 'Gamma',
+                                                                               'r2': 'Gamma',
+                                                                               'r3': 'Gamma',
+                                                                               'a0': 'Gamma',
+                                                                               'a1': 'Normal'},
+                                                       'param_descriptions': {'r0': {'mu': 30, 'sigma': 10},
+                                                                              'r2': {'mu': 10, 'sigma': 10},
+                                                                              'r3': {'mu': 10, 'sigma': 10},
+                                                                              'a0': {'mu': 1.0, 'sigma': 0.2},
+                                                                              'a1': {'mu': 0, 'sigma': 2.0}}
+                                                       }
+       
+    return bm[model_name]
+          
+# =============================================================================
+# Observation geometry, shared by every evaluation at the same points
+# =============================================================================
+class ObservationGeometry:
+    """
+    The coordinates (t, p, p_dyn) of a set of observations, with the terms
+    of the boundary models which depend only on them (cos(t), sin(p)**2,
+    sign(sin(p)), ...) computed on first use and then kept.
+    
+    Pass one of these as the coordinates of any model function (or of
+    evaluate_Model) in place of [t, p, p_dyn], and repeated evaluations,
+    e.g. for each posterior sample or each NUTS step, only redo the
+    parameter-dependent arithmetic. In a pymc model, the cached terms are
+    constants of the graph. It also unpacks as t, p, p_dyn = geometry.
+    
+    p_dyn may be a tensor (e.g. an observed pymc variable), in which case
+    only the t and p terms are cached. If any coordinate is a pytensor
+    variable, the terms are built with pytensor.tensor, available to the
+    models as geometry.math; otherwise geometry.math is numpy.
+    """
+    def __init__(self, t, p, p_dyn):
+        self.t, self.p, self.p_dyn = [self._as_Coordinate(coord) for coord in (t, p, p_dyn)]
+        self._pressure_terms = {}
+        
+        self.math = np
+        if any(type(coord).__module__.startswith('pytensor') for coord in self):
+            import pytensor.tensor as pt
+            self.math = pt
+    
+    @staticmethod
+    def _as_Coordinate(coord):
+        # Leave arrays, Series, tensors, and dual numbers as they are
+        if isinstance(coord, (list, tuple, int, float)):
+            return np.asarray(coord, dtype='float64')
+        return coord
+    
+    def __iter__(self):
+        return iter((self.t, self.p, self.p_dyn))
+    
+    def __len__(self):
+        return 3
+    
+    @property
+    def ndim(self):
+        return max(getattr(coord, 'ndim', 0) for coord in self)
+    
+    # Terms in t
+    @functools.cached_property
+    def cos_t(self):
+        return self.math.cos(self.t)
+    
+    @functools.cached_property
+    def sin_t(self):
+        return self.math.sin(self.t)
+    
+    @functools.cached_property
+    def sin_half_t(self):
+        return self.math.sin(self.t/2)
+    
+    @functools.cached_property
+    def sin2_half_t(self):
+        return self.sin_half_t**2
+    
+    @functools.cached_property
+    def flare_base(self):
+        # The base of the flaring term, 2/(1 + cos(t))
+        return 2/(1 + self.cos_t)
+    
+    @functools.cached_property
+    def log_flare_base(self):
+        return self.math.log(self.flare_base)
+    
+    # Terms in p
+    @functools.cached_property
+    def sin_p(self):
+        return self.math.sin(self.p)
+    
+    @functools.cached_property
+    def sin2_p(self):
+        return self.sin_p**2
+    
+    @functools.cached_property
+    def cos2_p(self):
+        return self.math.cos(self.p)**2
+    
+    @functools.cached_property
+    def sg_pos(self):
+        # 1 on the dawn side (sin(p) > 0), else 0
+        return (self.math.sign(self.sin_p) + 1)/2
+    
+    @functools.cached_property
+    def sg_neg(self):
+        # -1 on the dusk side (sin(p) < 0), else 0
+        return (self.math.sign(self.sin_p) - 1)/2
+    
+    # Direction cosines, as used by the Joy-like models:
+    #   x = r*u, y = -r*v, z**2 = r**2*w2
+    @functools.cached_property
+    def v(self):
+        return self.sin_t * self.sin_p
+    
+    @functools.cached_property
+    def w2(self):
+        return self.sin_t**2 - self.v**2
+    
+    # Terms in p_dyn
+    @functools.cached_property
+    def log_p_dyn(self):
+        return self.math.log(self.p_dyn)
+    
+    def get_PressureTerm(self, exponent):
+        """
+        Return p_dyn**exponent, cached if the exponent is a literal Python
+        number (as in the r1fixed models). Fitted exponents, even as NumPy
+        scalars, differ between samples, so caching them would keep one
+        array per sample
+        """
+        if type(exponent) not in (int, float):
+            return self.p_dyn**exponent
+        if exponent not in self._pressure_terms:
+            self._pressure_terms[exponent] = self.p_dyn**exponent
+        return self._pressure_terms[exponent]
+
+def _get_Geometry(coordinates):
+    #   No coordinates are given when only asking for the model's variables
+    if isinstance(coordinates, ObservationGeometry) or len(coordinates) == 0:
+        return coordinates
+    return ObservationGeometry(*coordinates)
+
+# =============================================================================
+# Evaluation over many parameter samples
+# =============================================================================
+def _broadcast_Samples(model):
+    """
+    Let a model function accept an (S, k) array of parameter samples, in
+    which case each parameter becomes an (S, 1) column and each coordinate
+    a (1, ...) row, so that the result is broadcast to (S, ...).
+    Any other parameters (lists, 1D arrays, or tensors) are unchanged.
+    The coordinates reach the model as an ObservationGeometry.
+    """
+    @functools.wraps(model)
+    def wrapper(parameters=[], coordinates=[], *args, **kwargs):
+        if isinstance(parameters, np.ndarray) and parameters.ndim == 2:
+            if isinstance(coordinates, ObservationGeometry):
+                #   Keep the cached terms: give the parameters the extra axes instead
+                parameters = list(parameters.T.reshape(parameters.shape[::-1] + (1,)*coordinates.ndim))
+            else:
+                parameters = list(parameters.T[:, :, None])
+                coordinates = [np.asarray(coord)[None, ...] for coord in coordinates]
+        return model(parameters, _get_Geometry(coordinates), *args, **kwargs)
+    return wrapper
+
+def _resolve_Model(model, parameters):
+    """
+    Return the model function and its parameters as a float array, given a
+    model name or function and parameters as an array, dict, or DataFrame
+    """
+    if type(model) is str:
+        model_dict = init(model)
+        model = model_dict['model']
+        if hasattr(parameters, 'keys'):
+            parameters = np.column_stack([np.asarray(parameters[name], dtype='float64')
+                                          for name in model_dict['param_descriptions']])
+    return model, np.asarray(parameters, dtype='float64')
+
+def evaluate_Model(model, parameters, coordinates, max_elements=2**24, **kwargs):
+    """
+    Evaluate a boundary model for many parameter samples at many points
+
+    Parameters
+    ----------
+    model : str or function
+        Name of a model in init(), or the model function itself
+    parameters : arraylike or dict
+        (k,) parameters, or (S, k) parameter samples, in the order of the
+        model's 'param_descriptions'. If model is a name, a dict or
+        DataFrame of samples by parameter name is also accepted.
+    coordinates : arraylike or ObservationGeometry
+        (3, ...) array, or sequence of three broadcastable arrays, of
+        (t, p, p_dyn); or an ObservationGeometry, to reuse its terms
+    max_elements : int, optional
+        Evaluate at most this many (sample, point) pairs at once, to bound
+        the memory used. The default is 2**24.
+    **kwargs
+        Passed to the model, e.g. return_r_ss=True
+
+    Returns
+    -------
+    r : np.ndarray
+        (S, ...) array of the model for each sample at each point, or (...)
+        for a single parameter vector
+
+    """
+    model, parameters = _resolve_Model(model, parameters)
+    if not isinstance(coordinates, ObservationGeometry):
+        coordinates = ObservationGeometry(*np.broadcast_arrays(*[np.asarray(coord, dtype='float64')
+                                                                 for coord in coordinates]))
+    shape = np.broadcast_shapes(*[np.shape(coord) for coord in coordinates])
+    
+    if parameters.ndim == 1:
+        return np.broadcast_to(model(parameters, coordinates, **kwargs), shape).copy()
+    
+    #   The geometry is shared, so each chunk only costs the parameter-dependent terms
+    n_samples, n_points = len(parameters), max(int(np.prod(shape)), 1)
+    chunksize = max(1, max_elements // n_points)
+    
+    r = np.empty((n_samples,) + shape)
+    for start in range(0, n_samples, chunksize):
+        r[start:start+chunksize] = model(parameters[start:start+chunksize], coordinates, **kwargs)
+    
+    return r
+
+class _Dual:
+    """
+    A value and its partial derivatives with respect to some inputs,
+    propagated exactly through arithmetic and the NumPy functions used by
+    the model functions (forward-mode differentiation). The partials are
+    kept in a dict by input index, so each is only as large as the inputs
+    it depends on: e.g. derivatives with respect to a parameter stay (S, 1)
+    until that parameter is combined with a coordinate.
+    """
+    __slots__ = ('value', 'grad')
+    
+    def __init__(self, value, grad):
+        self.value = value
+        self.grad = grad
+    
+    #   Derivatives of one-argument functions, given (x, f(x))
+    _unary = {np.negative: lambda x, f: -1,
+              np.positive: lambda x, f: 1,
+              np.cos: lambda x, f: -np.sin(x),
+              np.sin: lambda x, f: np.cos(x),
+              np.tan: lambda x, f: 1 + f**2,
+              np.tanh: lambda x, f: 1 - f**2,
+              np.exp: lambda x, f: f,
+              np.log: lambda x, f: 1/x,
+              np.log10: lambda x, f: 1/(x*np.log(10)),
+              np.sqrt: lambda x, f: 0.5/f,
+              np.square: lambda x, f: 2*x,
+              np.absolute: lambda x, f: np.sign(x),
+              np.sign: lambda x, f: 0}
+    
+    @staticmethod
+    def _combine(a, da, b, db):
+        #   Partials of da * a + db * b, for dicts of partials da, db
+        grad = {i: a * d for i, d in da.items()}
+        for i, d in db.items():
+            grad[i] = grad[i] + b * d if i in grad else b * d
+        return grad
+    
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method != '__call__' or kwargs:
+            return NotImplemented
+        values = [x.value if isinstance(x, _Dual) else x for x in inputs]
+        grads = [x.grad if isinstance(x, _Dual) else {} for x in inputs]
+        f = ufunc(*values)
+        
+        if ufunc in self._unary:
+            (x,), (dx,) = values, grads
+            if ufunc is np.sign:
+                return _Dual(f, {})
+            return _Dual(f, self._combine(self._unary[ufunc](x, f), dx, 0, {}))
+        
+        (x, y), (dx, dy) = values, grads
+        if ufunc is np.add:
+            grad = self._combine(1, dx, 1, dy)
+        elif ufunc is np.subtract:
+            grad = self._combine(1, dx, -1, dy)
+        elif ufunc is np.multiply:
+            grad = self._combine(y, dx, x, dy)
+        elif ufunc is np.true_divide:
+            grad = self._combine(1/y, dx, -f/y, dy)
+        elif ufunc is np.power:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                grad = self._combine(y * x**(y - 1) if dx else 0, dx,
+                                     f * np.log(x) if dy else 0, dy)
+        else:
+            return NotImplemented
+        return _Dual(f, grad)
+    
+    __add__ = lambda self, other: np.add(self, other)
+    __radd__ = lambda self, other: np.add(other, self)
+    __sub__ = lambda self, other: np.subtract(self, other)
+    __rsub__ = lambda self, other: np.subtract(other, self)
+    __mul__ = lambda self, other: np.multiply(self, other)
+    __rmul__ = lambda self, other: np.multiply(other, self)
+    __truediv__ = lambda self, other: np.true_divide(self, other)
+    __rtruediv__ = lambda self, other: np.true_divide(other, self)
+    __pow__ = lambda self, other: np.power(self, other)
+    __rpow__ = lambda self, other: np.power(other, self)
+    __neg__ = lambda self: np.negative(self)
+    __pos__ = lambda self: self
+
+def evaluate_ModelGradient(model, parameters, coordinates, max_elements=2**22, **kwargs):
+    """
+    Evaluate a boundary model and its exact derivatives with respect to
+    the coordinates and each parameter, in one pass
+
+    The model function is run on dual numbers, which carry the gradient
+    alongside each value, so the derivatives are exact (to rounding) and
+    cost one evaluation, rather than the k + 4 of finite differences.
+
+    Parameters
+    ----------
+    model : str or function
+        Name of a model in init(), or the model function itself
+    parameters : arraylike or dict
+        (k,) parameters, or (S, k) parameter samples, as in evaluate_Model
+    coordinates : arraylike
+        (3, ...) array, or sequence of three broadcastable arrays, of
+        (t, p, p_dyn)
+    max_elements : int, optional
+        Evaluate at most this many (sample, point) pairs at once, to bound
+        the memory used. The default is 2**22.
+    **kwargs
+        Passed to the model, e.g. return_r_ss=True
+
+    Returns
+    -------
+    r : np.ndarray
+        (...) or (S, ...) array of the model, as evaluate_Model
+    gradient : np.ndarray
+        (..., 3 + k) or (S, ..., 3 + k) array of the derivatives of r with
+        respect to (t, p, p_dyn) and then each parameter, in order
+
+    """
+    model, parameters = _resolve_Model(model, parameters)
+    coordinates = np.broadcast_arrays(*[np.asarray(coord, dtype='float64') for coord in coordinates])
+    shape = coordinates[0].shape
+    
+    single = parameters.ndim == 1
+    parameters = np.atleast_2d(parameters)
+    coordinates = [coord.ravel() for coord in coordinates]
+    n_samples, n_params = parameters.shape
+    n_points = max(coordinates[0].size, 1)
+    n_grad = 3 + n_params
+    
+    #   Seed the gradients: each input has a unit derivative with respect to itself
+    coordinates = ObservationGeometry(*[_Dual(coord[None, :], {i: 1.}) for i, coord in enumerate(coordinates)])
+    
+    chunksize = max(1, max_elements // n_points)
+    r = np.empty((n_samples, n_points))
+    gradient = np.empty((n_samples, n_points, n_grad))
+    for start in range(0, n_samples, chunksize):
+        chunk = parameters[start:start+chunksize]
+        duals = [_Dual(chunk[:, i:i+1], {3 + i: 1.}) for i in range(n_params)]
+        result = model(duals, coordinates, **kwargs)
+        r[start:start+chunksize] = result.value
+        for i in range(n_grad):
+            gradient[start:start+chunksize, :, i] = result.grad.get(i, 0)
+    
+    r, gradient = r.reshape((n_samples,) + shape), gradient.reshape((n_samples,) + shape + (n_grad,))
+    if single:
+        return r[0], gradient[0]
+    return r, gradient
+
+def evaluate_ModelDerivative(model, parameters, coordinates, wrt='p_dyn', **kwargs):
+    """
+    Evaluate a boundary model and its exact derivative with respect to one
+    coordinate, as a direct call to the model: each parameter and
+    coordinate is broadcast against the others, element by element
+
+    This is the cheap special case of evaluate_ModelGradient for solvers,
+    which only need one partial derivative at a time.
+
+    Parameters
+    ----------
+    model : str or function
+        Name of a model in init(), or the model function itself
+    parameters : sequence
+        The model parameters, each a scalar or an array broadcastable with
+        the coordinates
+    coordinates : sequence
+        Three broadcastable arrays of (t, p, p_dyn)
+    wrt : str, optional
+        The coordinate to differentiate with respect to: 't', 'p', or
+        'p_dyn'. The default is 'p_dyn'.
+    **kwargs
+        Passed to the model, e.g. return_r_ss=True
+
+    Returns
+    -------
+    r : np.ndarray
+        The model at each element
+    drdv : np.ndarray
+        The derivative of r with respect to the coordinate 'wrt'
+
+    """
+    if type(model) is str:
+        model = init(model)['model']
+    i = ['t', 'p', 'p_dyn'].index(wrt)
+    
+    coordinates = [np.asarray(coord, dtype='float64') for coord in coordinates]
+    coordinates[i] = _Dual(coordinates[i], {0: 1.})
+    
+    result = model(parameters, coordinates, **kwargs)
+    r = np.asarray(result.value)
+    drdv = np.broadcast_to(result.grad.get(0, 0.), r.shape)
+    
+    return r, drdv
+
+# =============================================================================
+# Section 1.5: 3D Functional Forms for the boundaries
+# =============================================================================
+# def Shuelike_Static(parameters=[], coordinates=[], variables=False):
+#     """
+#     r = r_0 (2/(1 + cos(theta)))^alpha
+
+#     Parameters
+#     ----------
+#     parameters : TYPE
+#         DESCRIPTION.
+#     coordinates : TYPE
+#         DESCRIPTION.
+
+#     Returns
+#     -------
+#     r : TYPE
+#         DESCRIPTION.
+
+#     """
+#     if variables:
+#         return ('t'), 'r'
+    
+#     t = coordinates
+#     r0, a0 = parameters
+
+    
+#     r = r0 * (2/(1 + np.cos(t)))**a0
+
+#     return r
+# =============================================================================
+# Section 2: 4D Functional forms for the boundaries
+# =============================================================================
+
+@_broadcast_Samples
+def Shuelike(parameters=[], coordinates=[], variables=False,
+             return_r_ss:bool=False, return_a_f:bool=False):
+    """
+    r = r_0 (2/(1 + cos(theta)))^alpha
+
+    Parameters
+    ----------
+    parameters : TYPE
+        DESCRIPTION.
+    coordinates : TYPE
+        DESCRIPTION.
+
+    Returns
+    -------
+    r : TYPE
+        DESCRIPTION.
+
+    """
+    # Optionally, return variables
+    if variables:
+        return ('t', 'p', 'p_dyn'), 'r'
+    
+    # Unpack coordinates
+    g = coordinates
+    p_dyn = g.p_dyn
+    r0, r1, a0, a1 = parameters
+    
+    # Calculate r_b & a_f, returning one if requested
+    r_ss = r0*g.get_PressureTerm(r1)
+    a_f = a0 + a1 * p_dyn
+    
+    if return_r_ss:
+        return r_ss
+    if return_a_f:
+        return a_f
+    
+    # Calculate r
+    r = r_ss * g.flare_base**a_f
+    
+    return r
+
+    # # Attempt to handle multiple parameters simultaneously-- pymc didn't like it :(
+    # # Optionally, return variables
+    # if variables:
+    #     return ('t', 'p', 'p_dyn'), 'r'
+    
+    # # Unpack coordinates
+    # t, p, p_dyn = coordinates
+    
+    # # Unpack parameters, checking that they are iterable
+    # if len(np.shape(parameters)) == 1:
+    #     parameters = [[p] for p in parameters]
+    # r0arr, r1arr, a0arr, a1arr = parameters
+    
+    # r_arr, r_b_arr, a_f_arr = [], [], []
+    # for r0, r1, a0, a1 in zip(r0arr, r1arr, a0arr, a1arr):
+    #     # Calculate r_b & a_f, returning one if requested
+    #     r_b_arr.append(r0*((p_dyn)**(r1)))
+    #     a_f_arr.append(a0 + a1 * p_dyn)
+        
+    #     # Calculate r
+    #     r_arr.append(r_b_arr[-1] * (2/(1 + np.cos(t)))**a_f_arr[-1])
+        
+    
+    # if return_r_b:
+    #     return np.squeeze(np.array(r_b_arr))
+    # if return_a_f:
+    #     return np.squeeze(np.array(a_f_arr))
+    # return np.squeeze(np.array(r_arr))
+
+@_broadcast_Samples
+def Shuelike_log(parameters=[], coordinates=[], variables=False,
+             return_r_ss:bool=False, return_a_f:bool=False):
+    """
+    r = r_0 (2/(1 + cos(theta)))^alpha
+
+    Parameters
+    ----------
+    parameters : TYPE
+        DESCRIPTION.
+    coordinates : TYPE
+        DESCRIPTION.
+
+    Returns
+    -------
+    r : TYPE
+        DESCRIPTION.
+
+    """
+    # Optionally, return variables
+    if variables:
+        return ('t', 'p', 'log_p_dyn'), 'log_r'
+    
+    # Unpack coordinates
+    g = coordinates
+    log_p_dyn = g.p_dyn
+    log_r0, r1, a0, a1 = parameters
+    
+    # Calculate r_b & a_f, returning one if requested
+    p_dyn = g.math.exp(log_p_dyn)
+    r0 = g.math.exp(log_r0)
+    
+    r_ss = r0*((p_dyn)**(r1))
+    a_f = a0 + a1 * p_dyn
+    
+    if return_r_ss:
+        return r_ss
+    if return_a_f:
+        return a_f
+    
+    # Calculate r
+    r = r_ss * g.flare_base**a_f
+    log_r = g.math.log(r)
+    
+    return log_r
+
+
+@_broadcast_Samples
+def Shuelike_r1fixed(parameters=[], coordinates=[], variables=False,
+             return_r_b:bool=False, return_a_f:bool=False):
+    """
+    r = r_0 (2/(1 + cos(theta)))^alpha
+
+    Parameters
+    ----------
+    parameters : TYPE
+        DESCRIPTION.
+    coordinates : TYPE
+        DESCRIPTION.
+
+    Returns
+    -------
+    r : TYPE
+        DESCRIPTION.
+
+    """
+    # Optionally, return variables
+    if variables:
+        return ('t', 'p', 'p_dyn'), 'r'
+    
+    # Unpack coordinates
+    g = coordinates
+    p_dyn = g.p_dyn
+    r0, a0, a1 = parameters
+    r1 = -2.5
+    
+    # Calculate r_b & a_f, returning one if requested
+    r_b = r0*g.get_PressureTerm(r1/10)
+    a_f = a0 + a1 * p_dyn
+    
+    if return_r_b:
+        return r_b
+    if return_a_f:
+        return a_f
+    
+    # Calculate r
+    r = r_b * g.flare_base**a_f
+    
+    return r
+
+@_broadcast_Samples
+def Shuelike_rasymmetric(parameters=[], coordinates=[], variables=False,
+                         return_r_ss:bool=False, return_a_f:bool=False):
+    """
+    
+
+    Parameters
+    ----------
+    parameters : TYPE
+        DESCRIPTION.
+    coordinates : TYPE
+        DESCRIPTION.
+
+    Returns
+    -------
+    r : TYPE
+        DESCRIPTION.
+
+    """
+    if variables:
+        return ('t', 'p', 'p_dyn'), 'r'
+    
+    g = coordinates
+    p_dyn = g.p_dyn
+    r0, r1, r2, r3, r4, a0, a1 = parameters
+    
+    sg_pos, sg_neg = g.sg_pos, g.sg_neg
+    
+    r2_term = r2*g.cos2_p
+    r3_term = r3*sg_pos*g.sin2_p
+    r4_term = r4*sg_neg*g.sin2_p
+    r_ss = (r0 + g.sin2_half_t*(r2_term + r3_term + r4_term)) * g.get_PressureTerm(r1)
+    
+    a_f =  (a0 + a1 * p_dyn)
+    
+    if return_r_ss:
+        return r_ss
+    if return_a_f:
+        return a_f
+    
+    # Calculate r
+    r = r_ss * g.flare_base**a_f
+        
+    return r
+
+@_broadcast_Samples
+def Shuelike_rasymmetric_r1fixed(parameters=[], coordinates=[], variables=False,
+                                 return_r_ss:bool=False, return_a_f:bool=False):
+    """
+    
+
+    Parameters
+    ----------
+    parameters : TYPE
+        DESCRIPTION.
+    coordinates : TYPE
+        DESCRIPTION.
+
+    Returns
+    -------
+    r : TYPE
+        DESCRIPTION.
+
+    """
+    if variables:
+        return ('t', 'p', 'p_dyn'), 'r'
+    
+    g = coordinates
+    p_dyn = g.p_dyn
+    r0, r2, r2_scale, r3, r4, a0, a1 = parameters
+    r1 = -0.25
+    
+    sg_pos, sg_neg = g.sg_pos, g.sg_neg
+    
+    r2_term = r2*g.cos2_p * (r2_scale) + (1 - r2_scale)
+    r3_term = r3*sg_pos*g.sin_p
+    r4_term = r4*sg_neg*g.sin_p
+    r_ss = r0 * g.get_PressureTerm(r1) 
+    r_perturb = g.sin_half_t * (r2_term + r3_term + r4_term) * g.get_PressureTerm(r1) 
+    
+    a_f =  (a0 + a1 * p_dyn)
+    
+    if return_r_ss:
+        return r_ss
+    if return_a_f:
+        return a_f
+    
+    # Calculate r
+    r = r_ss * g.flare_base**a_f + r_perturb
+
+    return r
+
+@_broadcast_Samples
+def Shuelike_rasymmetric_simple(parameters=[], coordinates=[], variables=False,
+                                return_r_ss:bool=False, return_a_f:bool=False):
+    """
+    
+
+    Parameters
+    ----------
+    parameters : TYPE
+        DESCRIPTION.
+    coordinates : TYPE
+        DESCRIPTION.
+
+    Returns
+    -------
+    r : TYPE
+        DESCRIPTION.
+
+    """
+    if variables:
+        return ('t', 'p', 'p_dyn'), 'r'
+    
+    g = coordinates
+    p_dyn = g.p_dyn
+    r0, r3, r4, a0, a1 = parameters
+    r1 = -0.25
+    
+    sg_pos, sg_neg = g.sg_pos, g.sg_neg
+    
+    # r2_term = r2*np.cos(p)**2 * (r2_scale) + (1 - r2_scale)
+    r3_term = r3*sg_pos*g.sin_p
+    r4_term = r4*sg_neg*g.sin_p
+    r_ss = r0 * g.get_PressureTerm(r1) 
+    r_perturb = g.sin2_half_t * (r3_term + r4_term) * g.get_PressureTerm(r1) 
+    
+    a_f =  (a0 + a1 * p_dyn)
+    
+    if return_r_ss:
+        return r_ss
+    if return_a_f:
+        return a_f
+    
+    # Calculate r
+    r = r_ss * g.flare_base**a_f + r_perturb
+
+    return r
+
+@_broadcast_Samples
+def ShuelikeAsymmetric(parameters=[], coordinates=[], variables=False,
+                       return_r_ss:bool=False, return_a_f:bool=False):
+    """
+    
+
+    Parameters
+    ----------
+    parameters : TYPE
+        DESCRIPTION.
+    coordinates : TYPE
+        DESCRIPTION.
+
+    Returns
+    -------
+    r : TYPE
+        DESCRIPTION.
+
+    """
+    if variables:
+        return ('t', 'p', 'p_dyn'), 'r'
+    
+    g = coordinates
+    p_dyn = g.p_dyn
+    r0, r1, r2, r3, a0, a1 = parameters
+    
+    sg_pos, sg_neg = g.sg_pos, g.sg_neg
+    
+    # r2_term = r2*np.cos(p)**2 * (r2_scale) + (1 - r2_scale)
+    r2_term = r2*sg_pos*g.sin_p
+    r3_term = r3*sg_neg*g.sin_p
+    r_ss = r0 * g.get_PressureTerm(r1) + g.sin2_half_t * (r2_term + r3_term) * g.get_PressureTerm(r1) 
+    
+    a_f =  (a0 + a1 * p_dyn)
+    
+    if return_r_ss:
+        return r_ss
+    if return_a_f:
+        return a_f
+    
+    # Calculate r
+    r = r_ss * g.flare_base**a_f
+
+    return r
+
+@_broadcast_Samples
+def ShuelikeAsymmetric_r1fixed(parameters=[], coordinates=[], variables=False,
+                       return_r_ss:bool=False, return_a_f:bool=False):
+    """
+    
+
+    Parameters
+    ----------
+    parameters : TYPE
+        DESCRIPTION.
+    coordinates : TYPE
+        DESCRIPTION.
+
+    Returns
+    -------
+    r : TYPE
+        DESCRIPTION.
+
+    """
+    if variables:
+        return ('t', 'p', 'p_dyn'), 'r'
+    
+    g = coordinates
+    p_dyn = g.p_dyn
+    r0, r2, r3, a0, a1 = parameters
+    r1 = -0.25
+    
+    sg_pos, sg_neg = g.sg_pos, g.sg_neg
+    
+    # r2_term = r2*np.cos(p)**2 * (r2_scale) + (1 - r2_scale)
+    r2_term = r2*sg_pos*g.sin_p
+    r3_term = r3*sg_neg*g.sin_p
+    r_ss = r0 * g.get_PressureTerm(r1) + g.sin2_half_t * (r2_term + r3_term) * g.get_PressureTerm(r1) 
+    
+    a_f =  (a0 + a1 * p_dyn)
+    
+    if return_r_ss:
+        return r_ss
+    if return_a_f:
+        return a_f
+    
+    # Calculate r
+    r = r_ss * g.flare_base**a_f
+
+    return r
+
+@_broadcast_Samples
+def ShuelikeAsymmetric_AsPerturbation(parameters=[], coordinates=[], variables=False,
+                                      return_r_ss:bool=False, return_a_f:bool=False):
+    """
+    
+
+    Parameters
+    ----------
+    parameters : TYPE
+        DESCRIPTION.
+    coordinates : TYPE
+        DESCRIPTION.
+
+    Returns
+    -------
+    r : TYPE
+        DESCRIPTION.
+
+    """
+    if variables:
+        return ('t', 'p', 'p_dyn'), 'r'
+    
+    g = coordinates
+    p_dyn = g.p_dyn
+    r0, r1, r2, r3, a0, a1 = parameters
+    
+    sg_pos, sg_neg = g.sg_pos, g.sg_neg
+    
+    # r2_term = r2*np.cos(p)**2 * (r2_scale) + (1 - r2_scale)
+    r2_term = r2*sg_pos*g.sin_p
+    r3_term = r3*sg_neg*g.sin_p
+    r_ss = r0 * g.get_PressureTerm(r1) 
+    r_perturb = g.sin2_half_t * (r2_term + r3_term) * g.get_PressureTerm(r1) 
+    
+    a_f =  (a0 + a1 * p_dyn)
+    
+    if return_r_ss:
+        return r_ss
+    if return_a_f:
+        return a_f
+    
+    # Calculate r
+    r = r_ss * g.flare_base**a_f + r_perturb
+
+    return r
+
+@_broadcast_Samples
+def ShuelikeAsymmetric_AsPerturbation_r1fixed(parameters=[], coordinates=[], variables=False,
+                                      return_r_ss:bool=False, return_a_f:bool=False):
+    """
+    
+
+    Parameters
+    ----------
+    parameters : TYPE
+        DESCRIPTION.
+    coordinates : TYPE
+        DESCRIPTION.
+
+    Returns
+    -------
+    r : TYPE
+        DESCRIPTION.
+
+    """
+    if variables:
+        return ('t', 'p', 'p_dyn'), 'r'
+    
+    g = coordinates
+    p_dyn = g.p_dyn
+    r0, r2, r3, a0, a1 = parameters
+    r1 = -0.25
+    
+    sg_pos, sg_neg = g.sg_pos, g.sg_neg
+    
+    # r2_term = r2*np.cos(p)**2 * (r2_scale) + (1 - r2_scale)
+    r2_term = r2*sg_pos*g.sin_p
+    r3_term = r3*sg_neg*g.sin_p
+    r_ss = r0 * g.get_PressureTerm(r1) 
+    r_perturb = g.sin2_half_t * (r2_term + r3_term) * g.get_PressureTerm(r1) 
+    
+    a_f =  (a0 + a1 * p_dyn)
+    
+    if return_r_ss:
+        return r_ss
+    if return_a_f:
+        return a_f
+    
+    # Calculate r
+    r = r_ss * g.flare_base**a_f + r_perturb
+
+    return r
+
+@_broadcast_Samples
+def ShuelikeAsymmetric_AsPerturbation_2(parameters=[], coordinates=[], variables=False,
+                                        return_r_ss:bool=False, return_a_f:bool=False):
+    """
+    
+
+    Parameters
+    ----------
+    parameters : TYPE
+        DESCRIPTION.
+    coordinates : TYPE
+        DESCRIPTION.
+
+    Returns
+    -------
+    r : TYPE
+        DESCRIPTION.
+
+    """
+    if variables:
+        return ('t', 'p', 'p_dyn'), 'r'
+    
+    g = coordinates
+    p_dyn = g.p_dyn
+    r0, r1, r2, r3, a0, a1 = parameters
+    
+    sg_pos, sg_neg = g.sg_pos, -g.sg_neg
+    
+    # r2_term = r2*np.cos(p)**2 * (r2_scale) + (1 - r2_scale)
+    r2_term = r2*sg_pos * g.sin2_p
+    r3_term = r3*sg_neg * g.sin2_p
+    r_ss = r0 * g.get_PressureTerm(r1) 
+    r_perturb = g.sin2_half_t * (r2_term + r3_term) * g.get_PressureTerm(r1) 
+    
+    a_f =  (a0 + a1 * p_dyn)
+    
+    if return_r_ss:
+        return r_ss
+    if return_a_f:
+        return a_f
+    
+    # Calculate r
+    r = r_ss * g.flare_base**a_f + r_perturb
+
+    return r
+
+
+@_broadcast_Samples
+def ShuelikeAsymmetric_AsPerturbation_r1fixed_2(parameters=[], coordinates=[], variables=False,
+                                      return_r_ss:bool=False, return_a_f:bool=False):
+    """
+    
+
+    Parameters
+    ----------
+    parameters : TYPE
+        DESCRIPTION.
+    coordinates : TYPE
+        DESCRIPTION.
+
+    Returns
+    -------
+    r : TYPE
+        DESCRIPTION.
+
+    """
+    if variables:
+        return ('t', 'p', 'p_dyn'), 'r'
+    
+    g = coordinates
+    p_dyn = g.p_dyn
+    r0, r2, r3, a0, a1 = parameters
+    r1 = -0.25
+    
+    sg_pos, sg_neg = g.sg_pos, -g.sg_neg
+    
+    # r2_term = r2*np.cos(p)**2 * (r2_scale) + (1 - r2_scale)
+    r2_term = r2*sg_pos * g.sin2_p
+    r3_term = r3*sg_neg * g.sin2_p
+    r_ss = r0 * g.get_PressureTerm(r1) 
+    r_perturb = g.sin2_half_t * (r2_term + r3_term) * g.get_PressureTerm(r1) 
+    
+    a_f =  (a0 + a1 * p_dyn)
+    
+    if return_r_ss:
+        return r_ss
+    if return_a_f:
+        return a_f
+    
+    # Calculate r
+    r = r_ss * g.flare_base**a_f + r_perturb
+
+    return r
+
+
+@_broadcast_Samples
+def Shuelike_aasymmetric_r1fixed(parameters=[], coordinates=[], variables=False,
+                                 return_r_ss:bool=False, return_a_f:bool=False):
+    """
+    
+
+    Parameters
+    ----------
+    parameters : TYPE
+        DESCRIPTION.
+    coordinates : TYPE
+        DESCRIPTION.
+
+    Returns
+    -------
+    r : TYPE
+        DESCRIPTION.
+
+    """
+    if variables:
+        return ('t', 'p', 'p_dyn'), 'r'
+    
+    g = coordinates
+    p_dyn = g.p_dyn
+    r0, a0, a1, a2, a3, a4 = parameters
+    r1 = -0.25
+    
+    sg_pos, sg_neg = g.sg_pos, g.sg_neg
+    
+    r_ss = r0 * g.get_PressureTerm(r1) 
+    
+    a2_term = 1 - (a2 * g.cos2_p)
+    a3_term = 1 - (sg_pos * a3 * g.sin2_p)
+    a4_term = 1 - (sg_neg * a4 * g.sin2_p)
+    a_f =  (a0 + a1 * p_dyn) * a2_term * a3_term * a4_term
+    
+    if return_r_ss:
+        return r_ss
+    if return_a_f:
+        return a_f
+    
+    # Calculate r
+    r = r_ss * g.flare_base**a_f
+
+    return r
+
+@_broadcast_Samples
+def Joylike(parameters=[], coordinates=[], variables=False):
+    """
+    
+
+    Parameters
+    ----------
+    parameters : TYPE
+        DESCRIPTION.
+    coordinates : TYPE
+        DESCRIPTION.
+
+    Returns
+    -------
+    z : TYPE
+        DESCRIPTION.
+
+    """
+    if variables:
+        return ('t', 'p', 'p_dyn'), 'r'
+    
+    g = coordinates
+    p_dyn = g.p_dyn
+    r1, a0, a1, b0, b1, c0, c1, d0, d1, e0, e1, f0, f1 = parameters
+    
+    # x = x * 1/120
+    # y = y * 1/120
+    
+    a = a0 + a1*g.get_PressureTerm(r1)
+    b = b0 + b1*g.get_PressureTerm(r1)
+    c = c0 + c1*g.get_PressureTerm(r1)
+    d = d0 + d1*p_dyn
+    e = e0 + e1*p_dyn
+    f = f0 + f1*p_dyn
+    
+    # Direction cosines, computed once: x = r*u, y = -r*v, z**2 = r**2*w2
+    u, v, w2 = g.cos_t, g.v, g.w2
+    
+    A = c*u**2 + e*v**2 - f*u*v - w2
+    B = b*u - d*v
+    C = a
+    
+    r = (-B - g.math.sqrt(B**2 - 4*A*C)) / (2*A)
+    
+    
+    return r * 120
+
+
+@_broadcast_Samples
+def Joylike_r1fixed(parameters=[], coordinates=[], variables=False):
+    """
+    
+
+    Parameters
+    ----------
+    parameters : TYPE
+        DESCRIPTION.
+    coordinates : TYPE
+        DESCRIPTION.
+
+    Returns
+    -------
+    z : TYPE
+        DESCRIPTION.
+
+    """
+    if variables:
+        return ('t', 'p', 'p_dyn'), 'r'
+    
+    g = coordinates
+    p_dyn = g.p_dyn
+    a0, a1, b0, b1, c0, c1, d0, d1, e0, e1, f0, f1 = parameters
+    r1 = -1/4
+    
+    # x = x * 1/120
+    # y = y * 1/120
+    
+    a = a0 + a1*g.get_PressureTerm(r1)
+    b = b0 + b1*g.get_PressureTerm(r1)
+    c = c0 + c1*g.get_PressureTerm(r1)
+    d = d0 + d1*p_dyn
+    e = e0 + e1*p_dyn
+    f = f0 + f1*p_dyn
+    
+    # Direction cosines, computed once: x = r*u, y = -r*v, z**2 = r**2*w2
+    u, v, w2 = g.cos_t, g.v, g.w2
+    
+    A = c*u**2 + e*v**2 - f*u*v - w2
+    B = b*u - d*v
+    C = a
+    
+    r = (-B - g.math.sqrt(B**2 - 4*A*C)) / (2*A)
+    
+    
+    return r * 120
+
+
+def boundary_Winslowlike():
+    
+    return
+
+def boundary_Caternary():
+    
+    return
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Long-lived local server for boundary queries.
+
+Keeps find_Boundary (and any posterior samples) loaded in memory, and
+answers JSON requests over HTTP on localhost:
+    POST /boundary : solve for one coordinate, as find_Boundaries
+                     {"boundary": "MP", "x": true, "y": [0, 10], "z": 0,
+                      "p_sw": 0.07, "guess": 60}
+    POST /inside   : inside-probabilities, as find_InsideProbability
+                     {"boundary": ["MP", "BS"], "x": [...], "y": [...],
+                      "z": [...], "p_sw": [...]}
+    GET  /stats    : request counts, batch sizes, and latency histograms
+
+Concurrent requests which share the same settings are gathered into
+micro-batches (for up to --window seconds) and evaluated in one vectorized
+call, so many small requests cost about the same as one large one.
+
+Example:
+    python BoundaryServer.py --port 8765 --posterior MP=MP_posterior.pkl
+
+@author: mrutala
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import find_Boundary as fB
+
+# Upper edges of the latency histogram buckets [ms]; the last is open
+_latency_buckets = [0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, np.inf]
+
+class ServerStats:
+    """
+    Thread-safe request counts and latency histograms, per endpoint
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start_time = time.time()
+        self.endpoints = {}
+
+    def _get_Endpoint(self, endpoint):
+        if endpoint not in self.endpoints:
+            self.endpoints[endpoint] = {'requests': 0, 'errors': 0, 'points': 0,
+                                        'batches': 0, 'batched_requests': 0,
+                                        'latency_ms': [0] * len(_latency_buckets)}
+        return self.endpoints[endpoint]
+
+    def record_Request(self, endpoint, latency, n_points=0, error=False):
+        with self.lock:
+            stats = self._get_Endpoint(endpoint)
+            stats['requests'] += 1
+            stats['points'] += n_points
+            stats['errors'] += int(error)
+            i = np.searchsorted(_latency_buckets, latency * 1e3)
+            stats['latency_ms'][i] += 1
+
+    def record_Batch(self, endpoint, n_requests):
+        with self.lock:
+            stats = self._get_Endpoint(endpoint)
+            stats['batches'] += 1
+            stats['batched_requests'] += n_requests
+
+    def to_dict(self):
+        with self.lock:
+            buckets = ['<={:g}'.format(edge) if np.isfinite(edge) else '>{:g}'.format(_latency_buckets[-2])
+                       for edge in _latency_buckets]
+            endpoints = {}
+            for endpoint, stats in self.endpoints.items():
+                endpoints[endpoint] = dict(stats)
+                endpoints[endpoint]['latency_ms'] = dict(zip(buckets, stats['latency_ms']))
+                endpoints[endpoint]['mean_batch_size'] = (stats['batched_requests'] / stats['batches']
+                                                         if stats['batches'] > 0 else 0)
+            return {'uptime_s': time.time() - self.start_time, 'endpoints': endpoints}
+
+class PendingRequest:
+    """
+    One request waiting in a micro-batch queue
+    """
+    def __init__(self, key, arrays):
+        self.key = key
+        self.arrays = arrays
+        self.n_points = len(next(iter(arrays.values())))
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class MicroBatcher:
+    """
+    Gathers requests for up to 'window' seconds (or 'max_points' points),
+    then evaluates each group of requests with the same key in one call to
+    'evaluate(key, arrays)', which must return a list of per-point outputs
+    """
+    def __init__(self, name, evaluate, stats, window=0.002, max_points=100000):
+        self.name = name
+        self.evaluate = evaluate
+        self.stats = stats
+        self.window = window
+        self.max_points = max_points
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, key, arrays):
+        request = PendingRequest(key, arrays)
+        self.queue.put(request)
+        # Check on the batcher now and then, rather than wait forever on a
+        # thread which has died
+        while not request.done.wait(timeout=1.0):
+            if not self.thread.is_alive():
+                raise RuntimeError('The {} batcher has stopped'.format(self.name))
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            n_points = batch[0].n_points
+            deadline = time.time() + self.window
+            while n_points < self.max_points:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                n_points += request.n_points
+
+            # Errors fail only the requests concerned, never this thread
+            groups = {}
+            for request in batch:
+                try:
+                    groups.setdefault(request.key, []).append(request)
+                except Exception as error:
+                    # e.g., an unhashable key
+                    request.error = error
+                    request.done.set()
+            for key, requests in groups.items():
+                try:
+                    self.run_Group(key, requests)
+                except Exception as error:
+                    for request in requests:
+                        if not request.done.is_set():
+                            request.error = error
+                            request.done.set()
+
+    def run_Group(self, key, requests):
+        try:
+            arrays = {name: np.concatenate([r.arrays[name] for r in requests])
+                      for name in requests[0].arrays}
+            outputs = self.evaluate(key, arrays)
+
+            # Split the outputs back into the original requests
+            stops = np.cumsum([r.n_points for r in requests])
+            starts = stops - np.array([r.n_points for r in requests])
+            for request, start, stop in zip(requests, starts, stops):
+                request.result = [output[start:stop] for output in outputs]
+        except Exception as error:
+            for request in requests:
+                request.error = error
+        finally:
+            self.stats.record_Batch(self.name, len(requests))
+            for request in requests:
+                request.done.set()
+
+def _to_JSON(obj):
+    """
+    Convert numpy arrays (with NaNs) to JSON-compatible lists (with nulls)
+    """
+    if isinstance(obj, dict):
+        return {key: _to_JSON(val) for key, val in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_to_JSON(val) for val in obj]
+    if isinstance(obj, np.ndarray):
+        return _to_JSON(obj.tolist())
+    if isinstance(obj, float) and not np.isfinite(obj):
+        return None
+    if isinstance(obj, (np.floating, np.integer, np.bool_)):
+        return _to_JSON(obj.item())
+    return obj
+
+class BoundaryService:
+    """
+    The warm state of the server: posterior samples and micro-batchers
+    """
+    def __init__(self, posteriors=None, n=500, window=0.002, max_points=100000):
+        self.posteriors = posteriors or {}
+        self.n = n
+        self.stats = ServerStats()
+
+        # Load posteriors now, so that no request pays for it
+        for path in self.posteriors.values():
+            fB.load_PosteriorSamples(path)
+
+        self.batchers = {'boundary': MicroBatcher('boundary', self.evaluate_Boundary, self.stats,
+                                                  window, max_points),
+                         'inside': MicroBatcher('inside', self.evaluate_Inside, self.stats,
+                                                window, max_points)}
+
+    @staticmethod
+    def get_BoundaryName(boundary):
+        """
+        Normalize a requested boundary to 'MP' or 'BS', as part of a batch key
+        """
+        boundary = str(boundary).lower()
+        if boundary in ['mp', 'magnetopause']:
+            return 'MP'
+        if boundary in ['bs', 'bow shock', 'bow_shock', 'bowshock']:
+            return 'BS'
+        raise ValueError("Unrecognized boundary '{}'".format(boundary))
+
+    @staticmethod
+    def get_Option(payload, name, default, allowed):
+        """
+        Read a string option from a request, as part of a batch key
+        """
+        value = str(payload.get(name, default)).lower()
+        if value not in allowed:
+            raise ValueError("Unrecognized {} '{}'; use one of {}".format(name, value, allowed))
+        return value
+
+    def get_Posterior(self, boundary):
+        boundary = 'MP' if boundary.lower() in ['mp', 'magnetopause'] else 'BS'
+        return self.posteriors.get(boundary)
+
+    def evaluate_Boundary(self, key, arrays):
+        boundary, unknown, n, sampling = key
+        coords = {name: True if name == unknown else arrays[name] for name in ['x', 'y', 'z', 'p_sw']}
+        result, converged = fB.find_Boundaries(boundary, **coords, guess=arrays['guess'], n=n,
+                                               sampling=sampling, posterior=self.get_Posterior(boundary))
+        return [result, converged]
+
+    def evaluate_Inside(self, key, arrays):
+        boundaries, n, distribution = key
+        posterior = {b: self.get_Posterior(b) for b in boundaries}
+        probabilities = fB.find_InsideProbability(list(boundaries), arrays['x'], arrays['y'],
+                                                  arrays['z'], arrays['p_sw'], n=n,
+                                                  posterior=posterior, distribution=distribution)
+        return [probabilities[b] for b in boundaries]
+
+    def handle_Boundary(self, payload):
+        boundary = self.get_BoundaryName(payload.get('boundary', 'MP'))
+        unknown = [name for name in ['x', 'y', 'z', 'p_sw'] if payload.get(name, False) is True]
+        if len(unknown) != 1:
+            raise ValueError('Exactly one of x, y, z, p_sw must be true')
+        unknown = unknown[0]
+
+        names = [name for name in ['x', 'y', 'z', 'p_sw'] if name != unknown] + ['guess']
+        payload.setdefault('guess', 1)
+        arrays = dict(zip(names, [arr.ravel().astype('float64') for arr in
+                                  np.broadcast_arrays(*[np.atleast_1d(payload[name]) for name in names])]))
+
+        key = (boundary, unknown, int(payload.get('n', self.n)),
+               self.get_Option(payload, 'sampling', 'random', ['random', 'qmc']))
+        result, converged = self.batchers['boundary'].submit(key, arrays)
+        return {'result': result, 'converged': converged}, len(converged)
+
+    def handle_Inside(self, payload):
+        boundary = payload.get('boundary', 'MP')
+        boundaries = [boundary] if type(boundary) is str else list(boundary)
+        boundaries = tuple(self.get_BoundaryName(b) for b in boundaries)
+
+        names = ['x', 'y', 'z', 'p_sw']
+        arrays = dict(zip(names, [arr.ravel().astype('float64') for arr in
+                                  np.broadcast_arrays(*[np.atleast_1d(payload[name]) for name in names])]))
+
+        key = (boundaries, int(payload.get('n', self.n)),
+               self.get_Option(payload, 'distribution', 'normal', ['normal', 'gamma']))
+        probabilities = self.batchers['inside'].submit(key, arrays)
+        return dict(zip(boundaries, probabilities)), len(arrays['x'])
+
+class BoundaryHTTPServer(ThreadingHTTPServer):
+    # Allow many concurrent clients to queue, so that they can be batched
+    request_queue_size = 256
+    daemon_threads = True
+
+def make_Handler(service):
+
+    class BoundaryRequestHandler(BaseHTTPRequestHandler):
+
+        def send_JSON(self, code, obj):
+            body = json.dumps(_to_JSON(obj)).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip('/') == '/stats':
+                self.send_JSON(200, service.stats.to_dict())
+            else:
+                self.send_JSON(404, {'error': 'Unknown path {}'.format(self.path)})
+
+        def do_POST(self):
+            t0 = time.time()
+            endpoint = self.path.strip('/')
+            handlers = {'boundary': service.handle_Boundary, 'inside': service.handle_Inside}
+            if endpoint not in handlers:
+                self.send_JSON(404, {'error': 'Unknown path {}'.format(self.path)})
+                return
+
+            n_points, error = 0, False
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                response, n_points = handlers[endpoint](payload)
+                self.send_JSON(200, response)
+            except Exception as e:
+                error = True
+                self.send_JSON(400, {'error': '{}: {}'.format(type(e).__name__, e)})
+            finally:
+                service.stats.record_Request(endpoint, time.time() - t0, n_points, error)
+
+        def log_message(self, format, *args):
+            # Keep the console quiet; see /stats instead
+            pass
+
+    return BoundaryRequestHandler
+
+def parse_Arguments(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('@author')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1', help='address to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='port (default: 8765)')
+    parser.add_argument('--posterior', action='append', default=[],
+                        help='posterior for a boundary, as MP=path or BS=path (repeatable)')
+    parser.add_argument('--n', type=int, default=500, help='default Monte Carlo samples (default: 500)')
+    parser.add_argument('--window', type=float, default=0.002,
+                        help='micro-batching window [s] (default: 0.002)')
+    parser.add_argument('--max-points', type=int, default=100000,
+                        help='maximum points per micro-batch (default: 100000)')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_Arguments(argv)
+
+    posteriors = {}
+    for pair in args.posterior:
+        boundary, path = pair.split('=', 1)
+        posteriors[boundary.strip().upper()] = path.strip()
+
+    service = BoundaryService(posteriors, n=args.n, window=args.window, max_points=args.max_points)
+    server = BoundaryHTTPServer((args.host, args.port), make_Handler(service))
+    print('Serving boundary queries on http://{}:{}'.format(args.host, args.port), file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
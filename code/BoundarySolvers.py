@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Elementwise root finding for the boundary models.
+
+Every Monte Carlo sample (and every query point) of a boundary defines its
+own scalar equation, f(v) = r_b(v) - r(v) = 0. Solving these as one coupled
+system (e.g., with scipy.optimize.fsolve) costs O(n^2) through the dense
+finite-difference Jacobian; here each equation is bracketed and solved
+independently, so the cost grows linearly with the number of equations.
+
+@author: mrutala
+"""
+import numpy as np
+
+def find_Brackets(fn, guess, step=1.0, growth=2.0, n_steps=16):
+    """
+    Walk outward from guess until f changes sign, independently for each
+    element, and return the bracket nearest to guess
+
+    Parameters
+    ----------
+    fn : callable
+        fn(v, index) -> (f, dfdv), evaluated for the flat elements 'index'
+    guess : np.ndarray
+        Flat array of starting points, one per equation
+    step : float or np.ndarray, optional
+        Initial step away from guess. The default is 1.0.
+    growth : float, optional
+        Factor by which the step grows each iteration. The default is 2.0.
+    n_steps : int, optional
+        Maximum number of outward steps on each side. The default is 16.
+
+    Returns
+    -------
+    lower, upper : np.ndarray
+        Bracketing values, with lower < upper where found
+    found : np.ndarray
+        Boolean array, True where a sign change was bracketed
+
+    """
+    index = np.arange(len(guess))
+    step = np.broadcast_to(np.asarray(step, dtype='float64'), guess.shape)
+
+    lower, upper = guess.copy(), guess.copy()
+    found = np.full(len(guess), False)
+
+    with np.errstate(all='ignore'):
+        f_guess = fn(guess, index)[0]
+
+    # An exact root at the guess is its own bracket
+    found[f_guess == 0] = True
+
+    # Walk outward on both sides, keeping the last point on each side
+    v_prev = {-1: guess.copy(), +1: guess.copy()}
+    f_prev = {-1: f_guess.copy(), +1: f_guess.copy()}
+    offset = np.zeros(len(guess))
+    for _ in range(n_steps):
+        active = np.flatnonzero(~found)
+        if len(active) == 0:
+            break
+        offset[active] += step[active]
+
+        for side in [-1, +1]:
+            v = guess[active] + side * offset[active]
+            with np.errstate(all='ignore'):
+                f = fn(v, active)[0]
+
+            # Only trust sign changes between finite values
+            change = np.isfinite(f) & np.isfinite(f_prev[side][active]) & \
+                     (np.sign(f) != np.sign(f_prev[side][active]))
+            change &= ~found[active]
+
+            hits = active[change]
+            lower[hits] = np.minimum(v[change], v_prev[side][hits])
+            upper[hits] = np.maximum(v[change], v_prev[side][hits])
+            found[hits] = True
+
+            v_prev[side][active] = v
+            f_prev[side][active] = f
+
+        step = step * growth
+
+    return lower, upper, found
+
+def find_GridBrackets(fn, grid, guess, n_refine=40):
+    """
+    Scan f over a fixed grid of values, shared by every element, and return
+    the bracket nearest to guess for each element. Unlike find_Brackets,
+    this cannot step over a pair of roots that are further apart than the
+    grid spacing, which suits equations with more than one root
+
+    A pair of roots within one grid cell leaves no sign change at the
+    nodes, but f'(v) does change sign between them. So wherever f' changes
+    sign across a cell, with f heading toward zero at both ends, the
+    turning point is found by bisection on f', and the cell is split there.
+    Tangencies (an extremum within rounding of zero) and cells holding
+    more than one turning point can still be missed.
+
+    Parameters
+    ----------
+    fn : callable
+        fn(v, index) -> (f, dfdv), evaluated for the flat elements 'index'
+    grid : np.ndarray
+        Ascending values at which to evaluate every element
+    guess : np.ndarray
+        Flat array of preferred values, one per equation
+    n_refine : int, optional
+        Number of bisection steps locating each turning point.
+        The default is 40.
+
+    Returns
+    -------
+    lower, upper : np.ndarray
+        Bracketing values, with lower < upper where found
+    n_brackets : np.ndarray
+        Number of sign changes bracketed for each element; 0 where none
+        was found, and more than 1 where the nearest was chosen
+
+    """
+    index = np.arange(len(guess))
+    lower, upper = np.full(len(guess), np.nan), np.full(len(guess), np.nan)
+    distance = np.full(len(guess), np.inf)
+    n_brackets = np.zeros(len(guess), dtype='int64')
+    
+    def add_Brackets(change, v_lower, v_upper):
+        n_brackets[change] += 1
+        midpoint = 0.5*(v_lower + v_upper)
+        closer = change & (np.abs(midpoint - guess) < distance)
+        lower[closer] = np.broadcast_to(v_lower, guess.shape)[closer]
+        upper[closer] = np.broadcast_to(v_upper, guess.shape)[closer]
+        distance[closer] = np.abs(midpoint - guess)[closer]
+    
+    # Only one grid node is held at a time, so memory is independent of the grid
+    f_prev, df_prev = None, None
+    for v_prev, v in zip(grid[:-1], grid[1:]):
+        with np.errstate(all='ignore'):
+            if f_prev is None:
+                f_prev, df_prev = fn(np.full(len(guess), v_prev), index)
+            f, df = fn(np.full(len(guess), v), index)
+        
+        finite = np.isfinite(f) & np.isfinite(f_prev)
+        change = finite & (np.sign(f) != np.sign(f_prev))
+        add_Brackets(change, v_prev, v)
+        
+        # No sign change, but f falls toward zero from v_prev and rises
+        # again before v: look for a pair of roots about the turning point
+        turning = finite & ~change & (np.sign(f_prev)*df_prev < 0) & (np.sign(f)*df > 0)
+        if turning.any():
+            cell = np.flatnonzero(turning)
+            lo, hi = np.full(len(cell), v_prev), np.full(len(cell), v)
+            sign = np.sign(f_prev[cell])
+            for _ in range(n_refine):
+                mid = 0.5*(lo + hi)
+                with np.errstate(all='ignore'):
+                    falling = sign*fn(mid, cell)[1] < 0
+                lo, hi = np.where(falling, mid, lo), np.where(falling, hi, mid)
+            v_turn = np.full(len(guess), np.nan)
+            v_turn[cell] = 0.5*(lo + hi)
+            with np.errstate(all='ignore'):
+                f_turn = np.full(len(guess), np.nan)
+                f_turn[cell] = fn(v_turn[cell], cell)[0]
+            pair = turning & np.isfinite(f_turn) & (np.sign(f_turn) != np.sign(f_prev))
+            add_Brackets(pair, v_prev, v_turn)
+            add_Brackets(pair, v_turn, v)
+        
+        f_prev, df_prev = f, df
+    
+    return lower, upper, n_brackets
+
+def solve_Elementwise(fn, lower, upper, x0=None,
+                      xtol=1e-8, ftol=1e-8, maxiter=100):
+    """
+    Safeguarded Newton-bisection (rtsafe) applied independently to every
+    element of a vectorized scalar equation f(v) = 0.
+
+    Newton steps use the analytic derivative returned by fn; whenever a
+    Newton step would leave the current bracket or fails to shrink it
+    quickly enough, a bisection step is taken instead. Converged elements
+    are dropped from further evaluations.
+
+    Parameters
+    ----------
+    fn : callable
+        fn(v, index) -> (f, dfdv), evaluated for the flat elements 'index'
+    lower, upper : np.ndarray
+        Flat arrays bracketing the root of each element
+    x0 : np.ndarray, optional
+        Starting points; the bracket midpoints are used by default
+    xtol : float, optional
+        Absolute + relative tolerance on the step size. The default is 1e-8.
+    ftol : float, optional
+        Absolute tolerance on the residual. The default is 1e-8.
+    maxiter : int, optional
+        Maximum number of iterations. The default is 100.
+
+    Returns
+    -------
+    roots : np.ndarray
+        Solution for each element (NaN where no valid bracket was given)
+    converged : np.ndarray
+        Boolean array, True where the element converged
+    iterations : np.ndarray
+        Number of iterations taken by each element
+    residuals : np.ndarray
+        f(roots) for each element
+
+    """
+    lower = np.array(lower, dtype='float64')
+    upper = np.array(upper, dtype='float64')
+    size = len(lower)
+    index = np.arange(size)
+
+    with np.errstate(all='ignore'):
+        f_lower = fn(lower, index)[0]
+        f_upper = fn(upper, index)[0]
+
+    # Only elements with a finite sign change can be solved
+    valid = np.isfinite(f_lower) & np.isfinite(f_upper) & (f_lower * f_upper <= 0)
+
+    # Orient each bracket so that f(lo) <= 0 <= f(hi)
+    swap = f_lower > 0
+    lo = np.where(swap, upper, lower)
+    hi = np.where(swap, lower, upper)
+
+    if x0 is None:
+        x = 0.5 * (lo + hi)
+    else:
+        x = np.clip(np.array(x0, dtype='float64'),
+                    np.minimum(lo, hi), np.maximum(lo, hi))
+
+    roots = np.full(size, np.nan)
+    residuals = np.full(size, np.nan)
+    iterations = np.zeros(size, dtype='int64')
+    converged = np.full(size, False)
+
+    # Work on compact copies of the active elements only; converged
+    # elements are recorded as they finish, and dropped from the working
+    # arrays once they make up a sizeable fraction of them
+    active = np.flatnonzero(valid)
+    x, lo, hi = x[active], lo[active], hi[active]
+    dx_old = np.abs(hi - lo)
+    still = np.full(len(active), True)
+    n_iter = 0
+    with np.errstate(all='ignore'):
+        f, df = fn(x, active)
+
+    def record(done):
+        converged[active[done]] = True
+        roots[active[done]] = x[done]
+        residuals[active[done]] = f[done]
+        iterations[active[done]] = n_iter
+        still[done] = False
+
+    # Elements already sitting on a root need no further steps
+    record(np.abs(f) <= ftol)
+
+    # Shrink the brackets around the starting points, so that a first
+    # bisection step from the midpoint does not stay put
+    negative = f < 0
+    lo = np.where(negative, x, lo)
+    hi = np.where(negative, hi, x)
+
+    for n_iter in range(1, maxiter + 1):
+        if not still.any():
+            break
+
+        if np.count_nonzero(still) < 0.75 * len(still):
+            active, x, lo, hi, dx_old, f, df = [arr[still] for arr in (active, x, lo, hi, dx_old, f, df)]
+            still = np.full(len(active), True)
+
+        # Newton step, unless it leaves the bracket or converges too slowly
+        with np.errstate(all='ignore'):
+            x_newton = x - f / df
+        use_bisection = ~np.isfinite(x_newton) | \
+                        ((x_newton - lo) * (x_newton - hi) > 0) | \
+                        (np.abs(2.0 * f) > np.abs(dx_old * df))
+        x_new = np.where(use_bisection, 0.5 * (lo + hi), x_newton)
+
+        dx_old = np.abs(x_new - x)
+        x = x_new
+
+        with np.errstate(all='ignore'):
+            f, df = fn(x, active)
+
+        # Shrink the bracket around the root
+        negative = f < 0
+        lo = np.where(negative, x, lo)
+        hi = np.where(negative, hi, x)
+
+        done = still & ((dx_old <= xtol * (1 + np.abs(x))) | (np.abs(f) <= ftol))
+        if done.any():
+            record(done)
+
+    # Record where unconverged elements stopped
+    roots[active[still]] = x[still]
+    residuals[active[still]] = f[still]
+    iterations[active[still]] = maxiter
+
+    return roots, converged, iterations, residuals
+
+def find_ModelPressures(model, parameters, r, t, p, guess=0.1, p_dyn_range=(1e-4, 1e2), n_grid=61,
+                        xtol=1e-8, ftol=1e-8, maxiter=100, return_all=False):
+    """
+    Solve a boundary model for the solar wind dynamic pressure at which it
+    passes through each point (r, t, p), for every parameter sample
+
+    Each (sample, point) pair is its own 1D equation, r_b(p_dyn) - r = 0,
+    solved in log10(p_dyn): every equation is bracketed on a grid spanning
+    p_dyn_range, then all are solved at once with a vectorized
+    Newton-bisection using the exact dr_b/dp_dyn of the model (see
+    evaluate_ModelDerivative). The flaring term can make r_b non-monotonic
+    in p_dyn, with two roots; the one nearest the guess is found, and the
+    number of roots bracketed is reported.
+
+    Pairs of roots closer than the grid spacing are found by splitting the
+    cell at the turning point between them (see find_GridBrackets). Points
+    where r_b only grazes r (a tangency), or where a cell holds more than
+    one turning point, may still be reported as not invertible.
+
+    Parameters
+    ----------
+    model : str or function
+        Name of a model in BoundaryModels.init(), or the model function
+        itself, of (t, p, p_dyn) -> r
+    parameters : arraylike or dict
+        (k,) parameters, or (S, k) parameter samples, in the order of the
+        model's 'param_descriptions'; or, if model is a name, a dict or
+        DataFrame of samples by parameter name
+    r, t, p : arraylike
+        Broadcastable arrays of the boundary positions
+    guess : float or arraylike, optional
+        Preferred pressure(s) [nPa], broadcastable with the points, where
+        there are two roots. The default is 0.1.
+    p_dyn_range : tuple, optional
+        The range of pressures [nPa] searched. The default is (1e-4, 1e2).
+    n_grid : int, optional
+        Number of log-spaced bracketing nodes across p_dyn_range.
+        The default is 61.
+    xtol, ftol, maxiter : optional
+        Passed to solve_Elementwise; ftol is in the units of r
+    return_all : bool, optional
+        If True, also return the iterations and residuals of each solution.
+        The default is False.
+
+    Returns
+    -------
+    p_dyn : np.ndarray
+        (S, ...) array of the pressure for each sample at each point, or
+        (...) for a single parameter vector; NaN where not invertible
+    invertible : np.ndarray
+        Boolean array like p_dyn, False where no pressure in p_dyn_range
+        places the boundary at the point, or the solver did not converge
+    n_roots : np.ndarray
+        Integer array like p_dyn, the number of roots bracketed in
+        p_dyn_range; where more than 1, p_dyn is the root nearest the guess
+    iterations, residuals : np.ndarray
+        Only if return_all; arrays like p_dyn
+
+    """
+    import BoundaryModelsCore as BMC
+    
+    model, parameters = BMC._resolve_Model(model, parameters)
+    if model(variables=True) != (('t', 'p', 'p_dyn'), 'r'):
+        raise ValueError('{} is not a model of (t, p, p_dyn) -> r'.format(model.__name__))
+    
+    single = parameters.ndim == 1
+    parameters = np.atleast_2d(parameters)
+    r, t, p, guess = np.broadcast_arrays(*[np.asarray(arr, dtype='float64') for arr in (r, t, p, guess)])
+    shape = r.shape
+    r, t, p, guess = [arr.ravel() for arr in (r, t, p, guess)]
+    n_samples, n_points = len(parameters), len(r)
+    
+    def fn(log_p_dyn, index):
+        sample, point = np.divmod(index, n_points)
+        p_dyn = 10.**log_p_dyn
+        r_b, drdp = BMC.evaluate_ModelDerivative(model, list(parameters[sample].T),
+                                                 [t[point], p[point], p_dyn])
+        return r_b - r[point], drdp * p_dyn * np.log(10)
+    
+    x0 = np.tile(np.log10(guess), n_samples)
+    grid = np.linspace(*np.log10(p_dyn_range), n_grid)
+    lower, upper, n_roots = find_GridBrackets(fn, grid, x0)
+    
+    solutions, converged, iterations, residuals = solve_Elementwise(fn, lower, upper,
+                                                                    xtol=xtol, ftol=ftol, maxiter=maxiter)
+    invertible = converged & (n_roots > 0)
+    p_dyn = np.where(invertible, 10.**solutions, np.nan)
+    
+    results = [arr.reshape((n_samples,) + shape) for arr in (p_dyn, invertible, n_roots, iterations, residuals)]
+    if single:
+        results = [arr[0] for arr in results]
+    
+    return tuple(results) if return_all else tuple(results[:3])
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Precomputed lookup tables of the boundary predictive distribution.
+
+make_BoundaryTable evaluates the find_Boundary Monte Carlo once on a
+(theta, phi, log10 p_dyn) grid and saves percentiles of r_b to a compact
+binary (.npz) file; query_BoundaryTable then answers arrays of queries by
+trilinear interpolation, with error bounds relative to the exact Monte Carlo.
+
+Percentiles are stored relative to the noise-free boundary at the median
+parameters, which is evaluated exactly at query time; the ratio varies
+slowly, so the steep flaring of the tail does not need to be interpolated.
+
+@author: mrutala
+"""
+import os
+import numpy as np
+
+import find_Boundary as fB
+
+# Loaded tables, keyed by (path, modification time)
+_table_cache = {}
+
+# Multiple of the (1-sigma) Monte Carlo error included in the error bounds
+_mc_error_sigmas = 3
+
+def make_BoundaryTable(filepath, boundary='MP', posterior=None,
+                       theta_range=(0, np.radians(175)), n_theta=71,
+                       n_phi=72,
+                       log_p_dyn_range=(-3, 0), n_log_p_dyn=31,
+                       percentiles=(2.5, 16, 50, 84, 97.5),
+                       n=2000, seed=None, validate=True):
+    """
+    Tabulate percentiles of the boundary distance r_b on a regular
+    (theta, phi, log10 p_dyn) grid and save them to filepath
+
+    Parameters
+    ----------
+    filepath : str
+        Output .npz file
+    boundary : str, optional
+        'MP' or 'BS'. The default is 'MP'.
+    posterior : str, optional
+        Path to a saved posterior from which to draw the model parameters,
+        as in find_Boundary. The default is None.
+    theta_range : tuple, optional
+        Range of theta [radians]. The default is (0, 175 deg).
+    n_theta : int, optional
+        Number of theta nodes. The default is 71.
+    n_phi : int, optional
+        Number of phi nodes, evenly spaced over [-pi, pi). The default is 72.
+    log_p_dyn_range : tuple, optional
+        Range of log10(p_dyn [nPa]). The default is (-3, 0).
+    n_log_p_dyn : int, optional
+        Number of log10 p_dyn nodes. The default is 31.
+    percentiles : tuple, optional
+        Percentiles of r_b to store. The default is (2.5, 16, 50, 84, 97.5).
+    n : int, optional
+        Number of Monte Carlo samples, shared by all nodes. The default is 2000.
+    seed : int, optional
+        Seed for the Monte Carlo samples. The default is None.
+    validate : bool, optional
+        If True, estimate the interpolation error by comparing the table
+        to the exact Monte Carlo at every cell center. The default is True.
+
+    Returns
+    -------
+    table : dict
+        The saved table, as returned by load_BoundaryTable
+
+    """
+    rng = np.random.default_rng(seed)
+    gauss_factor = rng.normal(0, 1, n)
+    C, sigma = fB._get_BoundaryParameters(boundary, n, rng, posterior=posterior)
+
+    # theta nodes are evenly spaced in ln(2/(1 + cos(theta))), in which the
+    # flaring term of r_b is exponential, rather than in theta itself
+    theta = _get_Theta(np.linspace(*_get_FlaringCoordinate(np.array(theta_range)), n_theta))
+    phi = np.linspace(-np.pi, np.pi, n_phi, endpoint=False)
+    log_p_dyn = np.linspace(*log_p_dyn_range, n_log_p_dyn)
+    percentiles = np.array(percentiles, dtype='float64')
+
+    # The Monte Carlo standard error of each percentile is estimated from
+    # the spread of the neighbouring order statistics
+    q = percentiles/100
+    dq = np.sqrt(q * (1 - q) / n)
+    q_lo, q_hi = np.clip(q - dq, 0, 1), np.clip(q + dq, 0, 1)
+
+    # Reference (median parameter, noise-free) boundary
+    reference = np.median(C, axis=1)
+
+    values = np.empty((len(percentiles), n_theta, n_phi, n_log_p_dyn), dtype='float32')
+    mc_error = np.zeros((len(percentiles), n_theta), dtype='float32')
+
+    # Evaluate one theta row at a time to bound the memory used
+    for i, t in enumerate(theta):
+        r_b = _get_DistanceSamples(t, phi[:, None], 10.**log_p_dyn[None, :],
+                                   C, sigma, gauss_factor)
+        r_ref = _get_ReferenceDistance(reference, t, phi[:, None], 10.**log_p_dyn[None, :])
+        values[:, i] = np.percentile(r_b, percentiles, axis=-1) / r_ref
+
+        spread = np.quantile(r_b, q_hi, axis=-1) - np.quantile(r_b, q_lo, axis=-1)
+        mc_error[:, i] = np.max(spread/2, axis=(1, 2))
+
+    table = {'boundary': np.array(boundary),
+             'theta': theta, 'phi': phi, 'log_p_dyn': log_p_dyn,
+             'percentiles': percentiles,
+             'reference': reference,
+             'values': values,
+             'mc_error': mc_error,
+             'n': np.array(n)}
+
+    # Interpolation error: compare the exact Monte Carlo at the center of
+    # each cell to the table, keeping the worst case in each theta cell
+    interp_error = np.zeros((len(percentiles), n_theta), dtype='float32')
+    if validate:
+        u = _get_FlaringCoordinate(theta)
+        theta_mid = _get_Theta(0.5 * (u[1:] + u[:-1]))
+        phi_mid = phi + 0.5 * (phi[1] - phi[0])
+        log_p_dyn_mid = 0.5 * (log_p_dyn[1:] + log_p_dyn[:-1])
+
+        for i, t in enumerate(theta_mid):
+            r_b = _get_DistanceSamples(t, phi_mid[:, None], 10.**log_p_dyn_mid[None, :],
+                                       C, sigma, gauss_factor)
+            exact = np.percentile(r_b, percentiles, axis=-1)
+
+            T, P, L = np.meshgrid(t, phi_mid, log_p_dyn_mid, indexing='ij')
+            interpolated = _interpolate_Table(table, T.ravel(), P.ravel(), L.ravel())
+            error = np.abs(interpolated.T.reshape(exact.shape) - exact)
+
+            # Either neighbouring theta node may be used for this cell
+            interp_error[:, i] = np.maximum(interp_error[:, i], np.max(error, axis=(1, 2)))
+            interp_error[:, i+1] = np.maximum(interp_error[:, i+1], np.max(error, axis=(1, 2)))
+    table['interp_error'] = interp_error
+
+    np.savez(filepath, **table)
+
+    return load_BoundaryTable(filepath)
+
+def _get_FlaringCoordinate(theta):
+    """
+    The table coordinate u = ln(2/(1 + cos(theta)))
+    """
+    return np.log(2/(1 + np.cos(theta)))
+
+def _get_Theta(u):
+    """
+    Inverse of _get_FlaringCoordinate
+    """
+    return np.arccos(2*np.exp(-u) - 1)
+
+def _get_ReferenceDistance(reference, theta, phi, p_dyn):
+    """
+    The noise-free boundary distance for the reference parameters
+    """
+    return fB._get_BoundaryDistance(theta, phi, p_dyn, reference, [0, 0], 0)
+
+def _get_DistanceSamples(theta, phi, p_dyn, C, sigma, gauss_factor):
+    """
+    r_b for every Monte Carlo sample, along the last axis
+    """
+    return fB._get_BoundaryDistance(theta, phi[..., None], p_dyn[..., None],
+                                    C, sigma, gauss_factor)
+
+def load_BoundaryTable(filepath):
+    """
+    Load a table written by make_BoundaryTable. Tables are cached, so
+    repeated calls do not re-read the file unless it has been modified.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the .npz table
+
+    Returns
+    -------
+    table : dict
+        Dictionary of the table grid ('theta', 'phi', 'log_p_dyn'),
+        'percentiles', 'values', and error estimates ('mc_error', the
+        1-sigma Monte Carlo error, and 'interp_error', the worst
+        interpolation error found at the cell centers)
+
+    """
+    filepath = os.path.abspath(filepath)
+    key = (filepath, os.path.getmtime(filepath))
+    if key in _table_cache:
+        return _table_cache[key]
+
+    with np.load(filepath) as f:
+        table = {k: f[k] for k in f.files}
+    table['boundary'] = str(table['boundary'])
+
+    for stale_key in [k for k in _table_cache if k[0] == filepath]:
+        del _table_cache[stale_key]
+    _table_cache[key] = table
+
+    return table
+
+def _interpolate_Table(table, theta, phi, log_p_dyn):
+    """
+    Trilinear interpolation of the table values, periodic in phi, scaled
+    by the reference boundary distance.
+    Returns an (N, n_percentiles) array, NaN outside of the table grid
+    """
+    def locate(axis, v, periodic=False):
+        step = axis[1] - axis[0]
+        u = (v - axis[0]) / step
+        if periodic:
+            u = np.mod(u, len(axis))
+            i0 = np.floor(u).astype('int64')
+            i1 = (i0 + 1) % len(axis)
+            outside = np.full(v.shape, False)
+        else:
+            outside = ~((u >= 0) & (u <= len(axis) - 1))
+            u = np.clip(np.nan_to_num(u), 0, len(axis) - 1)
+            i0 = np.minimum(np.floor(u).astype('int64'), len(axis) - 2)
+            i1 = i0 + 1
+        return i0, i1, u - i0, outside
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        it0, it1, wt, out_t = locate(_get_FlaringCoordinate(table['theta']),
+                                     _get_FlaringCoordinate(theta))
+    ip0, ip1, wp, _ = locate(table['phi'], phi, periodic=True)
+    il0, il1, wl, out_l = locate(table['log_p_dyn'], log_p_dyn)
+
+    values = table['values']
+    result = np.zeros((len(theta), values.shape[0]), dtype='float64')
+    for it, w_t in [(it0, 1 - wt), (it1, wt)]:
+        for ip, w_p in [(ip0, 1 - wp), (ip1, wp)]:
+            for il, w_l in [(il0, 1 - wl), (il1, wl)]:
+                result += (w_t * w_p * w_l)[:, None] * values[:, it, ip, il].T
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result *= _get_ReferenceDistance(table['reference'], theta, phi, 10.**log_p_dyn)[:, None]
+    result[out_t | out_l] = np.nan
+
+    return result
+
+def query_BoundaryTable(table, theta, phi, p_dyn, return_error=False):
+    """
+    Interpolate percentiles of the boundary distance r_b from a table
+
+    Parameters
+    ----------
+    table : str or dict
+        Path to a table, or a table returned by load_BoundaryTable
+    theta, phi : arraylike
+        Angular coordinates of the points of interest [radians]
+    p_dyn : arraylike
+        Solar wind dynamic pressure at the points of interest [nPa]
+    return_error : bool, optional
+        If True, also return an approximate upper bound on the error of
+        each percentile relative to the exact Monte Carlo. The default is
+        False.
+
+    Returns
+    -------
+    r : np.ndarray
+        (N, n_percentiles) array of r_b percentiles (table['percentiles']).
+        Points outside of the tabulated theta and p_dyn ranges are NaN.
+    error : np.ndarray
+        Only if return_error. (N, n_percentiles) array of error bounds, the
+        sum of the worst interpolation error at the cell centers and 3
+        times the (1-sigma) Monte Carlo error
+
+    """
+    if type(table) is not dict:
+        table = load_BoundaryTable(table)
+
+    theta, phi, p_dyn = np.broadcast_arrays(np.atleast_1d(np.asarray(theta, dtype='float64')),
+                                            np.atleast_1d(np.asarray(phi, dtype='float64')),
+                                            np.atleast_1d(np.asarray(p_dyn, dtype='float64')))
+    theta, phi, p_dyn = theta.ravel(), phi.ravel(), p_dyn.ravel()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_p_dyn = np.log10(p_dyn)
+
+    r = _interpolate_Table(table, theta, phi, log_p_dyn)
+
+    if return_error:
+        # Error bounds are tabulated per theta node; use the nearest
+        u = _get_FlaringCoordinate(table['theta'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            i = np.rint(np.nan_to_num((_get_FlaringCoordinate(theta) - u[0]) / (u[1] - u[0])))
+        i = np.clip(i, 0, len(u) - 1).astype('int64')
+        error = (table['interp_error'][:, i] + _mc_error_sigmas*table['mc_error'][:, i]).T.astype('float64')
+        error[np.isnan(r)] = np.nan
+        return r, error
+
+    return r
@@ -127,17 +127,116 @@ def get_SpacecraftPositions(df, target):
         ets = spice.datetime2et(df.index.to_pydatetime())
         
         xyz_pos, lt = spice.spkpos(target, ets, 'Juno_JSS', 'None', 'Jupiter')
-        xyz_pos = xyz_pos.T / R_J
         
-        rpl_pos = BM.convert_CartesianToCylindricalSolar(*xyz_pos)
-        rtp_pos = BM.convert_CartesianToSphericalSolar(*xyz_pos)
-        
-    df[['x', 'y', 'z']] = xyz_pos.T
-    df[['rho', 'phi', 'ell']] = rpl_pos.T
-    df[['r', 't', 'p']] = rtp_pos.T
+    # Fill one (N, 9) block in place, and copy it into the DataFrame once
+    positions = np.empty((len(xyz_pos), 9))
+    np.divide(xyz_pos, R_J, out=positions[:, 0:3])
+    BM.transform_CartesianToCylindricalSolar(positions[:, 0:3], out=positions[:, 3:6])
+    BM.transform_CartesianToSphericalSolar(positions[:, 0:3], out=positions[:, 6:9])
+    
+    df[['x', 'y', 'z', 'rho', 'phi', 'ell', 'r', 't', 'p']] = positions
         
     return df
 
+def _find_CrossingPressures(boundary, x, y, z, kwargs):
+    import find_Boundary as fB
+    return fB.find_Boundaries(boundary, x=x, y=y, z=z, p_sw=True, **kwargs)
+
+def get_CrossingPressures(df, boundary = None, guess = 0.1, n = 500,
+                          chunksize = 1000, workers = 1, seed = None, **kwargs):
+    """
+    Infer the upstream solar wind dynamic pressure at every crossing in a
+    crossing list, by solving the find_Boundary model for p_sw at the
+    spacecraft position
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Crossing list, with positions in columns (x, y, z) or
+        (x_JSS, y_JSS, z_JSS) [R_J]
+    boundary : str, optional
+        'MP' or 'BS' for all rows. By default, the boundary of each crossing
+        is inferred from its 'origin' and 'destination' (SW <-> SH is the
+        bow shock; SH <-> MS is the magnetopause), or a 'boundary' column.
+    guess : float, optional
+        Initial guess of p_sw [nPa]. The default is 0.1.
+    n : int, optional
+        Number of Monte Carlo samples per crossing. The default is 500.
+    chunksize : int, optional
+        Number of crossings solved together. The default is 1000.
+    workers : int, optional
+        Number of processes to solve chunks in parallel. The default is 1.
+    seed : int, optional
+        Seed, for reproducible results; each chunk is seeded with seed +
+        its chunk number. The default is None.
+    **kwargs
+        Passed to find_Boundary.find_Boundaries (e.g., posterior, sampling)
+
+    Returns
+    -------
+    p_df : pandas.DataFrame
+        With the same index as df, and columns:
+            boundary, p_dyn, p_dyn_neg, p_dyn_pos, converged
+        where p_dyn_neg/p_dyn_pos are the (lognormal) -/+ 1 sigma
+        uncertainties on p_dyn [nPa]
+
+    """
+
+    # Positions of the crossings
+    if set(['x', 'y', 'z']).issubset(df.columns):
+        xyz = df[['x', 'y', 'z']].to_numpy(dtype='float64')
+    else:
+        xyz = df[['x_JSS', 'y_JSS', 'z_JSS']].to_numpy(dtype='float64')
+
+    # Which boundary was crossed
+    if boundary is not None:
+        match boundary.lower():
+            case ('mp' | 'magnetopause'):
+                boundaries = np.full(len(df), 'MP', dtype=object)
+            case ('bs' | 'bowshock' | 'bow shock'):
+                boundaries = np.full(len(df), 'BS', dtype=object)
+            case _:
+                raise ValueError("Unrecognized boundary '{}'".format(boundary))
+    elif set(['origin', 'destination']).issubset(df.columns):
+        regions = df['origin'].astype(str) + df['destination'].astype(str)
+        boundaries = np.full(len(df), None, dtype=object)
+        boundaries[regions.str.contains('SW').to_numpy()] = 'BS'
+        boundaries[regions.str.contains('MS').to_numpy()] = 'MP'
+    else:
+        boundaries = df['boundary'].map({'bow shock': 'BS', 'magnetopause': 'MP'}).to_numpy(dtype=object)
+
+    p_df = pd.DataFrame(index = df.index,
+                        columns = ['boundary', 'p_dyn', 'p_dyn_neg', 'p_dyn_pos', 'converged'])
+    p_df['boundary'] = boundaries
+    p_df[['p_dyn', 'p_dyn_neg', 'p_dyn_pos']] = np.nan
+    p_df['converged'] = False
+
+    # Split each boundary into chunks, to limit the memory used
+    tasks = []
+    for b in ['MP', 'BS']:
+        rows = np.flatnonzero(boundaries == b)
+        for start in range(0, len(rows), chunksize):
+            chunk_rows = rows[start:start+chunksize]
+            chunk_kwargs = {'guess': guess, 'n': n,
+                            'seed': None if seed is None else seed + len(tasks)} | kwargs
+            tasks.append((chunk_rows, (b, *xyz[chunk_rows].T, chunk_kwargs)))
+
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            results = list(executor.map(_find_CrossingPressures, *zip(*[args for _, args in tasks])))
+    else:
+        results = [_find_CrossingPressures(*args) for _, args in tasks]
+
+    for (chunk_rows, _), (result, converged) in zip(tasks, results):
+        p_df.iloc[chunk_rows, 1:4] = result
+        p_df.iloc[chunk_rows, 4] = converged
+
+    p_df[['p_dyn', 'p_dyn_neg', 'p_dyn_pos']] = p_df[['p_dyn', 'p_dyn_neg', 'p_dyn_pos']].astype('float64')
+    p_df['converged'] = p_df['converged'].astype(bool)
+
+    return p_df
+
 def convert_BoundariesToCrossings(df):
     
     #   Convert destination a Crossing List: add 'origin' and 'destination' columns
@@ -5,6 +5,10 @@ Created on Wed Mar  6 09:52:22 2024
 
 @author: mrutala
 """
+import functools
+
+import numpy as np
+
 def find_JoyBowShock(p_dyn, x=False, y=False, z=False):
     return find_JoyBoundaries(p_dyn, boundary='BS', x=x, y=y, z=z)
     
@@ -36,116 +40,326 @@ def get_JoyParameters(boundary = 'BS'):
 
 def get_JoyCoefficients(p=0, boundary='BS', function=False):
     
-    #   Joy+ 2002 coefficients
-    match boundary.lower():
-        case ('bs' | 'bowshock' | 'bow shock'):
-            A0, A1 = -1.107, +1.591
-            B0, B1 = -0.566, -0.812
-            C0, C1 = +0.048, -0.059
-            D0, D1 = +0.077, -0.038
-            E0, E1 = -0.874, -0.299
-            F0, F1 = -0.055, +0.124
-        case ('mp' | 'magnetopause'):
-            A0, A1 = -0.134, +0.488
-            B0, B1 = -0.581, -0.225
-            C0, C1 = -0.186, -0.016
-            D0, D1 = -0.014, +0.096
-            E0, E1 = -0.814, -0.811
-            F0, F1 = -0.050, +0.168
-        case _:
-            return
-        
-    A = lambda p: (A0 + A1*p**(-1/4))
-    B = lambda p: (B0 + B1*p**(-1/4))
-    C = lambda p: (C0 + C1*p**(-1/4))
-    D = lambda p: (D0 + D1*p)
-    E = lambda p: (E0 + E1*p)
-    F = lambda p: (F0 + F1*p)
+    #   Joy+ 2002 coefficients, with the pressure-dependent terms cached
+    model = _get_JoyModel(boundary)
+    if model is None:
+        return
     
     if function:
-        result = {'A':A, 'B':B, 'C':C, 'D':D, 'E':E, 'F':F}
+        result = {key: (lambda p, i=i: model.get_Terms(p)[..., i]) for i, key in enumerate('ABCDEF')}
     else:
-        result = {'A':A(p), 'B':B(p), 'C':C(p), 'D':D(p), 'E':E(p), 'F':F(p)}
+        terms = model.get_Terms(p)
+        result = {key: terms[..., i] for i, key in enumerate('ABCDEF')}
     return result
 
-def find_JoyBoundaries(p_dyn, boundary='BS', x=False, y=False, z=False):
-    import numpy as np
-    import warnings
+#   Default models, one per boundary, so that their caches persist
+_joy_models = {}
+
+def _get_JoyModel(boundary='BS'):
+    key = boundary.lower()
+    if key not in _joy_models:
+        if get_JoyParameters(boundary) is None:
+            return
+        _joy_models[key] = JoyModel(boundary)
+    return _joy_models[key]
+
+class JoyModel:
+    """
+    The Joy+ (2002) boundary model, 
+        z^2 = A + B x + C x^2 + D y + E y^2 + F x y    [x, y, z in 120 R_J]
+    with A, B, C = A0 + A1 p_dyn^r1 (etc.) and D, E, F = D0 + D1 p_dyn (etc.)
     
-    # def fxn():
-    #     warnings.warn("runtime", RuntimeWarning)
+    The 12 coefficients (A0, A1, B0, B1, ..., F1, in the order of 
+    get_JoyParameters) are stored as a (12,) array, or as an (S, 12) array 
+    of samples, in which case every result gains a trailing axis of 
+    length S. The pressure-dependent terms A-F are cached for scalar p_dyn.
+
+    Parameters
+    ----------
+    boundary : str, optional
+        'BS' or 'MP', selecting the published coefficients. The default is 'BS'.
+    coefficients : arraylike, optional
+        (12,) or (S, 12) coefficients, overriding the published ones. 
+        The default is None.
+    r1 : float, optional
+        Exponent of p_dyn in A, B, and C. The default is -1/4.
+    cache_size : int, optional
+        Number of pressures for which to cache A-F. The default is 256.
         
-    #   Joy+ 2002 coefficients
+    """
+    __slots__ = ('boundary', 'coefficients', 'r1', '_cached_Terms')
+    
+    scale_factor = 1/120.
+    
+    def __init__(self, boundary='BS', coefficients=None, r1=-1/4, cache_size=256):
+        if coefficients is None:
+            coefficients = get_JoyParameters(boundary)
+            if coefficients is None:
+                raise ValueError("Unknown boundary '{}'; use 'BS' or 'MP'".format(boundary))
+        coefficients = np.array(coefficients, dtype='float64')
+        if coefficients.shape[-1] != 12 or coefficients.ndim > 2:
+            raise ValueError('coefficients must have shape (12,) or (S, 12)')
+        coefficients.flags.writeable = False
+        
+        self.boundary = boundary
+        self.coefficients = coefficients
+        self.r1 = r1
+        self._cached_Terms = functools.lru_cache(maxsize=cache_size)(self._compute_Terms)
+    
+    def __repr__(self):
+        return 'JoyModel({!r}, samples={})'.format(self.boundary, self.n_samples)
+    
+    @property
+    def n_samples(self):
+        return len(self.coefficients) if self.coefficients.ndim == 2 else None
+    
+    def _expand(self, arr):
+        #   Add the trailing sample axis, if there is one
+        arr = np.asarray(arr, dtype='float64')
+        return arr[..., None] if self.coefficients.ndim == 2 else arr
+    
+    def _compute_Terms(self, p_dyn):
+        p_dyn = self._expand(p_dyn)[..., None]
+        q = p_dyn**self.r1
+        constant, slope = self.coefficients[..., 0::2], self.coefficients[..., 1::2]
+        
+        terms = np.empty(np.broadcast_shapes(p_dyn.shape, constant.shape))
+        terms[..., 0:3] = constant[..., 0:3] + slope[..., 0:3] * q
+        terms[..., 3:6] = constant[..., 3:6] + slope[..., 3:6] * p_dyn
+        terms.flags.writeable = False
+        return terms
+    
+    def get_Terms(self, p_dyn):
+        """
+        The pressure-dependent terms A-F, as an (..., [S,] 6) array
+        """
+        if np.ndim(p_dyn) == 0:
+            return self._cached_Terms(float(p_dyn))
+        return self._compute_Terms(p_dyn)
+    
+    def get_QuadraticForm(self, t, p, p_dyn):
+        """
+        Coefficients (a, b, c) of the quadratic a s^2 + b s + c = 0 in the 
+        scaled distance s = r/120 along the direction (t, p)
+        """
+        t, p = self._expand(t), self._expand(p)
+        terms = self.get_Terms(p_dyn)
+        A, B, C, D, E, F = [terms[..., i] for i in range(6)]
+        
+        #   x = r cos(t), y = -r sin(t) sin(p), z = r sin(t) cos(p)
+        cos_t, sin_t = np.cos(t), np.sin(t)
+        sin_p = np.sin(p)
+        u = cos_t
+        v = sin_t * sin_p
+        w2 = sin_t**2 - v**2
+        
+        a = C*u**2 + E*v**2 - F*u*v - w2
+        b = B*u - D*v
+        c = A
+        return a, b, c
+    
+    def get_Radius(self, t, p, p_dyn):
+        """
+        Distance to the boundary [R_J] along (t, p) at p_dyn, as an 
+        (..., [S]) array, NaN where the direction does not intersect it
+        """
+        a, b, c = self.get_QuadraticForm(t, p, p_dyn)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = (-b - np.sqrt(b**2 - 4*a*c)) / (2*a)
+        return r / self.scale_factor
+
+def find_JoyBoundaries(p_dyn, boundary='BS', x=False, y=False, z=False):
+    
+    roots, _ = find_JoyBoundaryGrid(p_dyn, boundary=boundary, x=x, y=y, z=z)
+    
+    return roots
+
+def find_JoyBoundaryGrid(p_dyn, boundary='BS', x=False, y=False, z=False):
+    """
+    Solve the Joy+ (2002) boundary surface for one coordinate, broadcasting
+    the solar wind dynamic pressure against the other two coordinates
+    
+    The unknown coordinate is left as False; the known coordinates and 
+    p_dyn may be scalars or arrays of any broadcastable shapes. For example,
+    100 pressures along three cuts in x-z planes at fixed y:
+        find_JoyBoundaryGrid(p[:, None, None], 'MP', 
+                             x=xs[None, None, :], y=np.array([0, 50, 100])[:, None], 
+                             z=False)
+
+    Parameters
+    ----------
+    p_dyn : arraylike
+        Solar wind dynamic pressure [nPa]
+    boundary : str, optional
+        'BS' or 'MP'. The default is 'BS'.
+    x, y, z : arraylike or False
+        JSS coordinates [R_J]; exactly one must be False, the coordinate 
+        to solve for. The default is False.
+
+    Returns
+    -------
+    roots : np.ndarray
+        (2, *shape) array of both roots of the quadratic in the unknown
+        coordinate [R_J], where shape is the broadcast shape of p_dyn and 
+        the known coordinates. NaN where there is no (second) root
+    valid : np.ndarray
+        (2, *shape) boolean array, True where each root exists
+
+    """
+    
+    unknown = [name for name, val in zip('xyz', [x, y, z]) if type(val) is bool]
+    if len(unknown) != 1:
+        raise ValueError('Exactly one of x, y, z must be False, the coordinate to solve for')
+    
+    p_dyn = np.asarray(p_dyn, dtype='float64')
     A, B, C, D, E, F = get_JoyCoefficients(p_dyn, boundary=boundary).values()
     scale_factor = 1/120.
     
-    #   z**2 = A + B*x + C*x**2 + D*y + E*y**2 + F*x*y
-    match x, y, z:    
-        case x, y, bool():
-            #   0 = 1 z^2 + 0z + (A + Bx + Cx^2 + Dy + Ey^2 + Fxy)
-            if type(x) in [int, float]:    
-                plane, abcissa = 'yz', 'y'
-            else:
-                plane, abcissa = 'xz', 'x'
-            xs, ys = x * scale_factor, y * scale_factor
-            aq = -1
-            bq = 0
+    #   z**2 = A + B*x + C*x**2 + D*y + E*y**2 + F*x*y, as aq u^2 + bq u + cq = 0
+    match unknown[0]:
+        case 'z':
+            #   0 = -1 z^2 + 0z + (A + Bx + Cx^2 + Dy + Ey^2 + Fxy)
+            xs, ys = np.asarray(x) * scale_factor, np.asarray(y) * scale_factor
+            aq = np.float64(-1)
+            bq = np.float64(0)
             cq = A + B*xs + C*xs**2 + D*ys + E*ys**2 + F*xs*ys
-            
-        case x, bool(), z:
+        case 'y':
             #   0 = E y^2 + (D + Fx) y + (A + Bx + Cx^2 - z^2)
-            if type(x) in [int, float]:
-                plane, abcissa = 'yz', 'z' 
-            else:
-                plane, abcissa = 'xy', 'x' 
-            xs, zs = x * scale_factor, z * scale_factor
+            xs, zs = np.asarray(x) * scale_factor, np.asarray(z) * scale_factor
             aq = E
             bq = D + F*xs
             cq = A + B*xs + C*xs**2 - zs**2
-        
-        case bool(), y, z:
+        case 'x':
             #   0 = C x^2 + (B + Fy)x + (A + Dy + Ey^2 - z^2)
-            if type(y) in [int, float]:
-                plane, abcissa = 'xz', 'z'
-            else:
-                plane, abcissa = 'xy', 'y'
-            ys, zs = y * scale_factor, z * scale_factor
+            ys, zs = np.asarray(y) * scale_factor, np.asarray(z) * scale_factor
             aq = C
             bq = B + F*ys
             cq = A + D*ys + E*ys**2 - zs**2
     
+    shape = np.broadcast_shapes(np.shape(aq), np.shape(bq), np.shape(cq))
+    
+    #   Both roots share one output array; the discriminant is built in place
+    roots = np.empty((2,) + shape)
+    discriminant = roots[1, ...]
+    np.multiply(aq, cq, out=discriminant)
+    discriminant *= -4
+    discriminant += bq**2
+    
     #   Ignore math warnings
-    with np.errstate(invalid='ignore'):
-        
-        result_plus = (-bq + np.sqrt(bq**2 - 4*aq*cq))/(2*aq)
-        result_minus = (-bq - np.sqrt(bq**2 - 4*aq*cq))/(2*aq)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        np.sqrt(discriminant, out=discriminant)
+        np.subtract(discriminant, bq, out=roots[0, ...])
+        np.negative(discriminant, out=roots[1, ...])
+        roots[1, ...] -= bq
+        roots /= 2*aq
         
-    return np.array([result_plus, result_minus]) / scale_factor
+        #   Where the quadratic term vanishes, there is a single root
+        linear = np.broadcast_to(aq == 0, shape)
+        if linear.any():
+            roots[0, ...][linear] = -np.broadcast_to(cq, shape)[linear] / np.broadcast_to(bq, shape)[linear]
+            roots[1, ...][linear] = np.nan
+    
+    roots /= scale_factor
+    valid = np.isfinite(roots)
+    roots[~valid] = np.nan
+    
+    return roots, valid
 
-def find_JoyPressures(x, y, z, boundary='BS'):
-    import numpy as np
-    from scipy.optimize import minimize_scalar
+def find_JoyPressures(x, y, z, boundary='BS', return_all=False):
+    """
+    Solve the Joy+ (2002) boundary surface for the solar wind dynamic 
+    pressure at each point (x, y, z)
     
-    x, y, z = np.array(x), np.array(y), np.array(z)
+    With u = p**(1/4), the surface equation becomes the polynomial
+        c_lin u^5 + c_const u + c_inv = 0
+    which has at most one positive turning point, at u^4 = -c_const/(5 c_lin),
+    and so at most two positive roots. Each monotonic segment is bracketed 
+    and solved with a vectorized Newton-bisection.
+
+    Parameters
+    ----------
+    x, y, z : arraylike
+        JSS coordinates of the points of interest [R_J]
+    boundary : str, optional
+        'BS' or 'MP'. The default is 'BS'.
+    return_all : bool, optional
+        If True, return both roots and a no-solution mask. 
+        The default is False.
+
+    Returns
+    -------
+    pressures : np.ndarray
+        (N,) array of the lowest pressure [nPa] at which the boundary passes
+        through each point, NaN where there is no solution; or, if 
+        return_all, an (N, 2) array of both pressures (ascending, NaN where
+        there is only one or no solution)
+    no_solution : np.ndarray
+        Only if return_all. (N,) boolean array, True where no positive 
+        pressure places the boundary at the point
+
+    """
+    from BoundarySolvers import solve_Elementwise
     
-    A, B, C, D, E, F = get_JoyCoefficients(boundary=boundary, function=True).values()
+    A0, A1, B0, B1, C0, C1, D0, D1, E0, E1, F0, F1 = get_JoyParameters(boundary)
     
     scale_factor = 1/120.
+    x, y, z = [arr.ravel() * scale_factor for arr in 
+               np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype='float64')) for v in [x, y, z]])]
     
-    resulting_pressures = []
-    for xi, yi, zi in zip(x, y, z):
-        xi = xi*scale_factor
-        yi = yi*scale_factor
-        zi = zi*scale_factor
-        
-        def Joy2002(p):
-            function = A(p) + B(p)*xi + C(p)*xi**2 + D(p)*yi + E(p)*yi**2 + F(p)*xi*yi - zi**2
-            return abs(function)
+    #   Collect the terms constant in, inverse to, and linear in p^(1/4)
+    c_const = A0 + B0*x + C0*x**2 + D0*y + E0*y**2 + F0*x*y - z**2
+    c_inv = A1 + B1*x + C1*x**2
+    c_lin = D1*y + E1*y**2 + F1*x*y
     
-        res = minimize_scalar(Joy2002, bounds=(1e-5, 5e1), method='bounded')
-        
-        resulting_pressures.append(res.x)
+    n_points = len(x)
+    roots = np.full((n_points, 2), np.nan)
     
-    return resulting_pressures
-        
-    
\ No newline at end of file
+    with np.errstate(divide='ignore', invalid='ignore'):
+        #   Positive turning point, if any
+        u_turn = (-c_const / (5*c_lin))**(1/4)
+        has_turn = (c_lin != 0) & (-c_const / (5*c_lin) > 0)
+        #   Beyond this (Cauchy) bound, g has the sign of its leading term
+        u_bound = 1 + np.maximum(np.abs(c_const), np.abs(c_inv)) / np.abs(c_lin)
+    
+    #   Without a turning point, g is monotonic on (0, inf)
+    lower = np.zeros((n_points, 2))
+    upper = np.where(has_turn, u_turn, u_bound)[:, None] * np.ones((1, 2))
+    lower[:, 1] = np.where(has_turn, u_turn, np.nan)
+    upper[:, 1] = np.where(has_turn, u_bound, np.nan)
+    
+    #   Linear case (c_lin == 0): u = -c_inv/c_const
+    linear = c_lin == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        u_linear = -c_inv[linear] / c_const[linear]
+    roots[linear, 0] = np.where(u_linear > 0, u_linear, np.nan)
+    lower[linear], upper[linear] = np.nan, np.nan
+    
+    #   Solve each bracketed segment
+    segments = np.isfinite(lower.ravel()) & np.isfinite(upper.ravel())
+    segment_index = np.repeat(np.arange(n_points), 2)[segments]
+    a, b, c = c_lin[segment_index], c_const[segment_index], c_inv[segment_index]
+    
+    def g(u, index):
+        u4 = (u*u)**2
+        a_i, b_i = a[index], b[index]
+        return a_i*u4*u + b_i*u + c[index], 5*a_i*u4 + b_i
+    
+    #   Start from the root of the dominant terms on each segment: 
+    #   b u + c below the turning point, and a u^5 + b u above it
+    lower, upper = lower.ravel()[segments], upper.ravel()[segments]
+    below = (np.arange(2*n_points) % 2 == 0)[segments]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        u0 = np.where(below, -c/b, (-b/a)**(1/4))
+    u0 = np.where(np.isfinite(u0), u0, 0.56)
+    u, converged, _, _ = solve_Elementwise(g, lower, upper, x0=np.clip(u0, lower, upper), 
+                                           xtol=1e-12, ftol=0)
+    u[~converged | (u <= 0)] = np.nan
+    roots.ravel()[np.flatnonzero(segments)] = u
+    
+    #   p = u^4, with the lowest pressure first
+    pressures = np.sort(roots**4, axis=1)
+    no_solution = np.all(np.isnan(pressures), axis=1)
+    
+    if return_all:
+        return pressures, no_solution
+    return pressures[:, 0]
@@ -28,6 +28,7 @@ from scipy.optimize import approx_fprime
 from sklearn.metrics import confusion_matrix
 
 import BoundaryForwardModeling as BFM
+import BoundaryFunctionCache as BFC
 import BoundaryModels as BM
 import JoyBoundaryCoords as JBC
 
@@ -270,9 +271,10 @@ def _HybridMCMC(boundary, model_name,
                                        alpha = p_dyn_α_latent,
                                        observed = data_draw['pressure_draw'].to_numpy('float64'))
             
-            data_draw_coords = [data_draw['t'].to_numpy('float64'), 
-                                data_draw['p'].to_numpy('float64'),
-                                p_dyn_draw]
+            # The t and p terms of the model are computed once, as constants of the graph
+            data_draw_coords = BM.ObservationGeometry(data_draw['t'].to_numpy('float64'), 
+                                                      data_draw['p'].to_numpy('float64'),
+                                                      p_dyn_draw)
             
             # This gives "NotImplementedError: LogCDF method not implemented for skewnormal_rv{"(),(),()->()"}"
             # p_dyn_skew_norm = pm.SkewNormal.dist(mu = data_draw['p_dyn_μ'].to_numpy('float64'), 
@@ -301,7 +303,10 @@ def _HybridMCMC(boundary, model_name,
             r_J02_original = BM.Joylike_r1fixed(J02_original_params, data_draw_coords)
             
             if 'log' not in model_name:
-                mu0 = pm.Deterministic("mu0", model_dict['model'](list(param_dict.values()), data_draw_coords))
+                # The model is compiled once per process (and cached on disk), and enters
+                # the graph as a single node, rather than being rebuilt for each pm.Model
+                model_op = BFC.get_ModelOp(model_name)
+                mu0 = pm.Deterministic("mu0", model_op(pt.stack(list(param_dict.values())), *data_draw_coords))
                 
                 sigma_b = pm.HalfNormal("sigma_b", 1.0)
                 sigma_m = pm.HalfNormal("sigma_m", 0.01)
@@ -20,6 +20,7 @@ from scipy.stats import gamma
 
 import JoyBoundaryCoords as JBC
 import BoundaryModels as BM
+import BoundaryFunctionCache as BFC
 import CrossingPreprocessingRoutines as preproc
 import CrossingPostprocessingRoutines as postproc
 
@@ -1468,8 +1469,9 @@ def plot_Interpretation(model_dict, posterior, positions_df):
     # xyz = BM.convert_SphericalSolarToCartesian(r_coord, t_coord, p_coords['Dawn'])
     # axs[0].plot(xyz[0], xyz[1], color='black')
     
+    dd_geometry = BM.ObservationGeometry(t_coord, p_coords['DD'], p_dyn_coords['50'])
     for params, sigma_m, sigma_b in zip(posterior_params_vals, posterior_sigma_m_vals, posterior_sigma_b_vals):
-        r_coord = model_dict['model'](params, [t_coord, p_coords['DD'], p_dyn_coords['50']])
+        r_coord = model_dict['model'](params, dd_geometry)
         r_coord = r_coord + (rng.normal(loc = 0, scale = sigma_m) * np.sin(t_coord/2)**2 + rng.normal(loc = 0, scale = sigma_b))
         xyz = BM.convert_SphericalSolarToCartesian(r_coord, t_coord, p_coords['DD'])
         axs[0].plot(xyz[0], xyz[1], color='black', alpha=0.05, zorder=-10)
@@ -1488,8 +1490,9 @@ def plot_Interpretation(model_dict, posterior, positions_df):
     # xyz = BM.convert_SphericalSolarToCartesian(r_coord, t_coord, p_coords['South'])
     # axs[1].plot(xyz[0], xyz[2], color='black')
     
+    ns_geometry = BM.ObservationGeometry(t_coord, p_coords['NS'], p_dyn_coords['50'])
     for params, sigma_m, sigma_b in zip(posterior_params_vals, posterior_sigma_m_vals, posterior_sigma_b_vals):
-        r_coord = model_dict['model'](params, [t_coord, p_coords['NS'], p_dyn_coords['50']])
+        r_coord = model_dict['model'](params, ns_geometry)
         r_coord = r_coord + (rng.normal(loc = 0, scale = sigma_m) * np.sin(t_coord/2)**2 + rng.normal(loc = 0, scale = sigma_b))
         xyz = BM.convert_SphericalSolarToCartesian(r_coord, t_coord, p_coords['NS'])
         axs[1].plot(xyz[0], xyz[2], color='black', alpha=0.05, zorder=-10)
@@ -1745,12 +1748,13 @@ def plot_AgainstTrajectories(boundary = 'BS', model_dict = None, posterior = Non
     # Include a sense of sigma
     filtered_params, other_params = [], []
     all_r = []
+    dawn_geometry = BM.ObservationGeometry(t_coord, p_coords['Dawn'], p_dyn_coords['50'])
     for params, sigma_params in zip(posterior_params_vals, posterior_sigmas_vals):
-        r_coord = model_dict['model'](params, [t_coord, p_coords['Dawn'], p_dyn_coords['50']])
+        r_coord = model_dict['model'](params, dawn_geometry)
         # r_coord_sigma = (rng.normal(loc = 0, scale = sigma/2) * (2/(1 + np.cos(t_coord))))
         # r_coord_sigma = r_coord * (rng.normal(loc = 0, scale = sigma/2) / params[0]) # !!!! Move this parametrization to sampler
         
-        r_sigma = model_dict['model'](sigma_params, [t_coord, p_coords['Dawn'], p_dyn_coords['50']])
+        r_sigma = model_dict['model'](sigma_params, dawn_geometry)
         
         r_coord += rng.normal(loc = 0, scale = 1, size = 1) * r_sigma
         xyz = BM.convert_SphericalSolarToCartesian(r_coord, t_coord, p_coords['Dawn'])
@@ -1871,59 +1875,39 @@ def make_BoundaryFunctionFromPosterior(model_name, posterior_df):
         else:
             df = params_df
         
-        r = []
-        for index, row in df.iterrows():
-            
-            mu0 = model_dict['model'](row[model_param_names], coords)
-            
-            if n_modes == 2:
-                mu1 = mu0 + row['buffer_m'] * mu0 + row['buffer_b']
-                dirichlet_odds = [row['w0'], row['w1']]
-            elif n_modes == 1:
-                mu1 = mu0 * 0
-                dirichlet_odds = [1, 0] # Definitely mode 0
-            
-            # Choose a mode
-            rng = np.random.default_rng()
-            
-            # 
-            mu_choice = rng.choice([mu0, mu1], p = dirichlet_odds)
-            
-            # 
-            sigma = row['sigma_m'] * mu0 + row['sigma_b'] # sigma based on mu0, not mu_choice
-            
-            # Get gamma distribution shape parameters
-            # if (sigma == 0).any():
-            #     breakpoint()
-            # shape_param_k = (mu_choice / sigma)**2
-            # shape_param_theta = sigma**2 / mu_choice
-            
-            gamma_alpha = (mu_choice / sigma)**2
-            gamma_beta = mu_choice / sigma**2
-            
-            # The boundary mean is specified by a gamma distribution
-            # sigma should vary surface-to-surface, not within one surface
-            # So we can't simply do rng.gamma() for input coord
-            # Instead, get a complete gamma distribution
-            # gamma_dist = pm.Gamma.dist(mu = mu_choice, sigma = sigma)
-            
-            # Determine how many sigma away each sample should be
-            normal_draw = rng.normal(loc = 0, scale = 1, size = 1)
-            
-            # Convert these to percentiles
-            percentile_draw = norm.cdf(normal_draw, loc = 0, scale = 1)
-            
-            
-            
-            # Sample the gamma distribution at that percentile
-            if average == False:
-
-                mu_final = gamma.ppf(percentile_draw, gamma_alpha, scale = 1/gamma_beta)
-            else:
-                
-                mu_final = gamma.ppf(0.50, gamma_alpha, scale = 1/gamma_beta)
-
-            r.append(mu_final.flatten())
+        # Evaluate the model for every set of parameters at once, as (S, N),
+        # with the same compiled function as the sampler
+        n_rows = len(df)
+        column = lambda name: df[name].to_numpy(dtype='float64')[:, None]
+        mu0 = BFC.get_CompiledModel(model_name)(df[model_param_names].to_numpy(dtype='float64'),
+                                                coords).reshape(n_rows, -1)
+        
+        rng = np.random.default_rng()
+        if n_modes == 2:
+            mu1 = mu0 + column('buffer_m') * mu0 + column('buffer_b')
+            # Choose a mode for each set of parameters, with odds [w0, w1]
+            mode_1 = rng.random((n_rows, 1)) >= column('w0')
+        elif n_modes == 1:
+            mu1 = mu0 * 0
+            mode_1 = np.full((n_rows, 1), False) # Definitely mode 0
+        mu_choice = np.where(mode_1, mu1, mu0)
+        
+        sigma = column('sigma_m') * mu0 + column('sigma_b') # sigma based on mu0, not mu_choice
+        
+        gamma_alpha = (mu_choice / sigma)**2
+        gamma_beta = mu_choice / sigma**2
+        
+        # The boundary mean is specified by a gamma distribution
+        # sigma should vary surface-to-surface, not within one surface
+        # So each surface gets one draw of how many sigma away it should be,
+        # converted to a percentile of the gamma distribution
+        if average == False:
+            percentile_draw = norm.cdf(rng.normal(loc = 0, scale = 1, size = (n_rows, 1)))
+            mu_final = gamma.ppf(percentile_draw, gamma_alpha, scale = 1/gamma_beta)
+        else:
+            mu_final = gamma.ppf(0.50, gamma_alpha, scale = 1/gamma_beta)
+        
+        r = list(mu_final)
             
         if return_weights == True:
             if n_modes == 1:
@@ -2324,14 +2308,15 @@ def ConfusionMatrix_vs_WindowSize(boundary, model_dict, posterior, constant_post
         
         # For each point in positions_df, get the expected boundary location
         # Do this n times to account for uncertainty
+        positions_geometry = BM.ObservationGeometry(*positions_df[['t', 'p', 'p_dyn']].to_numpy('float64').T)
         for params, sigma_params in zip(posterior_params_vals, posterior_sigmas_vals):
             
             # Boundary distance according to model:
-            r_b = model_dict['model'](params, positions_df[['t', 'p', 'p_dyn']].to_numpy('float64').T)
+            r_b = model_dict['model'](params, positions_geometry)
             
             # Uncertainty on r_b
             if flag_multi_sigma == 1:
-                r_b_sigma = model_dict['model'](sigma_params, positions_df[['t', 'p', 'p_dyn']].to_numpy('float64').T)
+                r_b_sigma = model_dict['model'](sigma_params, positions_geometry)
                 if (r_b_sigma == 0).any():
                     r_b_sigma[np.argwhere(r_b_sigma == 0)] = r_b[np.argwhere(r_b_sigma == 0)] * 1e-6
             else:
@@ -1,5 +1,401 @@
+import numpy as np
+
+import BoundaryModelsCore as BMC
+
+# Posterior samples, keyed by (path, modification time), so each file is
+# only read and converted once per session
+_posterior_cache = {}
+
+# Column order of the cached posterior sample matrix, and the values used 
+# for parameters which a model holds fixed (and so are not in its posterior)
+_posterior_param_names = ['r0', 'r1', 'r2', 'r3', 'a0', 'a1', 'sigma_b', 'sigma_m']
+_posterior_param_defaults = {'r1': -0.25, 'r2': 0.0, 'r3': 0.0}
+
+def load_PosteriorSamples(posterior_path):
+    """
+    Read a posterior (as pickled by MCMC.HybridMCMC) into a compact 
+    (n_samples, 8) float array of the find_Boundary parameters:
+        r0, r1, r2, r3, a0, a1, sigma_b, sigma_m
+    
+    The array is cached, so repeated calls do not re-read the file unless 
+    it has been modified.
+
+    Parameters
+    ----------
+    posterior_path : str
+        Path to a *_posterior.pkl file
+
+    Returns
+    -------
+    samples : np.ndarray
+        (n_samples, 8) array of joint posterior samples
+
+    """
+    import os
+    import pickle
+    
+    posterior_path = os.path.abspath(posterior_path)
+    key = (posterior_path, os.path.getmtime(posterior_path))
+    if key in _posterior_cache:
+        return _posterior_cache[key]
+    
+    with open(posterior_path, 'rb') as f:
+        posterior = pickle.load(f)
+    
+    # xarray Datasets (chain, draw) are flattened to one row per sample
+    if hasattr(posterior, 'to_dataframe'):
+        posterior = posterior.to_dataframe()
+    
+    samples = np.empty((len(posterior), len(_posterior_param_names)), dtype='float64')
+    for i, name in enumerate(_posterior_param_names):
+        if name in posterior.columns:
+            samples[:, i] = posterior[name].to_numpy(dtype='float64')
+        elif name in _posterior_param_defaults:
+            samples[:, i] = _posterior_param_defaults[name]
+        else:
+            raise ValueError("Posterior '{}' is missing parameter '{}'".format(posterior_path, name))
+    
+    # Drop any stale entries for this file before caching
+    for stale_key in [k for k in _posterior_cache if k[0] == posterior_path]:
+        del _posterior_cache[stale_key]
+    _posterior_cache[key] = samples
+    
+    return samples
+
+def _get_BoundaryParameters(boundary, n, rng, posterior=None, normals=None):
+    """
+    Draw n Monte Carlo samples of the boundary model parameters
+
+    Parameters
+    ----------
+    boundary : str
+        'MP'/'magnetopause' or 'BS'/'bow shock'
+    n : int
+        Number of samples to draw
+    rng : numpy.random.Generator
+        Random number generator used for the draws
+    posterior : str, optional
+        Path to a saved posterior. If given, joint samples are drawn 
+        (with replacement) from the posterior instead of the default 
+        parameters for boundary. The default is None.
+    normals : np.ndarray, optional
+        (7, n) array of standard normal deviates to use in place of rng,
+        e.g. from a quasi-random sequence. Rows are used for sigma_b, 
+        sigma_m, r0, r2, r3, a0, a1 in turn; only the first row is used 
+        (as a uniform deviate) to choose posterior samples. 
+        The default is None.
+
+    Returns
+    -------
+    C : np.ndarray
+        (6, n) array of the shape parameters r0, r1, r2, r3, a0, a1
+    sigma : np.ndarray
+        (2, n) array of the uncertainty parameters sigma_b, sigma_m
+
+    """
+    if normals is None:
+        normal = lambda mu, sd, i: rng.normal(mu, sd, n)
+    else:
+        normal = lambda mu, sd, i: mu + sd * normals[i]
+    
+    if posterior is not None:
+        samples = load_PosteriorSamples(posterior)
+        if normals is None:
+            rows = rng.integers(0, len(samples), n)
+        else:
+            from scipy.special import ndtr
+            rows = np.minimum((ndtr(normals[0]) * len(samples)).astype('int64'), len(samples) - 1)
+        draws = samples[rows].T
+        return draws[:6], draws[6:]
+    
+    if boundary.lower() in ['mp', 'magnetopause']:
+        r0 = normal(33.5, 0.0, 2)
+        r1 = np.full(n, -0.25)
+        r2 = normal(12.9, 0.0, 3)
+        r3 = normal(25.8, 0.0, 4)
+        a0 = normal(0.19, 0.00, 5)
+        a1 = normal(1.27, 0.00, 6)
+        
+        sigma_b = normal(16.8, 0.8, 0)
+        sigma_m = normal(0.15, 0.01, 1)
+        
+    elif boundary.lower() in ['bs', 'bow shock', 'bow_shock', 'bowshock']:
+        r0 = normal(36.4, 0.0, 2)
+        r1 = np.full(n, -0.25)
+        r2 = normal(0.0, 0.0, 3)
+        r3 = normal(9.9, 0.0, 4)
+        a0 = normal(0.89, 0.00, 5)
+        a1 = normal(0.88, 0.00, 6)
+        
+        sigma_b = normal(13.3, 0.8, 0)
+        sigma_m = normal(0.20, 0.01, 1)
+    
+    else:
+        raise ValueError("Unrecognized boundary '{}'".format(boundary))
+    
+    C = np.array([r0, r1, r2, r3, a0, a1])
+    sigma = np.array([sigma_b, sigma_m])
+    
+    return C, sigma
+
+def _get_BoundaryDistance(theta, phi, p_sw, C, sigma, gauss_factor, 
+                          return_derivatives=False):
+    """
+    Vectorized boundary distance r_b, broadcasting the coordinates 
+    (theta, phi, p_sw) against the Monte Carlo samples in C, sigma, and 
+    gauss_factor
+    
+    If return_derivatives, also return the analytic partial derivatives
+    (dr_b/dtheta, dr_b/dphi, dr_b/dp_sw)
+    """
+    r_ss = C[0] * p_sw**C[1]
+    alpha_f = C[4] + C[5] * p_sw
+    
+    pass_positive_phi = 0.5*np.sign(phi)+0.5
+    pass_negative_phi = -0.5*np.sign(phi)+0.5
+    
+    r_b_prime = (np.sin(theta/2)**2) * (np.sin(phi)**2) * p_sw**C[1] * \
+        (pass_positive_phi * C[2] + pass_negative_phi * C[3])
+    
+    r_b_main = r_ss * (2/(1 + np.cos(theta)))**alpha_f
+    r_b = r_b_main + r_b_prime
+    
+    if return_derivatives:
+        # The noise term scales every derivative by (1 + sigma_m * gauss_factor)
+        scale = 1 + sigma[1]*gauss_factor
+        
+        drdtheta = r_b_main * alpha_f * np.sin(theta)/(1 + np.cos(theta)) + \
+            0.5*np.sin(theta) * (np.sin(phi)**2) * p_sw**C[1] * \
+            (pass_positive_phi * C[2] + pass_negative_phi * C[3])
+        drdphi = (np.sin(theta/2)**2) * np.sin(2*phi) * p_sw**C[1] * \
+            (pass_positive_phi * C[2] + pass_negative_phi * C[3])
+        drdp = r_b_main * (C[1]/p_sw + C[5]*np.log(2/(1 + np.cos(theta)))) + \
+            r_b_prime * C[1]/p_sw
+    
+    r_b = r_b + (sigma[0] + sigma[1]*r_b)*gauss_factor
+    
+    if return_derivatives:
+        return r_b, drdtheta*scale, drdphi*scale, drdp*scale
+    return r_b
+
+def _solve_Boundaries(unknown, known, guess, C, sigma, gauss_factor):
+    """
+    Solve r_b - r = 0 for the unknown coordinate independently for every 
+    point (along the first axis) and Monte Carlo sample (along the second 
+    axis), using bracketed Newton-bisection with analytic derivatives
+
+    Parameters
+    ----------
+    unknown : str
+        One of 'x', 'y', 'z', 'p_sw'
+    known : dict
+        The three known coordinates, as (N,) arrays
+    guess : np.ndarray
+        (N,) array of initial guesses; for 'p_sw', in log10 space
+    C, sigma, gauss_factor : np.ndarray
+        Monte Carlo samples, as from _get_BoundaryParameters
+
+    Returns
+    -------
+    solutions, converged, iterations, residuals : np.ndarray
+        (N, n) arrays, with p_sw solutions in log10 space
+
+    """
+    from BoundarySolvers import find_Brackets, solve_Elementwise
+    
+    n_points, n = len(guess), len(gauss_factor)
+    
+    def fn(dependent, index):
+        point, sample = np.divmod(index, n)
+        
+        columns = {key: val[point] for key, val in known.items()}
+        if unknown == 'p_sw':
+            columns[unknown] = 10.**dependent
+        else:
+            columns[unknown] = dependent
+        
+        x_, y_, z_ = columns['x'], columns['y'], columns['z']
+        rho = np.sqrt(y_**2 + z_**2)
+        r = np.sqrt(x_**2 + rho**2)
+        theta = np.arctan2(rho, x_)
+        phi = np.arctan2(-y_, z_)
+        
+        r_b, drdtheta, drdphi, drdp = _get_BoundaryDistance(
+            theta, phi, columns['p_sw'], 
+            C[:, sample], sigma[:, sample], gauss_factor[sample], 
+            return_derivatives=True)
+        
+        # Chain rule through (r, theta, phi) to the unknown coordinate
+        if unknown == 'x':
+            dfdv = drdtheta * (-rho/r**2) - x_/r
+        elif unknown == 'y':
+            dfdv = drdtheta * x_*y_/(rho*r**2) + drdphi * (-z_/rho**2) - y_/r
+        elif unknown == 'z':
+            dfdv = drdtheta * x_*z_/(rho*r**2) + drdphi * (y_/rho**2) - z_/r
+        else:
+            dfdv = drdp * columns['p_sw'] * np.log(10)
+        
+        return r_b - r, dfdv
+    
+    # Start every sample of a point from the same guess, and find the 
+    # sign change nearest to it
+    x0 = np.repeat(guess, n)
+    if unknown == 'p_sw':
+        lower, upper, found = find_Brackets(fn, x0, step=0.1, n_steps=8)
+    else:
+        lower, upper, found = find_Brackets(fn, x0, step=1.0, n_steps=16)
+    
+    solutions, converged, iterations, residuals = solve_Elementwise(fn, lower, upper, x0=x0)
+    converged &= found
+    
+    solutions = solutions.reshape(n_points, n)
+    converged = converged.reshape(n_points, n)
+    iterations = iterations.reshape(n_points, n)
+    residuals = residuals.reshape(n_points, n)
+    
+    # Where y == z == 0, r_b is independent of x, and the trivial solution is
+    if unknown == 'x':
+        trivial = (known['y'] == 0) & (known['z'] == 0)
+        if trivial.any():
+            r_b = _get_BoundaryDistance(0, 0, known['p_sw'][trivial, None], C, sigma, gauss_factor)
+            solutions[trivial] = r_b
+            converged[trivial] = True
+            iterations[trivial] = 0
+            residuals[trivial] = 0
+    
+    return solutions, converged, iterations, residuals
+
+def _get_SampleStatistics(solutions, check):
+    """
+    Mean and standard deviation of the converged samples (check) of each 
+    point, along the last axis; NaN where no samples converged
+    """
+    count = np.sum(check, axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.sum(np.where(check, solutions, 0), axis=-1) / count
+        std = np.sqrt(np.sum(np.where(check, (solutions - mean[..., None])**2, 0), axis=-1) / count)
+    return mean, std
+
+def _sample_Boundaries(boundary, unknown, known, guess, n=500, posterior=None,
+                       sampling='random', seed=None, tol=None, n_max=None):
+    """
+    Draw Monte Carlo samples and solve for the unknown coordinate at every 
+    point, optionally adding samples until the statistics converge
+    
+    With tol, the number of samples is doubled (solving only the new 
+    samples, and only for points which have not yet converged) until the 
+    change in both the mean and standard deviation of every point is below
+    tol, or n_max samples have been drawn. Points dropped early are marked
+    as not solved in later blocks.
+
+    Parameters
+    ----------
+    boundary, unknown, known, guess
+        As in _solve_Boundaries
+    n : int, optional
+        Number of samples in the first block. The default is 500.
+    posterior : str, optional
+        Path to a saved posterior. The default is None.
+    sampling : str, optional
+        'random' for pseudo-random draws, or 'qmc' for scrambled Sobol 
+        draws, in which case n (and n_max) are rounded up to powers of 2.
+        The default is 'random'.
+    seed : int, optional
+        Seed for the random (or scrambled Sobol) draws. The default is None.
+    tol : float, optional
+        Convergence tolerance on the mean and standard deviation, in units
+        of the unknown (R_J, or dex for p_sw). The default is None, in which
+        case exactly n samples are drawn.
+    n_max : int, optional
+        Maximum number of samples with tol. The default is 16*n.
+
+    Returns
+    -------
+    solutions, converged, iterations, residuals : np.ndarray
+        (N, n_total) arrays, as from _solve_Boundaries
+    solved : np.ndarray
+        (N, n_total) boolean array, False for samples which were skipped
+        because the point had already converged
+
+    """
+    rng = np.random.default_rng(seed)
+    
+    if sampling.lower() == 'qmc':
+        from scipy.stats import qmc
+        from scipy.special import ndtri
+        
+        n = int(2**np.ceil(np.log2(n)))
+        
+        # One dimension for gauss_factor, and one per (possible) parameter
+        sobol = qmc.Sobol(d=8, scramble=True, seed=rng)
+        def draw_Normals(m):
+            u = sobol.random(m).T
+            return ndtri(np.clip(u, 1e-12, 1 - 1e-12))
+        
+    elif sampling.lower() == 'random':
+        draw_Normals = None
+    
+    else:
+        raise ValueError("Unrecognized sampling '{}'".format(sampling))
+    
+    if n_max is None:
+        n_max = 16 * n
+    if draw_Normals is not None:
+        # The total must stay a power of 2 to keep the Sobol points balanced
+        n_max = int(2**np.ceil(np.log2(n_max)))
+    
+    n_points = len(guess)
+    active = np.arange(n_points)
+    blocks = []
+    mean, std = np.full(n_points, np.nan), np.full(n_points, np.nan)
+    n_block, n_total = n, 0
+    while True:
+        if draw_Normals is None:
+            gauss_factor = rng.normal(0, 1, n_block)
+            C, sigma = _get_BoundaryParameters(boundary, n_block, rng, posterior=posterior)
+        else:
+            normals = draw_Normals(n_block)
+            gauss_factor = normals[0]
+            C, sigma = _get_BoundaryParameters(boundary, n_block, rng, posterior=posterior, 
+                                               normals=normals[1:])
+        
+        # Solve only the points which have not yet converged
+        block = [np.full((n_points, n_block), np.nan), 
+                 np.full((n_points, n_block), False), 
+                 np.zeros((n_points, n_block), dtype='int64'), 
+                 np.full((n_points, n_block), np.nan),
+                 np.full((n_points, n_block), False)]
+        results = _solve_Boundaries(unknown, {key: val[active] for key, val in known.items()}, 
+                                    guess[active], C, sigma, gauss_factor)
+        for full, result in zip(block, results):
+            full[active] = result
+        block[4][active] = True
+        blocks.append(block)
+        n_total += n_block
+        
+        if tol is None:
+            break
+        
+        # Compare the statistics before and after this block
+        solutions = np.concatenate([b[0][active] for b in blocks], axis=1)
+        check = np.concatenate([b[1][active] for b in blocks], axis=1)
+        new_mean, new_std = _get_SampleStatistics(solutions, check)
+        
+        done = (np.abs(new_mean - mean[active]) < tol) & (np.abs(new_std - std[active]) < tol)
+        mean[active], std[active] = new_mean, new_std
+        active = active[~done]
+        
+        if (len(active) == 0) or (n_total >= n_max):
+            break
+        
+        # Double the total number of samples
+        n_block = min(n_total, n_max - n_total)
+    
+    return [np.concatenate([b[i] for b in blocks], axis=1) for i in range(5)]
+
 def find_Boundary(boundary='MP', x=False, y=False, z=False, p_sw=False, 
-                  guess=1):
+                  guess=1, posterior=None, 
+                  n=500, sampling='random', seed=None, tol=None, n_max=None):
     """
     This function takes 3 of (x, y, z, p_sw) and estimates the 4th,
     beginning the search at 'guess'
@@ -26,6 +422,24 @@ def find_Boundary(boundary='MP', x=False, y=False, z=False, p_sw=False,
         typically double-valued; the value closest to initial guess will be 
         returned.
         The default is 1.
+    posterior : str, optional
+        Path to a saved posterior (*_posterior.pkl) from which to draw the 
+        model parameters. By default, the built-in parameters for boundary 
+        are used.
+    n : int, optional
+        Number of Monte Carlo samples. The default is 500.
+    sampling : str, optional
+        'random' for pseudo-random Monte Carlo samples, or 'qmc' for 
+        scrambled Sobol (quasi-random) samples, in which case n is rounded
+        up to a power of 2. The default is 'random'.
+    seed : int, optional
+        Seed, for reproducible results. The default is None.
+    tol : float, optional
+        If given, samples are added (doubling n each time) until the mean 
+        and standard deviation change by less than tol (in R_J, or in dex 
+        for p_sw). The default is None.
+    n_max : int, optional
+        Maximum number of samples when using tol. The default is 16*n.
 
     Returns
     -------
@@ -37,8 +451,6 @@ def find_Boundary(boundary='MP', x=False, y=False, z=False, p_sw=False,
             [mean, -std, +std]
 
     """
-    import numpy as np
-    from scipy.optimize import fsolve
     
     # If the function was called incorrectly, print the docstring
     bool_count = 0
@@ -49,106 +461,24 @@ def find_Boundary(boundary='MP', x=False, y=False, z=False, p_sw=False,
         print(find_Boundary.__doc__)
         return
     
-    # The uncertainties are found by Monte Carlo, 
-    # with random seed (rng), size (n), and samples (gauss_factor)
-    rng = np.random.default_rng()
-    n = 500 
-    gauss_factor = rng.normal(0, 1, n)
-    
-    # Choose the appropriate model parameter vector (MP or BS)
-    if boundary.lower() in ['mp', 'magnetopause']:
-        r0 = rng.normal(33.5, 0.0, n)
-        r1 = np.full(n, -0.25)
-        r2 = rng.normal(12.9, 0.0, n)
-        r3 = rng.normal(25.8, 0.0, n)
-        a0 = rng.normal(0.19, 0.00, n)
-        a1 = rng.normal(1.27, 0.00, n)
-        
-        sigma_b = rng.normal(16.8, 0.8, n)
-        sigma_m = rng.normal(0.15, 0.01, n)
-        
-        C = [r0, r1, r2, r3, a0, a1]
-        sigma = [sigma_b, sigma_m]
-    elif boundary.lower() in ['bs', 'bow shock', 'bow_shock', 'bowshock']:
-        r0 = rng.normal(36.4, 0.0, n)
-        r1 = np.full(n, -0.25)
-        r2 = rng.normal(0.0, 0.0, n)
-        r3 = rng.normal(9.9, 0.0, n)
-        a0 = rng.normal(0.89, 0.00, n)
-        a1 = rng.normal(0.88, 0.00, n)
-        
-        sigma_b = rng.normal(13.3, 0.8, n)
-        sigma_m = rng.normal(0.20, 0.01, n)
-        
-        C = [r0, r1, r2, r3, a0, a1]
-        sigma = [sigma_b, sigma_m]
-    
     # Determine which coordinate to solve for
-    if type(x) is bool:
-        fn_r = lambda x: np.sqrt(x**2 + y**2 + z**2)
-        fn_theta = lambda x: np.arctan2(np.sqrt(y**2 + z**2), x)
-        fn_phi = lambda x: np.arctan2(-y, z)
-        fn_log_p_sw = lambda x: np.log10(p_sw)
-        
-    elif type(y) is bool:
-        fn_r = lambda y: np.sqrt(x**2 + y**2 + z**2)
-        fn_theta = lambda y: np.arctan2(np.sqrt(y**2 + z**2), x)
-        fn_phi = lambda y: np.arctan2(-y, z)
-        # dependent = lambda: y
-        fn_log_p_sw = lambda y: np.log10(p_sw)
-        
-    elif type(z) is bool:
-        fn_r = lambda z: np.sqrt(x**2 + y**2 + z**2)
-        fn_theta = lambda z: np.arctan2(np.sqrt(y**2 + z**2), x)
-        fn_phi = lambda z: np.arctan2(-y, z)
-        fn_log_p_sw = lambda z: np.log10(p_sw)
-        
-    elif type(p_sw) is bool:
-        fn_r = lambda p_sw: np.sqrt(x**2 + y**2 + z**2)
-        fn_theta = lambda p_sw: np.arctan2(np.sqrt(y**2 + z**2), x)
-        fn_phi = lambda p_sw: np.arctan2(-y, z)
-        fn_log_p_sw = lambda log_p_sw: log_p_sw
-        
-        guess = np.log10(guess)
+    coords = {'x': x, 'y': y, 'z': z, 'p_sw': p_sw}
+    unknown = [key for key, val in coords.items() if type(val) is bool][0]
+    known = {key: np.array([val], dtype='float64') 
+             for key, val in coords.items() if key != unknown}
     
-    # This inner function returns the distance to the boundary (r_b)
-    def r_b(dependent):
-        
-        X = [fn_theta(dependent), 
-             fn_phi(dependent), 
-             10.**fn_log_p_sw(dependent)]
-        
-        r_ss = C[0] * X[2]**C[1]
-        alpha_f = C[4] + C[5] * X[2]
-        
-        
-        pass_positive_phi = 0.5*np.sign(X[1])+0.5
-        pass_negative_phi = -0.5*np.sign(X[1])+0.5
-        
-        r_b_prime = \
-            pass_positive_phi * (np.sin(X[0]/2)**2) * (C[2] * np.sin(X[1])**2) * X[2]**C[1] + \
-            pass_negative_phi * (np.sin(X[0]/2)**2) * (C[3] * np.sin(X[1])**2) * X[2]**C[1]
-            
-        r_b = r_ss * (2/(1 + np.cos(X[0])))**alpha_f + r_b_prime
-        
-        r_b = r_b + (sigma[0] + sigma[1]*r_b)*gauss_factor
-        
-        return r_b
-    
-    # This inner function returns the difference between r_b and the point
-    def minimization(dependent):
-        return r_b(dependent) - np.full(n, fn_r(dependent))
-    
-    # The best solution should minimize 'minimization' (i.e., ~0)
-    solutions = fsolve(minimization, np.full(n, guess))
-    # Check that solutions yield near-zero residuals
-    check = np.isclose(minimization(solutions), 0, atol=1e-1, rtol=0)
+    if unknown == 'p_sw':
+        guess = np.log10(guess)
     
-    # Unless y == z == 0, in which case r_b is independent of x
-    # then fsolve is unable to solve, and the trivial solution is
-    if y == z == 0.0:
-        solutions = r_b(0)
-        check = np.full(n, True)
+    # The uncertainties are found by Monte Carlo, drawing samples of the 
+    # appropriate model parameter vector (MP or BS, or posterior); 
+    # each sample is an independent scalar equation, solved elementwise
+    solutions, check, _, _, _ = _sample_Boundaries(boundary, unknown, known, 
+                                                np.array([guess], dtype='float64'),
+                                                n=n, posterior=posterior, 
+                                                sampling=sampling, seed=seed, 
+                                                tol=tol, n_max=n_max)
+    solutions, check = solutions[0], check[0]
     
     # For pressure, return lognormal uncertainties in linear space;
     # otherwise, return normal uncertainties
@@ -163,4 +493,290 @@ def find_Boundary(boundary='MP', x=False, y=False, z=False, p_sw=False,
     if check.all() == False:
         result = [np.nan for element in result]
 
-    return result
\ No newline at end of file
+    return result
+
+def find_Boundaries(boundary='MP', x=False, y=False, z=False, p_sw=False, 
+                    guess=1, n=500, posterior=None, 
+                    sampling='random', seed=None, tol=None, n_max=None, 
+                    full_output=False):
+    """
+    A batched version of find_Boundary: this function takes arrays of 3 of
+    (x, y, z, p_sw) and estimates the 4th at every point, solving all 
+    points and Monte Carlo samples together in one vectorized pass
+
+    Parameters
+    ----------
+    boundary : str
+        A string defining the boundary of interest. 
+        By default, the magnetopause.
+    x, y, z : arraylike or bool, optional
+        JSS coordinates of the points of interest.
+        Leave out or set to TRUE for the coordinate to estimate.
+    p_sw : arraylike or bool, optional
+        Solar wind (dynamic) pressure at the points of interest.
+        Leave out or set to TRUE to estimate p_sw.
+    guess : arraylike, optional
+        Initial guess(es) for estimating the result, either one value for 
+        all points or one per point. The default is 1.
+    n : int, optional
+        Number of Monte Carlo samples, shared between all points. 
+        The default is 500.
+    posterior : str, optional
+        Path to a saved posterior (*_posterior.pkl) from which to draw the 
+        model parameters. By default, the built-in parameters for boundary 
+        are used.
+    sampling : str, optional
+        'random' for pseudo-random Monte Carlo samples, or 'qmc' for 
+        scrambled Sobol (quasi-random) samples, in which case n is rounded
+        up to a power of 2. The default is 'random'.
+    seed : int, optional
+        Seed, for reproducible results. The default is None.
+    tol : float, optional
+        If given, samples are added (doubling n each time) until the mean 
+        and standard deviation of every point change by less than tol (in 
+        R_J, or in dex for p_sw). Points which converge early are not 
+        resampled. The default is None.
+    n_max : int, optional
+        Maximum number of samples when using tol. The default is 16*n.
+    full_output : bool, optional
+        If True, also return the per-sample solver diagnostics.
+        The default is False.
+
+    Returns
+    -------
+    result : np.ndarray
+        Spatial coordinates are normally distributed, and return an 
+        (N, 2) array of:
+            [mean, std]
+        Pressure coordinates are lognormally distributed, and return an 
+        (N, 3) array of:
+            [mean, -std, +std]
+        Statistics are calculated from the converged samples only; points 
+        with no converged samples are NaN.
+    converged : np.ndarray
+        (N,) boolean array, True where every sample converged
+    info : dict
+        Only if full_output. (N, n_total) arrays of the per-sample 'solutions' 
+        (log10 for pressure), 'converged', 'iterations', and 'residuals', 
+        and 'solved' (False for samples skipped after the point converged)
+
+    """
+    # Exactly one coordinate must be left out
+    coords = {'x': x, 'y': y, 'z': z, 'p_sw': p_sw}
+    unknown = [key for key, val in coords.items() if type(val) is bool]
+    if len(unknown) != 1:
+        print(find_Boundaries.__doc__)
+        return
+    unknown = unknown[0]
+    
+    # Broadcast the known coordinates and guess to a common (N,) shape
+    known_keys = [key for key in coords.keys() if key != unknown]
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(coords[key], dtype='float64')) 
+                                   for key in known_keys],
+                                 np.atleast_1d(np.asarray(guess, dtype='float64')))
+    arrays = [arr.ravel() for arr in arrays]
+    known = dict(zip(known_keys, arrays[:-1]))
+    guess = arrays[-1]
+    
+    if unknown == 'p_sw':
+        guess = np.log10(guess)
+    
+    # Monte Carlo samples are shared between all points, and each sample 
+    # is an independent scalar equation, solved elementwise
+    solutions, check, iterations, residuals, solved = _sample_Boundaries(boundary, unknown, known, guess, 
+                                                                        n=n, posterior=posterior, 
+                                                                        sampling=sampling, seed=seed, 
+                                                                        tol=tol, n_max=n_max)
+    
+    # Statistics over the converged samples of each point
+    mean, std = _get_SampleStatistics(solutions, check)
+    
+    # For pressure, return lognormal uncertainties in linear space;
+    # otherwise, return normal uncertainties
+    if unknown == 'p_sw':
+        result = np.array([10.**mean,
+                           10.**mean - 10.**(mean - std),
+                           10.**(mean + std) - 10.**mean]).T
+    else:
+        result = np.array([mean, std]).T
+    
+    if full_output:
+        info = {'solutions': solutions, 'converged': check, 
+                'iterations': iterations, 'residuals': residuals, 
+                'solved': solved}
+        return result, (check | ~solved).all(axis=1), info
+    
+    return result, (check | ~solved).all(axis=1)
+
+def find_InsideProbability(boundary='MP', x=0, y=0, z=0, p_sw=0.1, n=500, 
+                           posterior=None, distribution='normal', seed=None, 
+                           chunksize=2**20):
+    """
+    The probability that each point (x, y, z) lies inside of the boundary
+    (i.e., r < r_b) at solar wind pressure p_sw, evaluated analytically 
+    from the predictive distribution of r_b and averaged over n samples of
+    the model parameters, without solving for the boundary position
+
+    Parameters
+    ----------
+    boundary : str or list of str, optional
+        The boundary (or boundaries) of interest. The default is 'MP'.
+    x, y, z : arraylike
+        JSS coordinates of the points of interest
+    p_sw : arraylike
+        Solar wind (dynamic) pressure at the points of interest
+    n : int, optional
+        Number of samples of the model parameters. The default is 500.
+    posterior : str or dict, optional
+        Path to a saved posterior from which to draw the model parameters,
+        or a dictionary of paths keyed by boundary. The default is None.
+    distribution : str, optional
+        Predictive distribution of r_b about the model, with standard 
+        deviation sigma_b + sigma_m * r_b: 
+            'normal', as in find_Boundary, or 
+            'gamma', as in PosteriorPlots. 
+        The default is 'normal'.
+    seed : int, optional
+        Seed, for reproducible results. The default is None.
+    chunksize : int, optional
+        Maximum number of (point, sample) pairs evaluated at once.
+        The default is 2**20.
+
+    Returns
+    -------
+    probability : np.ndarray or dict
+        (N,) array of inside-probabilities, or, for a list of boundaries, 
+        a dictionary of (N,) arrays keyed by boundary
+
+    """
+    from scipy.special import ndtr, gammaincc
+    
+    # Coordinates, transformed once for all boundaries
+    x, y, z, p_sw = [arr.ravel() for arr in np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype='float64')) 
+                                                                 for v in [x, y, z, p_sw]])]
+    r = np.sqrt(x**2 + y**2 + z**2)
+    theta = np.arctan2(np.sqrt(y**2 + z**2), x)
+    phi = np.arctan2(-y, z)
+    
+    rng = np.random.default_rng(seed)
+    
+    boundaries = [boundary] if type(boundary) is str else list(boundary)
+    probabilities = {}
+    for b in boundaries:
+        b_posterior = posterior.get(b) if type(posterior) is dict else posterior
+        C, sigma = _get_BoundaryParameters(b, n, rng, posterior=b_posterior)
+        
+        probability = np.empty(len(r))
+        step = max(1, chunksize // n)
+        for start in range(0, len(r), step):
+            chunk = slice(start, start + step)
+            
+            # Noise-free distance for each parameter sample, and its spread
+            mu = _get_BoundaryDistance(theta[chunk, None], phi[chunk, None], p_sw[chunk, None], 
+                                       C, [0, 0], 0)
+            s = sigma[0] + sigma[1] * mu
+            
+            with np.errstate(divide='ignore', invalid='ignore'):
+                if distribution.lower() == 'normal':
+                    p_inside = ndtr((mu - r[chunk, None]) / s)
+                elif distribution.lower() == 'gamma':
+                    p_inside = gammaincc((mu / s)**2, r[chunk, None] * mu / s**2)
+                else:
+                    raise ValueError("Unrecognized distribution '{}'".format(distribution))
+            
+            probability[chunk] = np.mean(p_inside, axis=1)
+        
+        probabilities[b] = probability
+    
+    if type(boundary) is str:
+        return probabilities[boundary]
+    return probabilities
+
+def _get_BoundaryDistanceFromGeometry(geometry, C, sigma, gauss_factor):
+    """
+    Equivalent to _get_BoundaryDistance, using the cached terms of a
+    BoundaryModelsCore.ObservationGeometry of (theta, phi, p_sw), so they
+    are shared between boundaries and Monte Carlo samples
+    """
+    p_sw_r1 = np.exp(C[1] * geometry.log_p_dyn)
+    
+    r_ss = C[0] * p_sw_r1
+    alpha_f = C[4] + C[5] * geometry.p_dyn
+    
+    r_b_prime = geometry.sin2_half_t * geometry.sin2_p * p_sw_r1 * \
+        (geometry.sg_pos * C[2] - geometry.sg_neg * C[3])
+    
+    r_b = r_ss * np.exp(alpha_f * geometry.log_flare_base) + r_b_prime
+    
+    r_b = r_b + (sigma[0] + sigma[1]*r_b)*gauss_factor
+    
+    return r_b
+
+def find_JointBoundaries(x=1, y=0, z=0, p_sw=0.1, n=500, posterior=None, 
+                         rho=0.0, seed=None, return_samples=False):
+    """
+    Evaluate the magnetopause and bow shock distances, and the 
+    magnetosheath thickness between them, along the direction of each 
+    point (x, y, z) at pressure p_sw, in a single pass
+    
+    The coordinate transforms and trigonometric/pressure terms are computed
+    once for both boundaries, and both boundaries use the same underlying
+    Monte Carlo draws, with the noise terms correlated by rho.
+
+    Parameters
+    ----------
+    x, y, z : arraylike
+        JSS coordinates defining the direction of interest
+    p_sw : arraylike
+        Solar wind (dynamic) pressure at the points of interest
+    n : int, optional
+        Number of Monte Carlo samples. The default is 500.
+    posterior : dict, optional
+        Paths to saved posteriors from which to draw the model parameters,
+        keyed by 'MP' and 'BS'. The default is None.
+    rho : float, optional
+        Correlation between the MP and BS noise terms (gauss_factor), 
+        between -1 and 1. The default is 0.0, i.e., independent.
+    seed : int, optional
+        Seed, for reproducible results. The default is None.
+    return_samples : bool, optional
+        If True, also return the (N, n) samples. The default is False.
+
+    Returns
+    -------
+    result : dict
+        (N, 2) arrays of [mean, std] for 'MP', 'BS', and 'thickness'
+        (= BS - MP)
+    samples : dict
+        Only if return_samples. (N, n) arrays for 'MP', 'BS', 'thickness'
+
+    """
+    if posterior is None:
+        posterior = {}
+    
+    x, y, z, p_sw = [arr.ravel() for arr in np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype='float64')) 
+                                                                 for v in [x, y, z, p_sw]])]
+    theta = np.arctan2(np.sqrt(y**2 + z**2), x)
+    phi = np.arctan2(-y, z)
+    
+    # Shared geometry, with points along the first axis
+    geometry = BMC.ObservationGeometry(theta[:, None], phi[:, None], p_sw[:, None])
+    
+    # Shared normal draws, correlated between boundaries by rho
+    rng = np.random.default_rng(seed)
+    base = rng.normal(0, 1, (2, n))
+    gauss_factors = {'MP': base[0], 
+                     'BS': rho * base[0] + np.sqrt(1 - rho**2) * base[1]}
+    
+    samples = {}
+    for b in ['MP', 'BS']:
+        C, sigma = _get_BoundaryParameters(b, n, rng, posterior=posterior.get(b))
+        samples[b] = _get_BoundaryDistanceFromGeometry(geometry, C, sigma, gauss_factors[b])
+    samples['thickness'] = samples['BS'] - samples['MP']
+    
+    result = {key: np.array([np.mean(val, axis=1), np.std(val, axis=1)]).T
+              for key, val in samples.items()}
+    
+    if return_samples:
+        return result, samples
+    return result
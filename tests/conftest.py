@@ -0,0 +1,39 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The modules in code/ import one another by name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'code'))
+
+import BoundaryModelsCore as BMC
+
+# Every model registered in BoundaryModelsCore.init
+MODEL_NAMES = ['Shuelike', 'Shuelike_r1fixed', 'Joylike', 'Joylike_r1fixed',
+               'Shuelike_rasymmetric', 'Shuelike_rasymmetric_r1fixed',
+               'Shuelike_rasymmetric_simple', 'Shuelike_aasymmetric_r1fixed',
+               'ShuelikeAsymmetric', 'ShuelikeAsymmetric_r1fixed',
+               'ShuelikeAsymmetric_AsPerturbation', 'ShuelikeAsymmetric_AsPerturbation_2',
+               'ShuelikeAsymmetric_AsPerturbation_r1fixed_2']
+
+def make_Samples(model_name, n_samples, rng):
+    """
+    Parameter samples near the prior means of a model, as (S, k)
+    """
+    descriptions = BMC.init(model_name)['param_descriptions'].values()
+    mu = np.array([desc.get('mu', 0.5) for desc in descriptions])
+    sigma = np.array([desc.get('sigma', 0.1) for desc in descriptions])
+    return mu + 0.1 * sigma * rng.standard_normal((n_samples, len(mu)))
+
+def make_Coordinates(n_points, rng):
+    """
+    Random (t, p, p_dyn) on the dayside and flanks
+    """
+    return [rng.uniform(0, np.radians(150), n_points),
+            rng.uniform(-np.pi, np.pi, n_points),
+            10**rng.uniform(-2, 0, n_points)]
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+import BoundaryBatch as BB
+
+def test_ResumeDropsPartialLines(tmp_path):
+    output = tmp_path / 'results.csv'
+    output.write_text('row,x,x_std,converged\n'
+                      '0,60.1,5.2,True\n'
+                      '1,,,False\n'
+                      '2,61.0\n'
+                      '3,62.3,5.')
+
+    completed = BB.read_CompletedRows(str(output))
+    assert list(completed) == [0, 1]
+    assert output.read_text() == 'row,x,x_std,converged\n0,60.1,5.2,True\n1,,,False\n'
+
+def test_ResumeCompletesInterruptedRun(tmp_path):
+    table = pd.DataFrame({'y': np.zeros(6), 'z': np.zeros(6), 'p_sw': np.full(6, 0.1)})
+    table.to_csv(tmp_path / 'input.csv', index=False)
+    output = tmp_path / 'results.csv'
+    args = [str(tmp_path / 'input.csv'), str(output), '--n', '20', '--chunksize', '2',
+            '--workers', '1', '--guess', '60', '--seed', '0']
+
+    BB.main(args)
+    complete = output.read_text()
+    # Interrupt the last write partway through a line
+    output.write_text(complete[:complete.rindex('\n', 0, -1) + 5])
+
+    BB.main(args)
+    result = pd.read_csv(output)
+    assert sorted(result['row']) == list(range(6))
+    assert result.notna().all().all()
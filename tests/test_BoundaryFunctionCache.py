@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('pytensor')
+
+import BoundaryModelsCore as BMC
+import BoundaryFunctionCache as BFC
+from conftest import MODEL_NAMES, make_Samples, make_Coordinates
+
+@pytest.mark.parametrize('model_name', MODEL_NAMES)
+def test_CompiledModelMatchesNumPy(model_name, rng):
+    parameters = make_Samples(model_name, 4, rng)
+    coordinates = make_Coordinates(500, rng)
+
+    compiled = BFC.get_CompiledModel(model_name, persist=False)
+    expected = BMC.evaluate_Model(model_name, parameters, coordinates)
+
+    np.testing.assert_allclose(compiled(parameters, coordinates), expected,
+                               rtol=1e-12, atol=1e-12, equal_nan=True)
+
+@pytest.mark.parametrize('model_name', MODEL_NAMES)
+def test_CompiledVJPMatchesGradient(model_name, rng):
+    parameters = make_Samples(model_name, 2, rng)
+    coordinates = make_Coordinates(100, rng)
+    cotangent = rng.standard_normal((2, 100))
+
+    parameter_gradient, _ = BFC.get_CompiledModel(model_name, persist=False).vjp(parameters, coordinates, cotangent)
+    _, gradient = BMC.evaluate_ModelGradient(model_name, parameters, coordinates)
+    expected = np.einsum('sn,snk->sk', cotangent, gradient[..., 3:])
+
+    np.testing.assert_allclose(parameter_gradient, expected, rtol=1e-9, atol=1e-9)
+
+def test_CompiledModelKeepsGeometry(rng):
+    parameters = make_Samples('Shuelike', 3, rng)
+    geometry = BMC.ObservationGeometry(*make_Coordinates(50, rng))
+
+    compiled = BFC.get_CompiledModel('Shuelike', persist=False)
+    np.testing.assert_array_equal(compiled(parameters, geometry),
+                                  BMC.evaluate_Model('Shuelike', parameters, geometry))
+    # The geometry's cached terms were used, not rebuilt from raw arrays
+    assert 'flare_base' in vars(geometry)
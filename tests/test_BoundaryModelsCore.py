@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+import BoundaryModelsCore as BMC
+from conftest import MODEL_NAMES, make_Samples, make_Coordinates
+
+def test_PressureTermCachesOnlyLiterals(rng):
+    geometry = BMC.ObservationGeometry(*make_Coordinates(100, rng))
+
+    for r1 in make_Samples('Shuelike', 5, rng)[:, 1]:
+        BMC.evaluate_Model('Shuelike', [40, r1, 0.6, 0.1], geometry)
+    assert len(geometry._pressure_terms) == 0
+
+    BMC.evaluate_Model('Shuelike_r1fixed', [40, 0.6, 0.1], geometry)
+    BMC.evaluate_Model('Shuelike_r1fixed', [35, 0.7, 0.0], geometry)
+    assert len(geometry._pressure_terms) == 1
+
+@pytest.mark.parametrize('model_name', MODEL_NAMES)
+def test_ModelGradientMatchesFiniteDifferences(model_name, rng):
+    parameters = make_Samples(model_name, 1, rng)[0]
+    coordinates = make_Coordinates(200, rng)
+    r, gradient = BMC.evaluate_ModelGradient(model_name, parameters, coordinates)
+
+    # Central differences in each coordinate, then each parameter
+    inputs = list(coordinates) + list(parameters)
+    for i, value in enumerate(inputs):
+        step = 1e-6 * np.maximum(np.abs(value), 1)
+        shifted = []
+        for sign in (1, -1):
+            perturbed = list(inputs)
+            perturbed[i] = value + sign*step
+            shifted.append(BMC.evaluate_Model(model_name, perturbed[3:], perturbed[:3]))
+        expected = (shifted[0] - shifted[1]) / (2*step)
+
+        finite = np.isfinite(expected) & np.isfinite(r)
+        np.testing.assert_allclose(gradient[finite, i], expected[finite],
+                                   rtol=1e-5, atol=1e-5 * np.abs(r[finite]).max())
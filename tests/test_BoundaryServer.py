@@ -0,0 +1,30 @@
+import pytest
+
+import BoundaryServer as BSv
+
+@pytest.fixture
+def service():
+    return BSv.BoundaryService(n=50)
+
+@pytest.mark.parametrize('payload', [{'boundary': ['MP'], 'x': True, 'y': 0, 'z': 0, 'p_sw': 0.1},
+                                     {'boundary': 'magnetopuase', 'x': True, 'y': 0, 'z': 0, 'p_sw': 0.1},
+                                     {'sampling': ['qmc'], 'x': True, 'y': 0, 'z': 0, 'p_sw': 0.1}])
+def test_BadBoundaryRequestsAreRejected(service, payload):
+    with pytest.raises(ValueError):
+        service.handle_Boundary(payload)
+
+def test_BadInsideRequestsAreRejected(service):
+    with pytest.raises(ValueError):
+        service.handle_Inside({'boundary': [['MP']], 'x': 60, 'y': 0, 'z': 0, 'p_sw': 0.1})
+    with pytest.raises(ValueError):
+        service.handle_Inside({'distribution': {'a': 1}, 'x': 60, 'y': 0, 'z': 0, 'p_sw': 0.1})
+
+def test_BatcherSurvivesBadKeys(service):
+    batcher = service.batchers['boundary']
+    with pytest.raises(TypeError):
+        batcher.submit((['MP'], 'x', 50, 'random'), {'y': [0.], 'z': [0.], 'p_sw': [0.1], 'guess': [60.]})
+    assert batcher.thread.is_alive()
+
+    response, n_points = service.handle_Boundary({'boundary': 'MP', 'x': True, 'y': 0, 'z': 0,
+                                                  'p_sw': 0.1, 'guess': 60})
+    assert n_points == 1 and response['converged'][0]
@@ -0,0 +1,30 @@
+import numpy as np
+
+import BoundaryModelsCore as BMC
+import BoundarySolvers as BS
+from conftest import make_Coordinates
+
+def test_GridBracketsSplitCloseRootPair():
+    # Two roots, 0.503 and 0.507, inside the cell [0.5, 0.6]
+    def fn(v, index):
+        return (v - 0.503)*(v - 0.507), 2*v - 1.010
+
+    lower, upper, n_brackets = BS.find_GridBrackets(fn, np.linspace(0, 1, 11), np.array([0.0, 1.0]))
+    assert list(n_brackets) == [2, 2]
+    assert (lower[0] <= 0.503 <= upper[0]) and upper[0] < 0.507
+    assert (lower[1] <= 0.507 <= upper[1]) and lower[1] > 0.503
+
+def test_ModelPressuresRoundTrip(rng):
+    model_name = 'ShuelikeAsymmetric_AsPerturbation_r1fixed_2'
+    parameters = [30, 10, 10, 1, 0.5]
+    t, p, _ = make_Coordinates(2000, rng)
+    p_dyn_true = 10**rng.uniform(-3, 1.5, len(t))
+    r = BMC.evaluate_Model(model_name, parameters, [t, p, p_dyn_true])
+
+    p_dyn, invertible, n_roots = BS.find_ModelPressures(model_name, parameters, r, t, p)
+
+    assert invertible.all()
+    np.testing.assert_allclose(BMC.evaluate_Model(model_name, parameters, [t, p, p_dyn]), r, rtol=1e-8)
+    # Every point solved to a root other than the true pressure reports more than one
+    other = np.abs(np.log10(p_dyn / p_dyn_true)) > 1e-6
+    assert (n_roots[other] > 1).all()
@@ -0,0 +1,10 @@
+import numpy as np
+
+import find_Boundary as fB
+
+def test_QMCSampleCapIsPowerOfTwo():
+    known = {'y': np.zeros(3), 'z': np.zeros(3), 'p_sw': np.full(3, 0.1)}
+    # tol is too small to be met, so sampling stops at the cap
+    solutions = fB._sample_Boundaries('MP', 'x', known, np.full(3, 60.), n=500, sampling='qmc',
+                                      seed=0, tol=1e-12, n_max=1000)[0]
+    assert solutions.shape == (3, 1024)